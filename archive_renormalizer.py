@@ -0,0 +1,193 @@
+"""Re-normalize the transcripts saved in output/ after normalizer changes.
+
+Every transcript JSON written by WorkingYouTubeToText (and the .txt file with
+the same name beside it) is normalized and segmented again from the raw
+recognizer text saved with it (raw_transcript), with the same spell index
+when one was used, then rewritten atomically. The stored transcript is
+already normalized and comma-free, so normalizing it again cannot recover
+comma-based sentence breaks or undo rules that changed. Transcripts without
+a usable raw text (saved before raw_transcript existed, or whose spell index
+is gone) are therefore left alone and counted as without_raw, unless
+include_without_raw asks to renormalize them from their stored text anyway,
+which cannot be undone. A manifest records the content hash of each file
+written and the normalizer version, so later runs skip every transcript
+where neither has changed. Transcripts are spread over a process pool.
+"""
+import glob
+import hashlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from normalization_rules import rules_version
+
+MANIFEST_FILE = '.renormalize_manifest.json'
+
+
+def normalizer_version(normalizer=None) -> str:
+    """Hash of the normalization rules and the sentence segmentation code in use"""
+    from persian_text_normalizer import PersianTextNormalizer, get_shared_normalizer
+    normalizer = normalizer or get_shared_normalizer()
+    profile = normalizer.pipeline.profile
+    digest = hashlib.sha256(rules_version(profile).encode())
+    for method in (PersianTextNormalizer._segment_normalized, PersianTextNormalizer._sentence_candidates,
+                   PersianTextNormalizer._merge_fragments, PersianTextNormalizer._fallback_sentences,
+                   PersianTextNormalizer._finish_sentences):
+        digest.update(inspect.getsource(method).encode())
+    if profile == 'hazm':
+        from importlib.metadata import version
+        digest.update(version('hazm').encode())
+    return digest.hexdigest()[:16]
+
+
+def find_transcripts(output_dir: str) -> List[Tuple[str, Optional[str]]]:
+    """(json_path, txt_path or None) for every transcript JSON in output_dir"""
+    transcripts = []
+    for json_path in sorted(glob.glob(os.path.join(output_dir, '*.json'))):
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not isinstance(data, dict) or 'transcript' not in data or 'sentences' not in data:
+            continue
+        txt_path = os.path.splitext(json_path)[0] + '.txt'
+        transcripts.append((json_path, txt_path if os.path.exists(txt_path) else None))
+    return transcripts
+
+
+def file_hash(path: Optional[str]) -> Optional[str]:
+    if not path:
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _write_atomic(path: str, text: str):
+    # Write under a temporary name first so readers never see half a file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _spell_index(path: Optional[str]):
+    """The transcript's spell index, or None if it had none or it is gone"""
+    if not path or not os.path.exists(path):
+        return None
+    from spell_correction import load_or_build_index
+    return load_or_build_index(path)
+
+
+def renormalize_transcript(json_path: str, txt_path: Optional[str],
+                           include_without_raw: bool = False) -> Tuple[int, bool, Optional[dict], bool]:
+    """Normalize one transcript again; returns (chars, changed, {path: new hash},
+    whether it started from the raw recognizer text). Without a usable raw
+    text and include_without_raw the files are left alone: (0, False, None, False)."""
+    from persian_text_normalizer import process_text
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    raw = data.get('raw_transcript')
+    spell_index = _spell_index(data.get('spell_index')) if raw is not None else None
+    if raw is not None and data.get('spell_index') and spell_index is None:
+        # Corrections could not be made again; keep the corrected text instead
+        raw = None
+    if raw is None and not include_without_raw:
+        return 0, False, None, False
+    processed = process_text(data['transcript'] if raw is None else raw)
+    clean_text = processed['clean_text']
+    clean_sentences = processed['clean_sentences']
+    if spell_index is not None:
+        # As in WorkingYouTubeToText._write_transcript
+        from spell_correction import repeated_words
+        keep = repeated_words(clean_text)
+        clean_text = spell_index.correct_text(clean_text, keep)
+        clean_sentences = [spell_index.correct_text(s, keep) for s in clean_sentences]
+    text_to_write = "\n".join(clean_sentences) if clean_sentences else clean_text
+
+    changed = data['transcript'] != clean_text or data['sentences'] != clean_sentences
+    data['transcript'] = clean_text
+    data['sentences'] = clean_sentences
+    _write_atomic(json_path, json.dumps(data, ensure_ascii=False, indent=2))
+    if txt_path:
+        with open(txt_path, 'r', encoding='utf-8') as f:
+            changed = changed or f.read() != text_to_write
+        _write_atomic(txt_path, text_to_write)
+    hashes = {path: file_hash(path) for path in (json_path, txt_path) if path}
+    return len(data['transcript']), changed, hashes, raw is not None
+
+
+def _renormalize_batch(batch, include_without_raw=False):
+    """Process pool worker"""
+    return [renormalize_transcript(json_path, txt_path, include_without_raw) for json_path, txt_path in batch]
+
+
+def renormalize_archive(output_dir: str = 'output', workers: Optional[int] = None, force: bool = False,
+                        include_without_raw: bool = False) -> dict:
+    """Re-normalize every transcript in output_dir whose files or normalizer changed.
+    force ignores the manifest; include_without_raw also rewrites transcripts
+    without a usable raw text from their already normalized text (see above).
+
+    Returns counts (transcripts, renormalized, skipped as unchanged, changed,
+    and without_raw: transcripts due that lack a usable raw text, left alone
+    unless include_without_raw), the characters normalized, the elapsed
+    seconds and the resulting files/sec and chars/sec.
+    """
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    version = normalizer_version()
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    entries = manifest.get('files', {}) if manifest.get('version') == version else {}
+
+    transcripts = find_transcripts(output_dir)
+    pending = []
+    for json_path, txt_path in transcripts:
+        recorded = entries.get(os.path.basename(json_path), {})
+        current = {os.path.basename(p): file_hash(p) for p in (json_path, txt_path) if p}
+        if force or recorded != current:
+            pending.append((json_path, txt_path))
+
+    if workers > 1 and len(pending) > 1:
+        # A few batches per worker keeps the pool busy without pickling per file
+        size = max(1, -(-len(pending) // (workers * 4)))
+        batches = [pending[i:i + size] for i in range(0, len(pending), size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = [result for batch in pool.map(_renormalize_batch, batches,
+                                                    [include_without_raw] * len(batches))
+                       for result in batch]
+    else:
+        results = _renormalize_batch(pending, include_without_raw)
+
+    for (json_path, _), (_, _, hashes, _) in zip(pending, results):
+        if hashes is not None:
+            entries[os.path.basename(json_path)] = {os.path.basename(p): h for p, h in hashes.items()}
+    # Forget transcripts that are gone
+    names = {os.path.basename(json_path) for json_path, _ in transcripts}
+    entries = {name: entry for name, entry in entries.items() if name in names}
+    _write_atomic(manifest_path, json.dumps({'version': version, 'files': entries}, ensure_ascii=False, indent=2))
+
+    elapsed = time.perf_counter() - start
+    chars = sum(result[0] for result in results)
+    renormalized = sum(1 for result in results if result[2] is not None)
+    return {
+        'transcripts': len(transcripts),
+        'renormalized': renormalized,
+        'skipped': len(transcripts) - len(pending),
+        'changed': sum(1 for result in results if result[1]),
+        'without_raw': sum(1 for result in results if not result[3]),
+        'chars': chars,
+        'seconds': elapsed,
+        'files_per_sec': renormalized / elapsed if elapsed else 0.0,
+        'chars_per_sec': chars / elapsed if elapsed else 0.0,
+    }
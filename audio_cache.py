@@ -0,0 +1,120 @@
+"""On-disk cache of downloaded audio, keyed by YouTube video id.
+
+Each entry is a directory holding the decoded WAV and the yt-dlp info JSON
+for one (video_id, max_minutes) window, so repeat requests skip both the
+download and the extract_info call. Entries are evicted least recently used
+first once the cache grows past max_bytes.
+"""
+import json
+import os
+import re
+import shutil
+from typing import Optional, Tuple
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+AUDIO_FILE = "audio.wav"
+INFO_FILE = "info.json"
+# Bulky yt-dlp fields that are never read back from the cache
+_DROPPED_INFO_KEYS = ('formats', 'thumbnails', 'automatic_captions', 'subtitles',
+                      'requested_formats', 'heatmap', 'fragments')
+
+
+def cache_key(video_id: str, max_minutes: Optional[int] = None) -> str:
+    """Directory name for a video id and download window"""
+    safe_id = re.sub(r'[^A-Za-z0-9_-]', '_', video_id)
+    window = f"{max_minutes}m" if isinstance(max_minutes, int) and max_minutes > 0 else "full"
+    return f"{safe_id}-{window}"
+
+
+class AudioCache:
+    """LRU-capped directory of downloaded audio plus yt-dlp metadata"""
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def lookup(self, video_id: str, max_minutes: Optional[int] = None) -> Optional[Tuple[str, dict]]:
+        """Return (audio_path, info) for a cached download, or None"""
+        entry = os.path.join(self.root, cache_key(video_id, max_minutes))
+        audio_path = os.path.join(entry, AUDIO_FILE)
+        info_path = os.path.join(entry, INFO_FILE)
+        if not (os.path.exists(audio_path) and os.path.exists(info_path)):
+            return None
+        try:
+            with open(info_path, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Mark as recently used for eviction
+        os.utime(info_path)
+        return audio_path, info
+
+    def store(self, video_id: str, max_minutes: Optional[int], audio_path: str, info: dict) -> str:
+        """Move a downloaded WAV into the cache with its info JSON; returns the cached path"""
+        entry = os.path.join(self.root, cache_key(video_id, max_minutes))
+        os.makedirs(entry, exist_ok=True)
+        cached_audio = os.path.join(entry, AUDIO_FILE)
+        info_path = os.path.join(entry, INFO_FILE)
+
+        # Write under temporary names first so a concurrent lookup never sees half an entry
+        tmp_audio = f"{cached_audio}.{os.getpid()}.tmp"
+        shutil.move(audio_path, tmp_audio)
+        os.replace(tmp_audio, cached_audio)
+        tmp_info = f"{info_path}.{os.getpid()}.tmp"
+        trimmed = {k: v for k, v in (info or {}).items() if k not in _DROPPED_INFO_KEYS}
+        with open(tmp_info, 'w', encoding='utf-8') as f:
+            json.dump(trimmed, f, ensure_ascii=False, default=str)
+        os.replace(tmp_info, info_path)
+
+        self.evict(keep=entry)
+        return cached_audio
+
+    def contains(self, path: str) -> bool:
+        """Whether a file lives inside this cache (and must not be deleted by callers)"""
+        root = os.path.abspath(self.root)
+        try:
+            return os.path.commonpath([root, os.path.abspath(path)]) == root
+        except ValueError:  # different drives on Windows
+            return False
+
+    def _entries(self):
+        """(last_used, size, path) for each cache entry"""
+        entries = []
+        for name in os.listdir(self.root):
+            entry = os.path.join(self.root, name)
+            if not os.path.isdir(entry):
+                continue
+            size, last_used = 0, 0.0
+            for file_name in os.listdir(entry):
+                try:
+                    stat = os.stat(os.path.join(entry, file_name))
+                except OSError:
+                    continue
+                size += stat.st_size
+                if file_name == INFO_FILE:
+                    last_used = stat.st_mtime
+            entries.append((last_used, size, entry))
+        return entries
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, keep: Optional[str] = None):
+        """Remove least recently used entries until the cache fits max_bytes"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            if keep and os.path.abspath(entry) == os.path.abspath(keep):
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def purge(self) -> Tuple[int, int]:
+        """Delete every cached download; returns (entries, bytes) removed"""
+        entries = self._entries()
+        for _, _, entry in entries:
+            shutil.rmtree(entry, ignore_errors=True)
+        return len(entries), sum(size for _, size, _ in entries)
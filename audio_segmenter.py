@@ -0,0 +1,212 @@
+"""Energy-based voice activity detection and pause-aware chunk planning.
+
+Audio is reduced to one loudness value (dBFS) per short frame with NumPy, then
+chunk boundaries are placed inside pauses close to a target length. Chunks
+that contain no speech are flagged so callers can skip them entirely.
+"""
+from collections import namedtuple
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+FRAME_MS = 30
+TARGET_CHUNK_MS = 55_000
+MIN_CHUNK_MS = 20_000
+MAX_CHUNK_MS = 58_000  # stay under the ~60 s Google Web Speech limit
+MIN_PAUSE_MS = 300
+MIN_SPEECH_MS = 250
+PAD_MS = 200
+
+# Chunk boundaries in milliseconds; has_speech=False chunks need not be recognized
+Chunk = namedtuple('Chunk', 'start_ms end_ms has_speech')
+
+_PCM_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+
+def supports_sample_width(sample_width: int) -> bool:
+    """Whether frame_energies can read PCM of this sample width directly"""
+    return sample_width in _PCM_DTYPES
+
+
+def frame_energies(pcm, sample_width: int = 2, sample_rate: int = 16000,
+                   frame_ms: int = FRAME_MS, block_frames: int = 8192) -> np.ndarray:
+    """Return the loudness of each frame_ms frame of mono PCM in dBFS.
+
+    pcm may be bytes, a memoryview or an mmap; it is read without copying and
+    converted to floats one block at a time to keep memory use bounded.
+    """
+    dtype = _PCM_DTYPES[sample_width]
+    samples = np.frombuffer(pcm, dtype=dtype)
+    frame_len = max(1, sample_rate * frame_ms // 1000)
+    n_frames = -(-len(samples) // frame_len)
+    full_scale = float(2 ** (8 * sample_width - 1))
+    energies = np.empty(n_frames, dtype=np.float64)
+
+    for first in range(0, n_frames, block_frames):
+        block = samples[first * frame_len:(first + block_frames) * frame_len].astype(np.float32)
+        if sample_width == 1:
+            block -= 128.0
+        count = -(-len(block) // frame_len)
+        counts = np.full(count, frame_len, dtype=np.float64)
+        counts[-1] = len(block) - (count - 1) * frame_len
+        block = np.pad(block, (0, count * frame_len - len(block)))
+        power = np.square(block / full_scale).reshape(count, frame_len).sum(axis=1) / counts
+        energies[first:first + count] = 10.0 * np.log10(power + 1e-12)
+
+    return energies
+
+
+def speech_threshold(energies_db: np.ndarray, floor_db: float = -50.0, margin_db: float = 10.0) -> float:
+    """Adaptive voiced/unvoiced threshold: above the noise floor, below typical speech"""
+    quiet, loud = np.percentile(energies_db, [10, 90])
+    return float(max(floor_db, min(quiet + margin_db, loud - margin_db)))
+
+
+def plan_chunks(energies_db: np.ndarray, frame_ms: int = FRAME_MS,
+                target_ms: int = TARGET_CHUNK_MS, min_ms: int = MIN_CHUNK_MS,
+                max_ms: int = MAX_CHUNK_MS, min_pause_ms: int = MIN_PAUSE_MS,
+                min_speech_ms: int = MIN_SPEECH_MS, pad_ms: int = PAD_MS,
+                threshold_db: Optional[float] = None,
+                duration_ms: Optional[int] = None) -> List[Chunk]:
+    """Split audio into chunks cut at pauses as close to target_ms as possible.
+
+    Short voiced regions are merged up to the target length, chunks are never
+    longer than max_ms, and each speech chunk is trimmed to its voiced extent
+    (plus pad_ms). Chunks with less than min_speech_ms of speech are returned
+    with has_speech=False.
+    """
+    n = len(energies_db)
+    if n == 0:
+        return []
+    if threshold_db is None:
+        threshold_db = speech_threshold(energies_db)
+    voiced = energies_db > threshold_db
+
+    cuts = find_cuts(energies_db, voiced, frame_ms, target_ms, min_ms, max_ms, min_pause_ms)
+    return chunks_from_cuts(voiced, cuts, frame_ms, min_speech_ms, pad_ms, duration_ms)
+
+
+def chunks_from_cuts(voiced: np.ndarray, cuts: List[int], frame_ms: int = FRAME_MS,
+                     min_speech_ms: int = MIN_SPEECH_MS, pad_ms: int = PAD_MS,
+                     duration_ms: Optional[int] = None) -> List[Chunk]:
+    """Turn frame cut indices into Chunks, trimming speech chunks to their voiced extent"""
+    # Voiced frame counts per chunk via a cumulative sum
+    voiced_before = np.concatenate(([0], np.cumsum(voiced)))
+    min_speech = -(-min_speech_ms // frame_ms)
+    pad = pad_ms // frame_ms
+    end_limit = duration_ms if duration_ms is not None else len(voiced) * frame_ms
+
+    chunks = []
+    for a, b in zip(cuts[:-1], cuts[1:]):
+        has_speech = voiced_before[b] - voiced_before[a] >= min_speech
+        if has_speech:
+            voiced_idx = np.flatnonzero(voiced[a:b])
+            start = max(a, a + int(voiced_idx[0]) - pad)
+            end = min(b, a + int(voiced_idx[-1]) + 1 + pad)
+        else:
+            start, end = a, b
+        chunks.append(Chunk(start * frame_ms, min(end * frame_ms, end_limit), bool(has_speech)))
+    return chunks
+
+
+def find_cuts(energies_db: np.ndarray, voiced: np.ndarray, frame_ms: int = FRAME_MS,
+              target_ms: int = TARGET_CHUNK_MS, min_ms: int = MIN_CHUNK_MS,
+              max_ms: int = MAX_CHUNK_MS, min_pause_ms: int = MIN_PAUSE_MS) -> List[int]:
+    """Frame indices of chunk boundaries, including 0 and len(energies_db).
+
+    Each cut is the middle of the pause (a run of at least min_pause_ms
+    unvoiced frames) closest to target_ms after the previous cut. Without
+    such a pause, the quietest frame in the allowed window is used.
+    """
+    n = len(energies_db)
+    target, lo, hi = (max(1, ms // frame_ms) for ms in (target_ms, min_ms, max_ms))
+
+    # Run-length encode unvoiced frames to find pauses
+    edges = np.diff(np.concatenate(([0], (~voiced).astype(np.int8), [0])))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+    long_enough = (run_ends - run_starts) >= -(-min_pause_ms // frame_ms)
+    pause_mids = (run_starts[long_enough] + run_ends[long_enough]) // 2
+
+    cuts = [0]
+    start = 0
+    while n - start > hi:
+        first = np.searchsorted(pause_mids, start + lo, side='left')
+        last = np.searchsorted(pause_mids, start + hi, side='right')
+        if last > first:
+            candidates = pause_mids[first:last]
+            cut = int(candidates[np.argmin(np.abs(candidates - (start + target)))])
+        else:
+            cut = start + lo + int(np.argmin(energies_db[start + lo:start + hi]))
+        cuts.append(cut)
+        start = cut
+    cuts.append(n)
+
+    # Fold a short tail into the previous chunk when the result still fits
+    if len(cuts) > 2 and cuts[-1] - cuts[-2] < lo and cuts[-1] - cuts[-3] <= hi:
+        del cuts[-2]
+    return cuts
+
+
+class StreamingChunker:
+    """Cut a live PCM stream into chunks as soon as each one is complete.
+
+    Audio is buffered until it holds more than max_ms, at which point the
+    first pause-aligned chunk is final and is handed out with its PCM.
+    Chunk offsets are absolute milliseconds from the start of the stream.
+    """
+
+    def __init__(self, sample_rate: int = 16000, sample_width: int = 2, frame_ms: int = FRAME_MS,
+                 target_ms: int = TARGET_CHUNK_MS, min_ms: int = MIN_CHUNK_MS,
+                 max_ms: int = MAX_CHUNK_MS, min_pause_ms: int = MIN_PAUSE_MS,
+                 min_speech_ms: int = MIN_SPEECH_MS, pad_ms: int = PAD_MS):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.frame_ms = frame_ms
+        self.frame_bytes = sample_rate * frame_ms // 1000 * sample_width
+        self.target_ms, self.min_ms, self.max_ms = target_ms, min_ms, max_ms
+        self.min_pause_ms, self.min_speech_ms, self.pad_ms = min_pause_ms, min_speech_ms, pad_ms
+        # Once more than max_ms is buffered, every candidate cut for the
+        # next chunk has been seen, so that chunk can no longer change
+        self._window_bytes = max_ms // frame_ms * self.frame_bytes
+        self._buffer = bytearray()
+        self._offset_frames = 0
+
+    def feed(self, pcm) -> List[Tuple[Chunk, bytes]]:
+        """Add PCM and return every chunk that can no longer change"""
+        self._buffer += pcm
+        ready = []
+        while len(self._buffer) > self._window_bytes:
+            ready.append(self._emit(final=False)[0])
+        return ready
+
+    def flush(self) -> List[Tuple[Chunk, bytes]]:
+        """Return the chunks for whatever audio is still buffered"""
+        if not self._buffer:
+            return []
+        return self._emit(final=True)
+
+    def _emit(self, final: bool):
+        energies = frame_energies(bytes(self._buffer), self.sample_width, self.sample_rate, self.frame_ms)
+        voiced = energies > speech_threshold(energies)
+        cuts = find_cuts(energies, voiced, self.frame_ms, self.target_ms, self.min_ms,
+                         self.max_ms, self.min_pause_ms)
+        if not final:
+            cuts = cuts[:2]
+        duration_ms = len(self._buffer) // self.sample_width * 1000 // self.sample_rate
+        chunks = chunks_from_cuts(voiced, cuts, self.frame_ms, self.min_speech_ms,
+                                  self.pad_ms, duration_ms)
+
+        bytes_per_ms = self.sample_rate * self.sample_width // 1000
+        offset_ms = self._offset_frames * self.frame_ms
+        ready = []
+        for chunk in chunks:
+            pcm = bytes(self._buffer[chunk.start_ms * bytes_per_ms:chunk.end_ms * bytes_per_ms])
+            ready.append((Chunk(chunk.start_ms + offset_ms, chunk.end_ms + offset_ms, chunk.has_speech), pcm))
+
+        if final:
+            self._buffer.clear()
+        else:
+            del self._buffer[:cuts[-1] * self.frame_bytes]
+            self._offset_frames += cuts[-1]
+        return ready
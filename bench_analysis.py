@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: corpus-scale analyze_text vs batched analyze_texts
+بنچمارک تحلیل دسته‌ای متن‌ها در مقیاس آرشیو
+
+The transcripts in output/ are repeated to an archive of N documents and
+analyzed one document at a time (the old loop in test_with_real_texts.py),
+then with analyze_texts at 1..W worker processes. Without the Hazm tagger
+model in resources/ only normalization and segmentation are measured. The
+last section lemmatizes every token of the archive with Hazm's Lemmatizer
+directly and through the (word, POS) LRU cache.
+
+Usage: python bench_analysis.py [documents] [max_workers]
+"""
+
+import os
+import sys
+import time
+
+from persian_text_normalizer import get_shared_normalizer
+from test_normalizer_differential import CORPUS
+
+
+def bench_analysis(documents=200, max_workers=os.cpu_count() or 1):
+    normalizer = get_shared_normalizer()
+    texts = (CORPUS * (documents // len(CORPUS) + 1))[:documents]
+    chars = sum(len(t) for t in texts)
+
+    print("=" * 64)
+    print("بنچمارک تحلیل دسته‌ای")
+    print(f"Batch Analysis Benchmark ({documents} documents, {chars / 1e6:.1f} M chars, "
+          f"POS tagging {'on' if normalizer.postagger else 'off'})")
+    print("=" * 64)
+
+    start = time.perf_counter()
+    expected = [normalizer.analyze_text(text) for text in texts]
+    baseline = time.perf_counter() - start
+    print(f"{'analyze_text loop':<26}{baseline:8.2f} s{documents / baseline:10.1f} docs/s")
+
+    workers = 1
+    while workers <= max_workers:
+        start = time.perf_counter()
+        analyses = normalizer.analyze_texts(texts, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert analyses == expected
+        print(f"{f'analyze_texts x{workers}':<26}{elapsed:8.2f} s{documents / elapsed:10.1f} docs/s"
+              f"{baseline / elapsed:8.2f}x")
+        workers *= 2
+
+    bench_lemma_cache(texts)
+
+
+def bench_lemma_cache(texts):
+    from hazm import Lemmatizer, word_tokenize
+    from persian_text_normalizer import PersianTextNormalizer
+
+    normalizer = PersianTextNormalizer()
+    normalizer._lemmatizer = Lemmatizer()
+    tokens = [token for text in texts for token in word_tokenize(text)]
+    print(f"\nlemmatizing {len(tokens):,} tokens ({len(set(tokens)):,} distinct)")
+
+    start = time.perf_counter()
+    expected = [normalizer._lemmatizer.lemmatize(token, '') for token in tokens]
+    direct = time.perf_counter() - start
+    start = time.perf_counter()
+    assert [normalizer._lemmatize(token, '') for token in tokens] == expected
+    cached = time.perf_counter() - start
+    stats = normalizer.cache_stats()
+    print(f"{'Lemmatizer.lemmatize':<26}{direct * 1000:8.1f} ms")
+    print(f"{'LRU cache':<26}{cached * 1000:8.1f} ms{direct / cached:8.2f}x  "
+          f"hit rate {stats['hit_rate']:.1%}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    bench_analysis(int(args[0]) if args else 200,
+                   int(args[1]) if len(args) > 1 else os.cpu_count() or 1)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: peak memory of transcribe_audio_file on multi-hour recordings
+بنچمارک بیشینه حافظه تبدیل فایل‌های صوتی چندساعته (نگاشت حافظه در برابر pydub)
+
+Writes 16 kHz mono WAVs of 1, 3 and 6 hours (speech-like bursts and pauses),
+then transcribes each in a fresh process with the local stub backend, once
+reading chunks from the memory-mapped WAV and once through pydub's
+AudioSegment as before. Reports peak resident memory (ru_maxrss) and wall
+time; "baseline" is the process after imports, before any audio is read.
+Needs about 1.2 GB of free disk space for the WAVs.
+
+Usage: python bench_chunk_memory.py [hours ...] [--no-pydub]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+CHILD = r'''
+import json, resource, sys, time
+import working_youtube_to_text as wyt
+from recognizer_backends import StubBackend
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+path, mode = sys.argv[1], sys.argv[2]
+if mode == 'pydub':
+    wyt.open_wav_source = lambda *args, **kwargs: None
+converter = wyt.WorkingYouTubeToText(max_workers=4, backend=StubBackend(latency=0), chunk_cache=False,
+                                     audio_cache=False)
+import builtins
+builtins.print = lambda *args, **kwargs: None
+start = time.perf_counter()
+text, _ = converter.transcribe_audio_file(path)
+elapsed = time.perf_counter() - start
+sys.stdout.write(json.dumps({'baseline_kb': baseline, 'peak_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                             'seconds': elapsed, 'chunks': len(text.split())}))
+'''
+
+
+def write_long_wav(path, hours):
+    """Tone bursts of varying pitch and length with pauses, written a minute at a time"""
+    rng = np.random.default_rng(0)
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        t = np.arange(60 * SAMPLE_RATE) / SAMPLE_RATE
+        for _ in range(int(hours * 60)):
+            pitch = rng.uniform(100, 300)
+            bursts = (t % rng.uniform(2.0, 5.0)) < 1.5
+            minute = 6000 * np.sin(2 * np.pi * pitch * t) * bursts + rng.normal(0, 30, len(t))
+            wf.writeframes(minute.astype('<i2').tobytes())
+
+
+def measure(path, mode):
+    result = subprocess.run([sys.executable, '-c', CHILD, path, mode], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode:
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def bench_chunk_memory(hours_list=(1, 3, 6), pydub=True):
+    print("=" * 72)
+    print("بنچمارک حافظه خواندن قطعه‌ها")
+    print("Chunk Source Memory Benchmark (16 kHz mono WAV, stub backend)")
+    print("=" * 72)
+    print(f"{'input':<8}{'WAV size':>10}  {'reader':<8}{'baseline':>10}{'peak RSS':>10}{'time':>9}{'chunks':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for hours in hours_list:
+            path = os.path.join(directory, f"{hours}h.wav")
+            write_long_wav(path, hours)
+            size = os.path.getsize(path)
+            for mode in ('mmap', 'pydub') if pydub else ('mmap',):
+                stats = measure(path, mode)
+                if stats is None:
+                    print(f"{hours:>5} h {size / 1e6:>8.0f} MB  {mode:<8}{'failed (out of memory?)':>37}")
+                    continue
+                print(f"{hours:>5} h {size / 1e6:>8.0f} MB  {mode:<8}{stats['baseline_kb'] / 1024:>8.0f} MB"
+                      f"{stats['peak_kb'] / 1024:>8.0f} MB{stats['seconds']:>8.1f} s{stats['chunks']:>8}")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    bench_chunk_memory([float(a) if '.' in a else int(a) for a in args] or (1, 3, 6),
+                       pydub='--no-pydub' not in sys.argv)
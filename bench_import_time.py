@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: CLI startup and import time (python -X importtime)
+بنچمارک زمان راه‌اندازی و import ماژول‌ها
+
+Each measurement runs in a fresh interpreter. The report lists the cumulative
+import time of working_youtube_to_text and of the heavy dependencies it now
+loads only on the code paths that need them, the slowest modules pulled in at
+startup, and the wall time of a CLI run that exits on an invalid URL.
+
+Usage: python bench_import_time.py [runs]
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ('yt_dlp', 'speech_recognition', 'pydub', 'hazm', 'nltk', 'numpy')
+
+
+def import_report(statement):
+    """Parse -X importtime output into {module: (self_us, cumulative_us)}"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            cwd=HERE, capture_output=True, text=True)
+    report = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        report[name.strip()] = (int(self_us), int(cumulative_us))
+    return report
+
+
+def best_of(runs, fn):
+    return min(fn() for _ in range(runs))
+
+
+def cli_invalid_url_seconds():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, 'working_youtube_to_text.py', 'not-a-youtube-url'],
+                   cwd=HERE, capture_output=True)
+    return time.perf_counter() - start
+
+
+def bench_imports(runs=3):
+    print("=" * 60)
+    print("بنچمارک زمان import")
+    print(f"Import Time Benchmark (best of {runs} fresh interpreters)")
+    print("=" * 60)
+
+    for module in ('working_youtube_to_text',) + HEAVY_MODULES:
+        cumulative = best_of(runs, lambda: import_report(f"import {module}").get(module, (0, 0))[1])
+        print(f"{module:>24}: {cumulative / 1000:9.1f} ms")
+
+    startup = import_report("import working_youtube_to_text")
+    loaded = [m for m in HEAVY_MODULES if m in startup]
+    print(f"\nheavy modules loaded at startup: {', '.join(loaded) or 'none'}")
+    print("slowest modules at startup (self time):")
+    for name, (self_us, _) in sorted(startup.items(), key=lambda item: -item[1][0])[:8]:
+        print(f"  {name:<40}{self_us / 1000:8.1f} ms")
+
+    print(f"\nCLI run with an invalid URL: {best_of(runs, cli_invalid_url_seconds):.2f} s")
+
+
+if __name__ == "__main__":
+    bench_imports(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
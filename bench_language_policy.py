@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: requests and latency of each language policy
+بنچمارک تعداد درخواست و زمان هر سیاست انتخاب زبان
+
+Each simulated lecture is a list of chunks with the language actually spoken
+(None for chunks the recognizer cannot understand in any language). The stub
+recognizer answers after a fixed latency, like a remote service would.
+
+Usage: python bench_language_policy.py [latency_ms]
+"""
+
+import random
+import sys
+import time
+
+from language_policy import LANGUAGE_POLICIES, make_language_policy
+from working_youtube_to_text import WorkingYouTubeToText
+
+CHUNKS = 120
+
+
+def lectures(seed=0):
+    rng = random.Random(seed)
+    noisy = lambda lang: [None if rng.random() < 0.1 else lang for _ in range(CHUNKS)]
+    mixed = []
+    while len(mixed) < CHUNKS:
+        mixed += [rng.choice(['fa-IR', 'en-US'])] * rng.randint(3, 15)
+    return {
+        'persian': noisy('fa-IR'),
+        'english': noisy('en-US'),
+        'mixed': mixed[:CHUNKS],
+    }
+
+
+def bench_policies(latency=0.02):
+    print("=" * 72)
+    print("بنچمارک سیاست‌های انتخاب زبان")
+    print(f"Language Policy Benchmark ({CHUNKS} chunks, {latency * 1000:.0f} ms per request)")
+    print("=" * 72)
+    print(f"{'lecture':<10}{'policy':<10}{'requests':>10}{'saved':>8}{'recognized':>12}{'wall s':>9}")
+
+    for lecture, spoken in lectures().items():
+        def recognize(chunk, language):
+            time.sleep(latency)
+            return f"chunk{chunk}" if spoken[chunk] == language else ""
+
+        for name in LANGUAGE_POLICIES:
+            policy = make_language_policy(name)
+            converter = WorkingYouTubeToText(max_workers=4)
+            start = time.perf_counter()
+            try:
+                results = converter._map_ordered(lambda c: policy.recognize(recognize, c), list(range(CHUNKS)))
+            finally:
+                policy.close()
+            elapsed = time.perf_counter() - start
+            stats = policy.stats()
+            recognized = sum(1 for text, _ in results if text)
+            print(f"{lecture:<10}{name:<10}{stats['requests']:>10}{stats['saved_requests']:>8}"
+                  f"{recognized:>12}{elapsed:>9.2f}")
+        print("-" * 72)
+
+
+if __name__ == "__main__":
+    bench_policies(float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.02)
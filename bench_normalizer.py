@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: per-call latency of normalize_text / segment_sentences
+بنچمارک زمان هر فراخوانی نرمال‌سازی (ساخت دوباره در برابر نمونه مشترک)
+
+"per-call instance" loads every Hazm component on each helper call, which is
+what the module-level helpers used to do. "shared" is the current
+behavior of the two helpers: one lazily created instance per process.
+"one pass" is process_text, which normalizes once and also returns the
+comma-free text and sentences written to transcript files.
+
+Usage: python bench_normalizer.py [calls]
+"""
+
+import sys
+import time
+
+import persian_text_normalizer as ptn
+
+TEXT = ("سلام دوستان امروز می خواهیم درباره یادگیری ماشین صحبت کنیم "
+        "این موضوع خیلی مهم است و کاربرد های زیادی دارد ") * 20
+
+
+def load_all_components():
+    """The eager loading the old constructor did on every helper call"""
+    from hazm import Lemmatizer, Normalizer, POSTagger
+    try:
+        return Normalizer(), Lemmatizer(), POSTagger(model=ptn.POSTAGGER_MODEL)
+    except Exception:
+        return None
+
+
+def per_call_instance(text):
+    # normalize_text and segment_sentences each built their own normalizer
+    load_all_components()
+    normalized = ptn.PersianTextNormalizer().normalize_text(text)
+    load_all_components()
+    return ptn.PersianTextNormalizer().segment_sentences(normalized)
+
+
+def shared(text):
+    return ptn.segment_sentences(ptn.normalize_text(text))
+
+
+def one_pass(text):
+    return ptn.process_text(text)
+
+
+def bench_normalizer(calls=5):
+    print("=" * 60)
+    print("بنچمارک نرمال‌ساز متن")
+    print(f"Normalizer Latency Benchmark ({calls} calls, {len(TEXT)} chars)")
+    print("=" * 60)
+
+    results = {}
+    for name, fn in (("per-call instance", per_call_instance), ("shared", shared), ("one pass", one_pass)):
+        timings = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            fn(TEXT)
+            timings.append(time.perf_counter() - start)
+        results[name] = timings
+    for name, timings in results.items():
+        print(f"{name:>18}: first {timings[0] * 1000:9.1f} ms, "
+              f"then {sum(timings[1:]) / max(1, len(timings) - 1) * 1000:9.1f} ms/call")
+
+
+if __name__ == "__main__":
+    bench_normalizer(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
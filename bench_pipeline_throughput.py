@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: end-to-end pipeline throughput on the local stub backend
+بنچمارک توان عملیاتی کل خط لوله با موتور محلی (بدون اینترنت)
+
+A synthetic lecture (speech with short pauses) is written to a WAV file and
+run through transcribe_audio_file with the stub backend, so decoding, VAD
+chunking, the worker pool and the language policy are measured without the
+network. "ideal" is the wall time if requests were the only cost; the rest is
+the pipeline's own overhead.
+
+Usage: python bench_pipeline_throughput.py [minutes] [latency_ms] [failure_rate]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from recognizer_backends import StubBackend
+from working_youtube_to_text import WorkingYouTubeToText
+
+SAMPLE_RATE = 16000
+
+
+def write_lecture(path, minutes, seed=0):
+    """Write minutes of noise 'speech' in 20-40 s phrases separated by 0.6 s pauses"""
+    rng = np.random.default_rng(seed)
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        written = 0
+        while written < minutes * 60 * SAMPLE_RATE:
+            n = int(rng.uniform(20, 40) * SAMPLE_RATE)
+            speech = rng.normal(0, 0.2, n) * (0.6 + 0.4 * np.sin(np.arange(n) * (8 * np.pi / SAMPLE_RATE)))
+            pause = rng.normal(0, 0.0003, int(0.6 * SAMPLE_RATE))
+            samples = np.clip(np.concatenate([speech, pause]), -1, 1)
+            wf.writeframes((samples * 32767).astype(np.int16).tobytes())
+            written += len(samples)
+
+
+def bench_throughput(minutes=30, latency=0.2, failure_rate=0.0):
+    print("=" * 72)
+    print("بنچمارک توان عملیاتی خط لوله")
+    print(f"Pipeline Throughput Benchmark ({minutes} min audio, stub {latency * 1000:.0f} ms/request, "
+          f"{failure_rate:.0%} failures)")
+    print("=" * 72)
+    print(f"{'workers':>8}{'chunks':>8}{'requests':>10}{'wall s':>9}{'ideal s':>9}"
+          f"{'overhead s':>12}{'audio min/min':>15}{'status':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wav_path = os.path.join(tmp, 'lecture.wav')
+        write_lecture(wav_path, minutes)
+        for workers in (1, 2, 4, 8, 16):
+            backend = StubBackend(latency=latency, failure_rate=failure_rate)
+            converter = WorkingYouTubeToText(max_workers=workers, backend=backend,
+                                             chunk_cache=False, audio_cache=False)
+            start = time.perf_counter()
+            text, _ = converter.transcribe_audio_file(wav_path)
+            elapsed = time.perf_counter() - start
+            stats = converter.last_language_stats
+            ideal = -(-stats['chunks'] // workers) * latency
+            status = 'failed' if text.startswith('[') else 'ok'
+            print(f"{workers:>8}{stats['chunks']:>8}{backend.calls:>10}{elapsed:>9.2f}{ideal:>9.2f}"
+                  f"{elapsed - ideal:>12.2f}{minutes / (elapsed / 60):>15.1f}{status:>8}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    bench_throughput(int(args[0]) if len(args) > 0 else 30,
+                     float(args[1]) / 1000 if len(args) > 1 else 0.2,
+                     float(args[2]) if len(args) > 2 else 0.0)
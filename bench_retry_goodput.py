@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: goodput under recognizer failures, throttling and outages
+بنچمارک توان مفید در برابر خطا، محدودیت نرخ و قطعی سرویس تشخیص گفتار
+
+Runs a synthetic lecture through transcribe_audio_file on the local stub
+backend, with the service misbehaving in three ways: random errors, a
+throttling service that answers 429 above a few concurrent requests, and a
+total outage at the start. Each is run without retries (the old behaviour:
+the first error fails the file), with retries at fixed concurrency, and with
+retries plus AIMD concurrency and the circuit breaker. Goodput is successful
+requests per second of wall time; a failed file has no useful output at all.
+
+Usage: python bench_retry_goodput.py [minutes] [latency_ms] [workers]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from bench_pipeline_throughput import write_lecture
+from recognizer_backends import StubBackend
+from working_youtube_to_text import WorkingYouTubeToText
+
+
+class OutageStubBackend(StubBackend):
+    """StubBackend that refuses every request for the first outage seconds"""
+
+    def __init__(self, outage, **options):
+        super().__init__(**options)
+        self.outage = outage
+        self.start = None
+
+    def recognize(self, audio_data, language='fa-IR'):
+        import speech_recognition as sr
+        self.start = self.start or time.monotonic()
+        if time.monotonic() - self.start < self.outage:
+            time.sleep(0.01)
+            raise sr.RequestError("recognition connection failed: [Errno 111] Connection refused")
+        return super().recognize(audio_data, language)
+
+
+MODES = {
+    'no retries': {'max_retries': 0},
+    'retry, fixed': {'max_retries': 6, 'retry_options': {'adaptive': False, 'base_delay': 0.2}},
+    'retry + AIMD': {'max_retries': 6, 'retry_options': {'base_delay': 0.2}},
+}
+
+
+def bench_retry_goodput(minutes=60, latency=0.2, workers=16):
+    scenarios = {
+        '10% errors': lambda: StubBackend(latency=latency, failure_rate=0.1),
+        '429 above 4': lambda: StubBackend(latency=latency, capacity=4),
+        '3 s outage': lambda: OutageStubBackend(3.0, latency=latency),
+    }
+    print("=" * 96)
+    print("بنچمارک توان مفید با خطا و محدودیت نرخ")
+    print(f"Retry / Goodput Benchmark ({minutes} min audio, stub {latency * 1000:.0f} ms/request, "
+          f"{workers} workers)")
+    print("=" * 96)
+    print(f"{'service':<13}{'mode':<14}{'status':>7}{'requests':>9}{'failed':>8}{'429':>6}{'retries':>8}"
+          f"{'min lim':>8}{'pauses':>7}{'wall s':>8}{'goodput/s':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wav_path = os.path.join(tmp, 'lecture.wav')
+        write_lecture(wav_path, minutes)
+        for scenario, make_backend in scenarios.items():
+            for mode, options in MODES.items():
+                converter = WorkingYouTubeToText(max_workers=workers, backend=make_backend(),
+                                                 chunk_cache=False, audio_cache=False, **options)
+                start = time.perf_counter()
+                text, _ = converter.transcribe_audio_file(wav_path)
+                elapsed = time.perf_counter() - start
+                stats = converter.last_request_stats
+                ok = not text.startswith('[')
+                # A failed file delivers nothing, whatever requests succeeded on the way
+                goodput = stats['succeeded'] / elapsed if ok else 0.0
+                print(f"{scenario:<13}{mode:<14}{'ok' if ok else 'failed':>7}{stats['requests']:>9}"
+                      f"{stats['failed']:>8}{stats['throttled']:>6}{stats['retries']:>8}"
+                      f"{stats['lowest_limit']:>8}{stats['breaker_trips']:>7}{elapsed:>8.2f}{goodput:>10.1f}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    bench_retry_goodput(int(args[0]) if len(args) > 0 else 60,
+                        float(args[1]) / 1000 if len(args) > 1 else 0.2,
+                        int(args[2]) if len(args) > 2 else 16)
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: time spent in each normalization rule on long transcripts
+بنچمارک زمان هر قاعده نرمال‌سازی روی رونوشت‌های طولانی
+
+Builds the same N-hour "raw" and "damaged" lectures as bench_typography.py
+and normalizes them with each rule profile inside RulePipeline.timed(), then
+lists the rules by the share of time they take.
+
+Usage: python bench_rule_timing.py [hours] [profile ...]
+"""
+
+import sys
+
+from bench_typography import lecture
+from normalization_rules import RulePipeline
+
+
+def bench_rule_timing(hours=3, profiles=('basic', 'persian'), repeats=3):
+    print("=" * 64)
+    print("بنچمارک زمان هر قاعده")
+    print(f"Per-Rule Timing ({hours} h transcript, {repeats} runs)")
+    print("=" * 64)
+    for style in ('raw', 'damaged'):
+        text = lecture(hours, style)
+        for profile in profiles:
+            pipeline = RulePipeline(profile)
+            with pipeline.timed() as timings:
+                for _ in range(repeats):
+                    pipeline.normalize(text)
+            total = sum(timings.values())
+            print(f"\n{style} / {profile}: {total / repeats * 1000:.1f} ms per run ({len(text):,} chars)")
+            for name, seconds in sorted(timings.items(), key=lambda item: -item[1]):
+                print(f"  {name:<30}{seconds / repeats * 1000:9.2f} ms{seconds / total:8.1%}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    bench_rule_timing(float(args[0]) if args else 3, tuple(args[1:]) or ('basic', 'persian'))
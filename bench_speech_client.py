@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: pooled asyncio speech client vs recognize_google on worker threads
+بنچمارک کلاینت ناهمگام با اتصال‌های ماندگار در برابر recognize_google روی نخ‌ها
+
+Sends pre-encoded 10 s chunks to StubSpeechServer, a local stand-in for the
+Google Web Speech endpoint with a fixed answer latency, first through
+recognize_google on a thread pool (one new connection per request, as
+transcribe_audio_file does) and then through AsyncSpeechClient on one event
+loop. Reports requests per second, latency percentiles per request and the
+connections the server accepted. The stand-in speaks plain HTTP on
+localhost, so the cost of connecting to the real service is simulated: each
+new connection waits handshake_ms first (default 60 ms, about three round
+trips of TCP and TLS setup at 20 ms). Pass 0 to measure the bare clients.
+
+Usage: python bench_speech_client.py [requests] [latency_ms] [handshake_ms]
+"""
+
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import speech_recognition as sr
+
+from bench_flac_encoding import speech_like
+from flac_encoder import encode_audio_data
+from recognizer_backends import GoogleBackend
+from speech_client import AsyncSpeechClient, StubSpeechServer
+
+
+def percentiles(latencies):
+    return np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+
+
+def run_threaded(url, audio, requests, concurrency):
+    backend = GoogleBackend(endpoint=url)
+
+    def request(_):
+        start = time.perf_counter()
+        backend.recognize(audio, 'fa-IR')
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(request, range(requests)))
+
+
+def run_async(url, audio, requests, concurrency):
+    async def main():
+        client = AsyncSpeechClient(url, max_in_flight=concurrency)
+        # Like the thread pool, time requests from when they get their turn
+        turns = asyncio.Semaphore(concurrency)
+
+        async def request():
+            async with turns:
+                start = time.perf_counter()
+                await client.recognize(audio, 'fa-IR')
+                return time.perf_counter() - start
+
+        try:
+            return await asyncio.gather(*(request() for _ in range(requests)))
+        finally:
+            await client.aclose()
+    return asyncio.run(main())
+
+
+def bench_speech_client(requests=400, latency=0.05, handshake=0.06):
+    print("=" * 72)
+    print("بنچمارک کلاینت تشخیص گفتار")
+    print(f"Speech Client Benchmark ({requests} requests, stand-in server {latency * 1000:.0f} ms/request, "
+          f"{handshake * 1000:.0f} ms/new connection)")
+    print("=" * 72)
+    audio = encode_audio_data(sr.AudioData(speech_like(10), 16000, 2), 'lossless')
+    print(f"{'client':<10}{'in flight':>10}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'connections':>13}")
+    for concurrency in (1, 4, 16, 32):
+        for name, run in (('threads', run_threaded), ('asyncio', run_async)):
+            with StubSpeechServer(latency=latency, handshake=handshake) as server:
+                start = time.perf_counter()
+                latencies = run(server.url, audio, requests, concurrency)
+                elapsed = time.perf_counter() - start
+                p50, p95, p99 = percentiles(latencies)
+                print(f"{name:<10}{concurrency:>10}{requests / elapsed:>9.1f}{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}"
+                      f"{server.connections:>13}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    bench_speech_client(int(args[0]) if args else 400,
+                        float(args[1]) / 1000 if len(args) > 1 else 0.05,
+                        float(args[2]) / 1000 if len(args) > 2 else 0.06)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: symmetric delete spelling correction on a 100k-word lexicon
+بنچمارک اصلاح املایی با نمایه حذف متقارن روی واژگان ۱۰۰ هزار واژه‌ای
+
+Builds the index from the N most frequent words of Hazm's word list, then
+reports build time, file size, load (memory map) time and lookup latency for
+known words and for misspellings made by one or two random edits, next to a
+plain edit-distance scan of the whole lexicon. With transcripts in output/,
+it also corrects them and reports words per second.
+
+Usage: python bench_spell_correction.py [words] [lookups]
+"""
+
+import glob
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from spell_correction import SpellIndex, build_index, edit_distance, hazm_lexicon
+
+LETTERS = 'ابپتثجچحخدذرزژسشصضطظعغفقکگلمنوهی'
+
+
+def misspell(word, edits, rng):
+    for _ in range(edits):
+        i = rng.randrange(len(word))
+        op = rng.choice('ids' if len(word) > 1 else 'i')
+        if op == 'i':
+            word = word[:i] + rng.choice(LETTERS) + word[i:]
+        elif op == 'd':
+            word = word[:i] + word[i + 1:]
+        else:
+            word = word[:i] + rng.choice(LETTERS) + word[i + 1:]
+    return word
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99)]
+
+
+def linear_scan(words, word, max_distance=2):
+    return min(words, key=lambda candidate: edit_distance(word, candidate, max_distance))
+
+
+def bench_spell_correction(size=100_000, lookups=2_000):
+    frequencies, _ = hazm_lexicon()
+    top = sorted(frequencies, key=lambda word: -frequencies[word])[:size]
+    lexicon = {word: frequencies[word] for word in top}
+    print("=" * 64)
+    print("بنچمارک اصلاح املایی")
+    print(f"Spelling Correction Benchmark ({len(lexicon):,} words, {lookups:,} lookups each)")
+    print("=" * 64)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'spell_index.bin')
+        start = time.perf_counter()
+        build_index(lexicon, path)
+        print(f"{'build':<28}{time.perf_counter() - start:9.2f} s   {os.path.getsize(path) / 1e6:.1f} MB")
+        start = time.perf_counter()
+        index = SpellIndex(path)
+        print(f"{'load (mmap)':<28}{(time.perf_counter() - start) * 1000:9.2f} ms")
+
+        rng = random.Random(0)
+        words = [word for word in top if len(word) >= 4]
+        cases = [('known word', 0), ('1 edit', 1), ('2 edits', 2)]
+        for label, edits in cases:
+            samples = [misspell(rng.choice(words), edits, rng) for _ in range(lookups)]
+            timings = []
+            for word in samples:
+                start = time.perf_counter()
+                index.lookup(word)
+                timings.append(time.perf_counter() - start)
+            p50, p99 = percentiles(timings)
+            print(f"{'lookup, ' + label:<28}{p50 * 1e6:9.0f} µs p50 {p99 * 1e6:9.0f} µs p99")
+
+        samples = [misspell(rng.choice(words), 1, rng) for _ in range(5)]
+        start = time.perf_counter()
+        for word in samples:
+            linear_scan(top, word)
+        scan = (time.perf_counter() - start) / len(samples)
+        print(f"{'linear edit-distance scan':<28}{scan * 1000:9.0f} ms per word")
+
+        texts = [json.load(open(p, encoding='utf-8')).get('transcript', '')
+                 for p in sorted(glob.glob(os.path.join('output', '*.json')))]
+        text = ' '.join(t for t in texts if isinstance(t, str))
+        if text:
+            words_in_text = len(text.split())
+            start = time.perf_counter()
+            index.correct_text(text)
+            elapsed = time.perf_counter() - start
+            stats = index.cache_stats()
+            print(f"{'correct output/ transcripts':<28}{elapsed:9.2f} s   "
+                  f"{words_in_text / elapsed:,.0f} words/s, cache hit rate {stats['hit_rate']:.1%}")
+        del index
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    bench_spell_correction(int(args[0]) if args else 100_000, int(args[1]) if len(args) > 1 else 2_000)
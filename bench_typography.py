@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: normalization throughput on multi-hour transcripts
+بنچمارک سرعت نرمال‌سازی متن برای رونوشت‌های چندساعته
+
+Transcripts in output/ are repeated up to the length of an N-hour lecture at
+about 130 words per minute, then normalized with the original re.sub chains and
+with the compiled rules. "raw" strips punctuation and ZWNJ, which is what the
+speech recognizer returns; "damaged" also scatters stray punctuation, quotes,
+brackets and repeated characters so that every rule has work to do.
+
+Usage: python bench_typography.py [hours]
+"""
+
+import re
+import sys
+import time
+
+import text_normalizer
+from persian_text_normalizer import PersianTextNormalizer
+from test_normalizer_differential import (CORPUS, damage, reference_normalize,
+                                          reference_persian_normalize)
+
+WORDS_PER_HOUR = 130 * 60
+
+
+def raw(text):
+    """Recognizer-style text: no punctuation, no ZWNJ"""
+    return re.sub(r'[\u200c.!?؟،,;؛:«»"()]+', ' ', text)
+
+
+def lecture(hours, style='raw'):
+    source = ' '.join(raw(text) if style == 'raw' else damage(text, k) for k, text in enumerate(CORPUS))
+    words = source.split()
+    target = int(hours * WORDS_PER_HOUR)
+    return ' '.join((words * (target // len(words) + 1))[:target])
+
+
+def chars_per_second(fn, text, repeats=7):
+    best = min(_timed(fn, text) for _ in range(repeats))
+    return len(text) / best, best
+
+
+def _timed(fn, text):
+    start = time.perf_counter()
+    fn(text)
+    return time.perf_counter() - start
+
+
+def bench_typography(hours=3):
+    basic = PersianTextNormalizer()
+    basic.normalizer = None
+
+    print("=" * 78)
+    print("بنچمارک سرعت نرمال‌سازی")
+    print(f"Normalization Throughput ({hours} h transcript)")
+    print("=" * 78)
+    print(f"{'input':<9}{'normalizer':<23}{'before M chars/s':>17}{'after M chars/s':>17}{'speedup':>10}")
+    for style in ('raw', 'damaged'):
+        text = lecture(hours, style)
+        for name, before, after in (
+            ("text_normalizer", reference_normalize, text_normalizer.normalize_text),
+            ("PersianTextNormalizer", reference_persian_normalize, basic.normalize_text),
+        ):
+            assert before(text) == after(text)
+            old_rate, _ = chars_per_second(before, text)
+            new_rate, _ = chars_per_second(after, text)
+            print(f"{style:<9}{name:<23}{old_rate / 1e6:>17.2f}{new_rate / 1e6:>17.2f}"
+                  f"{new_rate / old_rate:>9.2f}x")
+        print(f"{'':<9}({len(text):,} chars)")
+
+
+if __name__ == "__main__":
+    bench_typography(float(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: silence-aware (VAD) chunking against fixed 55 s slices
+بنچمارک تقسیم‌بندی صوت بر اساس سکوت در برابر قطعه‌های ثابت ۵۵ ثانیه‌ای
+
+Synthetic speech-like audio is generated with pauses at known positions, so
+we can count how many chunk boundaries cut through speech.
+
+Usage: python bench_vad_chunking.py [minutes]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from audio_segmenter import frame_energies, plan_chunks
+
+SAMPLE_RATE = 16000
+FIXED_CHUNK_MS = 55_000
+
+
+def synthesize_lecture(minutes, seed=0):
+    """Speech bursts of 2-12 s, pauses of 0.4-2 s and a few long silent breaks"""
+    rng = np.random.default_rng(seed)
+    parts, pauses, position = [], [], 0
+    total = minutes * 60_000
+    while position < total:
+        if rng.random() < 0.02:
+            kind, ms = 'pause', int(rng.uniform(60_000, 120_000))  # break / music-free gap
+        elif parts and rng.random() < 0.5:
+            kind, ms = 'pause', int(rng.uniform(400, 2000))
+        else:
+            kind, ms = 'speech', int(rng.uniform(2000, 12_000))
+        n = ms * SAMPLE_RATE // 1000
+        if kind == 'speech':
+            t = np.arange(n) / SAMPLE_RATE
+            parts.append(rng.normal(0, 0.25, n) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)))
+        else:
+            parts.append(rng.normal(0, 0.0003, n))
+            pauses.append((position, position + ms))
+        position += ms
+    pcm = (np.clip(np.concatenate(parts), -1, 1) * 32767).astype(np.int16).tobytes()
+    return pcm, pauses, position
+
+
+def in_pause(ms, pauses):
+    return any(start <= ms <= end for start, end in pauses)
+
+
+def bench_vad(minutes=60):
+    print("=" * 60)
+    print("بنچمارک تقسیم‌بندی بر اساس سکوت")
+    print(f"VAD Chunking Benchmark ({minutes} min synthetic audio)")
+    print("=" * 60)
+
+    pcm, pauses, duration_ms = synthesize_lecture(minutes)
+
+    start = time.perf_counter()
+    energies = frame_energies(pcm)
+    chunks = plan_chunks(energies, duration_ms=duration_ms)
+    elapsed = time.perf_counter() - start
+
+    speech = [c for c in chunks if c.has_speech]
+    vad_cuts = [c.end_ms for c in chunks[:-1]]
+    fixed_cuts = list(range(FIXED_CHUNK_MS, duration_ms, FIXED_CHUNK_MS))
+    fixed_requests = len(fixed_cuts) + 1
+
+    print(f"زمان تقسیم‌بندی / segmentation time: {elapsed * 1000:.1f} ms "
+          f"({duration_ms / 1000 / max(elapsed, 1e-9):,.0f}x realtime)")
+    print(f"درخواست‌ها / requests: fixed={fixed_requests}  vad={len(speech)} "
+          f"({100 * (1 - len(speech) / fixed_requests):.1f}% fewer)")
+    print(f"قطعه‌های بدون گفتار / skipped chunks: {len(chunks) - len(speech)}")
+    print(f"ثانیه‌های ارسالی / seconds sent: fixed={duration_ms / 1000:,.0f}  "
+          f"vad={sum(c.end_ms - c.start_ms for c in speech) / 1000:,.0f}")
+    print(f"برش وسط گفتار / cuts inside speech: "
+          f"fixed={sum(not in_pause(ms, pauses) for ms in fixed_cuts)}/{len(fixed_cuts)}  "
+          f"vad={sum(not in_pause(ms, pauses) for ms in vad_cuts)}/{len(vad_cuts)}")
+
+
+if __name__ == "__main__":
+    bench_vad(int(sys.argv[1]) if len(sys.argv) > 1 else 60)
@@ -0,0 +1,118 @@
+"""Persistent per-chunk recognition results, so interrupted runs can resume.
+
+Results are keyed by a hash of the decoded audio, the chunk offsets and the
+language policy that produced them. The cache is a single SQLite file in WAL
+mode, which lets several processes read and write it at the same time. When
+it grows past max_bytes, the least recently used results are evicted.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Rough per-row overhead of keys and index entries, counted towards max_bytes
+_ROW_OVERHEAD = 128
+
+
+def audio_fingerprint(pcm, frame_rate: int, sample_width: int, channels: int = 1) -> str:
+    """Content hash of decoded PCM plus its format; pcm may also be an
+    iterable of consecutive PCM blocks"""
+    digest = hashlib.sha256(f"{frame_rate}:{sample_width}:{channels}:".encode())
+    for block in [pcm] if isinstance(pcm, (bytes, bytearray, memoryview)) else pcm:
+        digest.update(block)
+    return digest.hexdigest()
+
+
+class ChunkResultCache:
+    """SQLite-backed cache of chunk transcripts"""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # One connection shared by this process's worker threads; other
+        # processes are serialized by SQLite's own file locking
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS chunk_results (
+                audio_hash TEXT NOT NULL,
+                start_ms INTEGER NOT NULL,
+                end_ms INTEGER NOT NULL,
+                language_key TEXT NOT NULL,
+                text TEXT NOT NULL,
+                language TEXT,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (audio_hash, start_ms, end_ms, language_key)
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS chunk_results_lru ON chunk_results (last_access)"
+        )
+
+    def get(self, audio_hash: str, start_ms: int, end_ms: int,
+            language_key: str) -> Optional[Tuple[str, Optional[str]]]:
+        """Cached (text, language) for a chunk, or None if it was never recognized"""
+        key = (audio_hash, start_ms, end_ms, language_key)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, language FROM chunk_results WHERE audio_hash=? AND start_ms=? "
+                "AND end_ms=? AND language_key=?", key
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE chunk_results SET last_access=? WHERE audio_hash=? AND start_ms=? "
+                    "AND end_ms=? AND language_key=?", (time.time(),) + key
+                )
+        return row
+
+    def put(self, audio_hash: str, start_ms: int, end_ms: int, language_key: str,
+            text: str, language: Optional[str]):
+        """Store a finished chunk result, then evict old results if over budget"""
+        size = len(text.encode('utf-8')) + len(audio_hash) + len(language_key) + _ROW_OVERHEAD
+        with self._lock:
+            # Write and evict in one transaction so concurrent runs see a consistent budget
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO chunk_results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (audio_hash, start_ms, end_ms, language_key, text, language, size, time.time())
+                )
+                self._evict()
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM chunk_results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used rows until 90% of the budget is free again
+        excess = total - int(self.max_bytes * 0.9)
+        self._conn.execute(
+            """DELETE FROM chunk_results WHERE rowid IN (
+                SELECT rowid FROM (
+                    SELECT rowid, size,
+                           SUM(size) OVER (ORDER BY last_access, rowid) AS running
+                    FROM chunk_results
+                ) WHERE running - size < ?
+            )""", (excess,)
+        )
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM chunk_results").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
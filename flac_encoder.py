@@ -0,0 +1,213 @@
+"""FLAC payloads for recognition chunks, encoded once, ahead of the requests.
+
+recognize_google asks AudioData.get_flac_data for the upload, which starts
+the flac binary bundled with SpeechRecognition for every request, on the
+request path and once more for each language tried. FlacEncoderPool encodes
+each chunk once, in-process with libFLAC through soundfile (libsndfile), on
+worker threads a few chunks ahead of the requests that need them; the GIL is
+released while libFLAC encodes. The result is an EncodedAudioData whose
+get_flac_data returns the finished payload, which recognize_google sends
+unchanged, for every language tried. Without soundfile (or its libsndfile),
+chunks are encoded by the bundled flac binary instead, still once per chunk.
+
+A payload profile picks the sample rate and the number of significant bits
+per sample. The stream stays 16-bit, as Google Web Speech requires; the
+dropped low bits are zeroed before encoding, and libFLAC stores them as
+"wasted bits" that cost nothing to send.
+
+- lossless:    16 kHz, 16 bits (what recognize_google sent before)
+- compact:     16 kHz, 12 bits
+- narrowband:  8 kHz, 16 bits
+- minimal:     8 kHz, 12 bits
+"""
+import io
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+import speech_recognition as sr
+
+try:
+    import soundfile
+except (ImportError, OSError):  # not installed, or libsndfile is missing
+    soundfile = None
+
+BITS_PER_SAMPLE = 16
+SAMPLE_WIDTH = BITS_PER_SAMPLE // 8
+
+PayloadProfile = namedtuple('PayloadProfile', 'name sample_rate bits')
+
+PAYLOAD_PROFILES = {profile.name: profile for profile in (
+    PayloadProfile('lossless', 16000, 16),
+    PayloadProfile('compact', 16000, 12),
+    PayloadProfile('narrowband', 8000, 16),
+    PayloadProfile('minimal', 8000, 12),
+)}
+
+
+def get_profile(profile) -> PayloadProfile:
+    """PayloadProfile by name; a PayloadProfile is returned as is"""
+    if isinstance(profile, PayloadProfile):
+        return profile
+    try:
+        return PAYLOAD_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown payload profile: {profile!r} "
+                         f"(choose from {', '.join(PAYLOAD_PROFILES)})") from None
+
+
+def _quantize(samples: np.ndarray, bits: int) -> np.ndarray:
+    """16-bit samples rounded to their top bits, low bits zeroed"""
+    if bits >= BITS_PER_SAMPLE:
+        return samples
+    drop = BITS_PER_SAMPLE - bits
+    return np.minimum((samples + (1 << (drop - 1))) >> drop << drop, 32767 >> drop << drop)
+
+
+class EncodedAudioData(sr.AudioData):
+    """sr.AudioData carrying its FLAC encoding.
+
+    get_flac_data returns the stored payload whenever the request needs no
+    conversion, which is how recognize_google asks for it, so no flac process
+    is started. The PCM is exactly what the payload decodes to.
+    """
+
+    def __init__(self, frame_data, sample_rate, sample_width, flac_data: bytes,
+                 encode_seconds: float = 0.0, profile: Optional[PayloadProfile] = None):
+        super().__init__(frame_data, sample_rate, sample_width)
+        self.flac_data = flac_data
+        self.encode_seconds = encode_seconds
+        self.profile = profile
+
+    def get_flac_data(self, convert_rate=None, convert_width=None):
+        if convert_rate in (None, self.sample_rate) and convert_width in (None, SAMPLE_WIDTH):
+            return self.flac_data
+        return super().get_flac_data(convert_rate, convert_width)
+
+
+def encode_flac(samples: np.ndarray, sample_rate: int) -> bytes:
+    """16-bit mono samples as a FLAC stream, in-process when soundfile is available"""
+    if soundfile is None:
+        return sr.AudioData(samples.astype('<i2').tobytes(), sample_rate, SAMPLE_WIDTH).get_flac_data()
+    buffer = io.BytesIO()
+    soundfile.write(buffer, samples, sample_rate, format='FLAC', subtype='PCM_16')
+    return buffer.getvalue()
+
+
+def encode_audio_data(audio_data, profile='lossless') -> EncodedAudioData:
+    """Resample and quantize sr.AudioData for a payload profile, then encode it"""
+    profile = get_profile(profile)
+    start = time.perf_counter()
+    rate = min(profile.sample_rate, audio_data.sample_rate)
+    samples = np.frombuffer(audio_data.get_raw_data(rate, SAMPLE_WIDTH), dtype='<i2')
+    samples = _quantize(samples.astype(np.int64), profile.bits).astype('<i2')
+    flac_data = encode_flac(samples, rate)
+    return EncodedAudioData(samples.tobytes(), rate, SAMPLE_WIDTH, flac_data,
+                            time.perf_counter() - start, profile)
+
+
+class FlacEncoderPool:
+    """Encodes chunks on worker threads, ahead of the requests that send them.
+
+    libFLAC runs without the GIL, so encoding overlaps with the recognizer
+    threads waiting on the network. Every encoded chunk is recorded (index,
+    seconds, payload bytes, PCM bytes) for stats().
+    """
+
+    def __init__(self, profile='lossless', workers: Optional[int] = None):
+        self.profile = get_profile(profile)
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='flac')
+        self._lock = threading.Lock()
+        self.records = []
+
+    def encode(self, audio_data, index: Optional[int] = None) -> EncodedAudioData:
+        """Encode one chunk on the calling thread"""
+        encoded = encode_audio_data(audio_data, self.profile)
+        with self._lock:
+            self.records.append({'index': index, 'seconds': encoded.encode_seconds,
+                                 'bytes': len(encoded.flac_data), 'pcm_bytes': len(audio_data.frame_data)})
+        return encoded
+
+    def submit(self, audio_data, index: Optional[int] = None) -> Future:
+        """Future of the EncodedAudioData; audio_data may be a callable producing it"""
+        def run():
+            return self.encode(audio_data() if callable(audio_data) else audio_data, index)
+        return self._executor.submit(run)
+
+    def prefetch(self, make_audio: Callable[[int], sr.AudioData], count: int,
+                 lookahead: Optional[int] = None) -> 'Prefetcher':
+        """Encode chunks 0..count-1 in order, at most lookahead ahead of the
+        last one requested, so memory stays bounded on long videos"""
+        return Prefetcher(self, make_audio, count, lookahead or 2 * self.workers)
+
+    def stats(self) -> dict:
+        """Totals and per-chunk records of everything encoded so far"""
+        with self._lock:
+            records = sorted(self.records, key=lambda r: (r['index'] is None, r['index']))
+        seconds = [r['seconds'] for r in records]
+        payload = sum(r['bytes'] for r in records)
+        pcm = sum(r['pcm_bytes'] for r in records)
+        return {
+            'profile': self.profile.name,
+            'chunks': len(records),
+            'payload_bytes': payload,
+            'pcm_bytes': pcm,
+            'ratio': payload / pcm if pcm else 0.0,
+            'encode_seconds': sum(seconds),
+            'max_chunk_seconds': max(seconds, default=0.0),
+            'per_chunk': records,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Prefetcher:
+    """Chunks being encoded ahead of use; see FlacEncoderPool.prefetch"""
+
+    def __init__(self, pool: FlacEncoderPool, make_audio, count: int, lookahead: int):
+        self.pool = pool
+        self.make_audio = make_audio
+        self.count = count
+        self.lookahead = max(1, lookahead)
+        self._futures = {}
+        self._submitted = 0
+        self._lock = threading.Lock()
+
+    def _take(self, index: int) -> Optional[Future]:
+        with self._lock:
+            while self._submitted < min(self.count, index + 1 + self.lookahead):
+                i = self._submitted
+                self._futures[i] = self.pool.submit(lambda i=i: self.make_audio(i), i)
+                self._submitted += 1
+            return self._futures.pop(index, None)
+
+    def get(self, index: int) -> EncodedAudioData:
+        """The encoded chunk, waiting for its encoding if needed"""
+        future = self._take(index)
+        if future is None or future.cancelled():
+            return self.pool.encode(self.make_audio(index), index)
+        return future.result()
+
+    def skip(self, index: int):
+        """The chunk is not needed (e.g. its result was cached)"""
+        future = self._take(index)
+        if future is not None:
+            future.cancel()
+
+    def close(self):
+        with self._lock:
+            futures, self._futures = list(self._futures.values()), {}
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,252 @@
+"""Per-video language selection for chunk recognition.
+
+Google Web Speech only answers for one language per request. Trying Persian
+and then English on every chunk nearly doubles the request count on mixed or
+noisy lectures, so a policy decides which languages each chunk is sent with:
+
+- fallback: Persian, then English on every chunk (original behavior)
+- probe:    fallback on the first chunk(s) until a language is heard, then
+            only that language for the rest of the video
+- sticky:   try the language that worked most often for recent chunks first
+- race:     send all languages at once and keep the first non-empty result
+
+`recognize` callables take (audio_data, language) and return "" when nothing
+was recognized. Policies are thread-safe and count the requests they make.
+recognize_async does the same for coroutine callables on an event loop.
+"""
+import threading
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional, Tuple
+
+PRIMARY_LANGUAGE = 'fa-IR'
+FALLBACK_LANGUAGE = 'en-US'
+DEFAULT_LANGUAGES = (PRIMARY_LANGUAGE, FALLBACK_LANGUAGE)
+
+
+class LanguagePolicy:
+    """Fallback policy: try each language in order until one returns text"""
+
+    name = 'fallback'
+
+    def __init__(self, languages=DEFAULT_LANGUAGES):
+        self.languages = tuple(languages)
+        self._stats_lock = threading.Lock()
+        self.chunks = 0
+        self.requests = Counter()
+        self.detected = Counter()
+
+    def recognize(self, recognize: Callable, audio_data) -> Tuple[str, Optional[str]]:
+        """Recognize one chunk; returns (text, language) or ("", None)"""
+        with self._stats_lock:
+            self.chunks += 1
+        text, language = self._recognize_in_order(recognize, audio_data, self._order())
+        self._record(language)
+        return text, language
+
+    async def recognize_async(self, recognize: Callable, audio_data) -> Tuple[str, Optional[str]]:
+        """recognize() for a coroutine function recognize"""
+        with self._stats_lock:
+            self.chunks += 1
+        text, language = await self._recognize_in_order_async(recognize, audio_data, self._order())
+        self._record(language)
+        return text, language
+
+    def _order(self):
+        return self.languages
+
+    def _recognize_in_order(self, recognize, audio_data, languages):
+        for language in languages:
+            text = self._request(recognize, audio_data, language)
+            if text:
+                return text, language
+        return "", None
+
+    async def _recognize_in_order_async(self, recognize, audio_data, languages):
+        for language in languages:
+            text = await self._request(recognize, audio_data, language)
+            if text:
+                return text, language
+        return "", None
+
+    def _request(self, recognize, audio_data, language):
+        with self._stats_lock:
+            self.requests[language] += 1
+        return recognize(audio_data, language)
+
+    def _record(self, language):
+        with self._stats_lock:
+            self.detected[language or 'none'] += 1
+
+    def close(self):
+        """Release resources held by the policy"""
+
+    def stats(self) -> dict:
+        """Request counts, plus the savings against the fallback policy.
+
+        The fallback estimate assumes a chunk costs one request when the first
+        language was detected and one request per language otherwise.
+        """
+        with self._stats_lock:
+            requests = sum(self.requests.values())
+            first = self.detected.get(self.languages[0], 0)
+            fallback_estimate = first + (self.chunks - first) * len(self.languages)
+            return {
+                'policy': self.name,
+                'chunks': self.chunks,
+                'requests': requests,
+                'requests_by_language': dict(self.requests),
+                'detected': dict(self.detected),
+                'fallback_requests_estimate': fallback_estimate,
+                'saved_requests': fallback_estimate - requests,
+            }
+
+
+class ProbePolicy(LanguagePolicy):
+    """Probe with fallback until a language is heard, then use only that one"""
+
+    name = 'probe'
+
+    def __init__(self, languages=DEFAULT_LANGUAGES):
+        super().__init__(languages)
+        self._probe_lock = threading.Lock()
+        self._async_probe_lock = None
+        self.chosen = None
+
+    def recognize(self, recognize, audio_data):
+        if self.chosen is None:
+            with self._probe_lock:
+                # Concurrent chunks wait here until the probe has settled
+                if self.chosen is None:
+                    text, language = super().recognize(recognize, audio_data)
+                    self.chosen = language
+                    return text, language
+        with self._stats_lock:
+            self.chunks += 1
+        text, language = self._recognize_in_order(recognize, audio_data, (self.chosen,))
+        self._record(language)
+        return text, language
+
+    async def recognize_async(self, recognize, audio_data):
+        if self.chosen is None:
+            if self._async_probe_lock is None:
+                import asyncio
+                self._async_probe_lock = asyncio.Lock()
+            async with self._async_probe_lock:
+                if self.chosen is None:
+                    text, language = await super().recognize_async(recognize, audio_data)
+                    self.chosen = language
+                    return text, language
+        with self._stats_lock:
+            self.chunks += 1
+        text, language = await self._recognize_in_order_async(recognize, audio_data, (self.chosen,))
+        self._record(language)
+        return text, language
+
+
+class StickyPolicy(LanguagePolicy):
+    """Try the language that worked most often over the last few chunks first"""
+
+    name = 'sticky'
+
+    def __init__(self, languages=DEFAULT_LANGUAGES, window: int = 3):
+        super().__init__(languages)
+        self._recent = deque(maxlen=window)
+
+    def _order(self):
+        with self._stats_lock:
+            recent = list(self._recent)
+        counts = Counter(recent)
+        last_seen = {lang: i for i, lang in enumerate(recent)}
+        # Majority of the window first, ties go to the most recent success,
+        # then to the configured order
+        return tuple(sorted(self.languages,
+                            key=lambda lang: (-counts[lang], -last_seen.get(lang, -1))))
+
+    def _record(self, language):
+        super()._record(language)
+        if language:
+            with self._stats_lock:
+                self._recent.append(language)
+
+
+class RacePolicy(LanguagePolicy):
+    """Send every language concurrently and keep the first non-empty answer.
+
+    Lowest latency, but never fewer requests than languages per chunk.
+    """
+
+    name = 'race'
+
+    def __init__(self, languages=DEFAULT_LANGUAGES, max_workers: int = 4):
+        super().__init__(languages)
+        # One thread per language for each of the converter's max_workers chunks in flight
+        self._pool = ThreadPoolExecutor(max_workers=len(self.languages) * max(1, max_workers))
+
+    def _recognize_in_order(self, recognize, audio_data, languages):
+        futures = {self._pool.submit(self._request, recognize, audio_data, lang): lang
+                   for lang in languages}
+        error = None
+        for future in as_completed(futures):
+            try:
+                text = future.result()
+            except Exception as e:
+                error = error or e
+                continue
+            if text:
+                return text, futures[future]
+        if error is not None:
+            raise error
+        return "", None
+
+    async def _recognize_in_order_async(self, recognize, audio_data, languages):
+        import asyncio
+
+        async def request(language):
+            return await self._request(recognize, audio_data, language), language
+
+        tasks = [asyncio.ensure_future(request(lang)) for lang in languages]
+        error = None
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    text, language = await next_done
+                except Exception as e:
+                    error = error or e
+                    continue
+                if text:
+                    return text, language
+        finally:
+            # Losing requests are not needed any more
+            for task in tasks:
+                task.cancel()
+        if error is not None:
+            raise error
+        return "", None
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+
+
+LANGUAGE_POLICIES = {
+    policy.name: policy for policy in (LanguagePolicy, ProbePolicy, StickyPolicy, RacePolicy)
+}
+
+
+def get_language_policy(name: str) -> type:
+    """Policy class by name; ValueError for an unknown name"""
+    try:
+        return LANGUAGE_POLICIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown language policy: {name!r} "
+                         f"(choose from {', '.join(LANGUAGE_POLICIES)})") from None
+
+
+def make_language_policy(name: str = 'fallback', languages=DEFAULT_LANGUAGES,
+                         max_workers: int = 4) -> LanguagePolicy:
+    """Create a fresh policy by name (one per video).
+    max_workers is the number of chunks recognized at once, which sizes the race pool."""
+    policy = get_language_policy(name)
+    if issubclass(policy, RacePolicy):
+        return policy(languages, max_workers=max_workers)
+    return policy(languages)
@@ -0,0 +1,235 @@
+"""Declarative text normalization rules shared by both normalizers.
+
+Every rule is declared once in RULES and compiled at import. A profile is
+the ordered list of rule names one normalizer applies:
+
+- basic:      text_normalizer.normalize_text (repeated punctuation and
+              stretched letters are reduced, brackets are tightened)
+- persian:    PersianTextNormalizer without Hazm
+- hazm:       PersianTextNormalizer with the Hazm normalizer in place of
+              the Arabic letter and digit replacements
+
+The profiles differ on purpose: they reproduce the two normalizers as they
+were, including their different sentence-ending punctuation sets.
+
+RulePipeline.timed() records the time spent in each rule, to see which one
+dominates on long transcripts.
+"""
+import hashlib
+import re
+import time
+import unicodedata
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+PERSIAN_LETTERS = '\u0600-\u06FF'
+
+
+class Rule:
+    """One named normalization step"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def apply(self, text: str) -> str:
+        raise NotImplementedError
+
+    def signature(self) -> tuple:
+        """Everything that determines what the rule does, for rules_version"""
+        return (type(self).__name__, self.name)
+
+
+class Sub(Rule):
+    """Regex substitution, skipped when none of its trigger substrings occur"""
+
+    def __init__(self, name: str, pattern: str, replacement, triggers: Optional[Tuple[str, ...]] = None):
+        super().__init__(name)
+        self.pattern = re.compile(pattern)
+        self.replacement = replacement
+        self.triggers = triggers
+
+    def apply(self, text):
+        if self.triggers is None or any(t in text for t in self.triggers):
+            return self.pattern.sub(self.replacement, text)
+        return text
+
+    def signature(self):
+        return super().signature() + (self.pattern.pattern, self.replacement, self.triggers)
+
+
+class Replace(Rule):
+    """Plain (from, to) substring replacements.
+    A chain of str.replace calls beats str.translate by far on Persian text."""
+
+    def __init__(self, name: str, pairs: Iterable[Tuple[str, str]]):
+        super().__init__(name)
+        self.pairs = tuple(pairs)
+
+    def apply(self, text):
+        for old, new in self.pairs:
+            text = text.replace(old, new)
+        return text
+
+    def signature(self):
+        return super().signature() + self.pairs
+
+
+class Call(Rule):
+    """Any text -> text function, e.g. a Hazm normalizer bound at runtime"""
+
+    def __init__(self, name: str, func: Callable[[str], str]):
+        super().__init__(name)
+        self.func = func
+
+    def apply(self, text):
+        return self.func(text)
+
+    def signature(self):
+        return super().signature() + (getattr(self.func, '__qualname__', repr(self.func)),)
+
+
+class EnsureEnding(Rule):
+    """Append a period unless the text already ends with one of endings"""
+
+    def __init__(self, name: str, endings: str):
+        super().__init__(name)
+        self.endings = endings
+
+    def apply(self, text):
+        if text and text[-1] not in self.endings:
+            text += '.'
+        return text
+
+    def signature(self):
+        return super().signature() + (self.endings,)
+
+
+_P = PERSIAN_LETTERS
+RULES: Dict[str, Rule] = {rule.name: rule for rule in (
+    Call('nfc', lambda text: unicodedata.normalize('NFC', text)),
+    # Arabic variants to Persian: only Yeh and Kaf (basic), or all common ones
+    Replace('yeh_kaf', (('ي', 'ی'), ('ك', 'ک'))),
+    Replace('arabic_letters', (('ي', 'ی'), ('ك', 'ک'), ('ة', 'ه'), ('ؤ', 'و'),
+                               ('إ', 'ا'), ('أ', 'ا'), ('آ', 'آ'), ('ئ', 'ی'))),
+    # Arabic-Indic numerals to ASCII
+    Replace('digits', tuple(zip('٠١٢٣٤٥٦٧٨٩', '0123456789'))),
+    # Remove tatweel (kashida)
+    Replace('tatweel', (('ـ', ''),)),
+    # Any 3+ dots → …
+    Sub('ellipsis', r'\.\.{2,}', '…', ('...',)),
+    # Collapse repeated punctuation (!, ؟, ?, . , ،)
+    Sub('repeated_punctuation', r'([!؟?\.،])\1{1,}', r'\1', ('!!', '؟؟', '??', '..', '،،')),
+    # Reduce stretched letters (limit to 2 repeats for Persian letters)
+    Sub('stretched_letters', rf'([{_P}])\1{{2,}}', r'\1\1'),
+    # ZWNJ for common prefixes: می / نمی / بی
+    Sub('mi_prefix', rf'(?<!\S)(ن?می)[\s\u200c]+(?=[{_P}])', '\\1\u200c', ('می',)),
+    Sub('bi_prefix', rf'(?<!\S)(بی)[\s\u200c]+(?=[{_P}])', '\\1\u200c', ('بی',)),
+    # ZWNJ for common suffixes: ها / تر / ترین
+    Sub('suffix', rf'([{_P}])\s+(ها|تر|ترین)\b', '\\1\u200c\\2', ('ها', 'تر')),
+    # ZWNJ for Ezafe after plural: ها ی → ها‌ی
+    Sub('ezafe', r'ها\s+ی\b', 'ها\u200cی', ('ها',)),
+    # ASCII quotes to Persian guillemets for short spans
+    Sub('quotes', r'"([^"\n]{1,80})"', r'«\1»', ('"',)),
+    # Parentheses and guillemets spacing (one pass gives the same result as four)
+    Sub('brackets', r'([(«])\s+|\s+([)»])', r'\1\2', ('(', ')', '«', '»')),
+    # Comma/semicolon spacing, preferring the Persian marks
+    Sub('comma', r'\s*[،,]\s*', '، ', ('،', ',')),
+    Sub('semicolon', r'\s*;\s*', '؛ ', (';',)),
+    # Persian question mark after Persian letters
+    Sub('question', rf'([{_P}])\?\b', r'\1؟', ('?',)),
+    # One space after punctuation, none before
+    Sub('punctuation_spacing', r'\s*([،,:;؛.!?])\s*', r'\1 '),
+    Sub('punctuation_spacing_persian', r'\s*([،,:;؛.!?؟])\s*', r'\1 '),
+    # Same as \s+ → ' ', without rewriting every single space
+    Sub('whitespace', r'\s{2,}|[^\S ]', ' '),
+    Call('strip', str.strip),
+    # Sentence-ending punctuation; the Persian normalizer also accepts ، and ;
+    EnsureEnding('ending', '。．.؟!?！'),
+    EnsureEnding('ending_persian', '。．.؟!?！،;'),
+)}
+del _P
+
+BASIC_TYPOGRAPHY = ('tatweel', 'ellipsis', 'repeated_punctuation', 'stretched_letters',
+                    'mi_prefix', 'bi_prefix', 'suffix', 'ezafe', 'quotes', 'brackets',
+                    'comma', 'semicolon', 'question', 'whitespace', 'strip')
+PERSIAN_TYPOGRAPHY = ('tatweel', 'ellipsis', 'mi_prefix', 'bi_prefix', 'suffix', 'ezafe',
+                      'quotes', 'comma', 'semicolon', 'question')
+PERSIAN_CLEANUP = ('punctuation_spacing_persian', 'whitespace', 'strip', 'ending_persian')
+
+PROFILES: Dict[str, Tuple[str, ...]] = {
+    'basic': ('nfc', 'yeh_kaf') + BASIC_TYPOGRAPHY
+             + ('digits', 'punctuation_spacing', 'whitespace', 'strip', 'ending'),
+    'basic_typography': BASIC_TYPOGRAPHY,
+    'persian': ('nfc', 'arabic_letters', 'digits') + PERSIAN_TYPOGRAPHY + PERSIAN_CLEANUP,
+    # 'hazm' is a Call rule supplied by the caller (see RulePipeline)
+    'hazm': ('nfc', 'hazm') + PERSIAN_TYPOGRAPHY + PERSIAN_CLEANUP,
+}
+
+
+class RulePipeline:
+    """Apply the rules of one profile in order.
+
+    rules overrides or adds rules by name, which is how a Hazm normalizer
+    instance is plugged into the 'hazm' profile.
+    """
+
+    def __init__(self, profile: str = 'basic', rules: Optional[Dict[str, Rule]] = None):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown normalization profile: {profile!r} "
+                             f"(choose from {', '.join(PROFILES)})")
+        available = dict(RULES, **(rules or {}))
+        missing = [name for name in PROFILES[profile] if name not in available]
+        if missing:
+            raise ValueError(f"Profile {profile!r} needs rules: {', '.join(missing)}")
+        self.profile = profile
+        self.rules = tuple(available[name] for name in PROFILES[profile])
+        self._timings = None
+
+    def normalize(self, text: str) -> str:
+        if self._timings is not None:
+            return self._normalize_timed(text)
+        for rule in self.rules:
+            text = rule.apply(text)
+        return text
+
+    def _normalize_timed(self, text):
+        timings = self._timings
+        for rule in self.rules:
+            start = time.perf_counter()
+            text = rule.apply(text)
+            timings[rule.name] += time.perf_counter() - start
+        return text
+
+    @contextmanager
+    def timed(self):
+        """Record seconds spent per rule while the block runs.
+
+        Yields a dict {rule name: seconds} that is filled in as text is
+        normalized; rules appear in the order they are applied.
+        """
+        timings = self._timings = defaultdict(float)
+        try:
+            yield timings
+        finally:
+            self._timings = None
+
+
+def rules_version(profile: str) -> str:
+    """Short hash of the rules a profile applies; changes whenever one of them does"""
+    digest = hashlib.sha256(profile.encode())
+    for name in PROFILES[profile]:
+        rule = RULES.get(name)
+        digest.update(repr(rule.signature() if rule else name).encode())
+    return digest.hexdigest()[:16]
+
+
+_pipelines: Dict[str, RulePipeline] = {}
+
+
+def get_pipeline(profile: str) -> RulePipeline:
+    """Shared pipeline for a profile that needs no runtime rules"""
+    pipeline = _pipelines.get(profile)
+    if pipeline is None:
+        pipeline = _pipelines[profile] = RulePipeline(profile)
+    return pipeline
@@ -1,115 +1,115 @@
+import errno
+import functools
+import os
 import re
-import unicodedata
-from typing import List, Optional
-import hazm
-from hazm import Normalizer, word_tokenize, POSTagger, Lemmatizer
+import threading
+from typing import Iterable, Iterator, List, Optional
+
+from normalization_rules import RULES, Call, RulePipeline, get_pipeline
+
+POSTAGGER_MODEL = 'resources/postagger.model'
+
+
+# Where StreamingSegmenter may cut raw text: whitespace after a single sentence-ending
+# mark, before a letter or digit (not tatweel) that the suffix ZWNJ rule cannot join to ؟
+_SENTENCE_CUT_RE = re.compile(r'(?:[!?؟]|(?<!\.)\.)\s+(?=[^\W\u0640])(?!(?:ها|تر|ترین)\b)')
+# Words per sentence when text without punctuation is split into fixed windows
+FALLBACK_WINDOW_WORDS = 18
+# Raw words StreamingSegmenter holds back with --stream --early-sentences (see max_pending_words)
+STREAM_MAX_PENDING_WORDS = 4 * FALLBACK_WINDOW_WORDS
+# Distinct (word, POS) pairs whose lemma is kept; transcripts repeat a few thousand words
+LEMMA_CACHE_SIZE = 100_000
+
+
+def strip_commas(text: str) -> str:
+    """Remove Persian and Latin commas"""
+    if '،' in text or ',' in text:
+        return text.replace('،', '').replace(',', '')
+    return text
 
 
 class PersianTextNormalizer:
     """Advanced Persian text normalizer using Hazm library"""
     
-    def __init__(self):
-        """Initialize Hazm components for Persian text processing"""
+    def __init__(self, lemma_cache_size: int = LEMMA_CACHE_SIZE):
+        """Initialize Hazm components for Persian text processing.
+        The Lemmatizer and POSTagger are only needed by analyze_text and are
+        loaded on first use. Lemmas are memoized per (word, POS) in a bounded
+        LRU cache of lemma_cache_size entries."""
+        self._analysis_lock = threading.Lock()
+        self._analysis_loaded = False
+        self._lemmatizer = None
+        self._postagger = None
+        self._lemmatize = functools.lru_cache(maxsize=lemma_cache_size)(self._lemmatize_uncached)
+        self._hazm_pipeline = RulePipeline('hazm', {'hazm': Call('hazm', self._hazm_normalize)})
         try:
+            # Without the tagger model Hazm is not used at all, as before lazy loading
+            if not os.path.exists(POSTAGGER_MODEL):
+                raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), POSTAGGER_MODEL)
+            from hazm import Normalizer
             self.normalizer = Normalizer()
-            self.lemmatizer = Lemmatizer()
-            self.postagger = POSTagger(model='resources/postagger.model')
             print("✅ Hazm components loaded successfully")
         except Exception as e:
             print(f"⚠️  Warning: Could not load Hazm components: {e}")
             print("   Falling back to basic normalization")
             self.normalizer = None
-            self.lemmatizer = None
-            self.postagger = None
+            self._analysis_loaded = True
+
+    @property
+    def lemmatizer(self):
+        self._load_analysis_components()
+        return self._lemmatizer
+
+    @property
+    def postagger(self):
+        self._load_analysis_components()
+        return self._postagger
+
+    def _load_analysis_components(self):
+        """Load the Lemmatizer and POSTagger model once, on first use"""
+        if self._analysis_loaded:
+            return
+        with self._analysis_lock:
+            if self._analysis_loaded:
+                return
+            try:
+                from hazm import Lemmatizer, POSTagger
+                self._lemmatizer = Lemmatizer()
+                self._postagger = POSTagger(model=POSTAGGER_MODEL)
+            except Exception as e:
+                print(f"⚠️  Warning: Could not load Hazm analysis components: {e}")
+                self._lemmatizer = None
+                self._postagger = None
+            self._analysis_loaded = True
     
     def normalize_text(self, text: str) -> str:
         """Advanced Persian text normalization using Hazm"""
         if not text:
             return ""
         
-        # Basic Unicode normalization
-        text = unicodedata.normalize('NFC', str(text))
-        
-        # Use Hazm normalizer if available
-        if self.normalizer:
-            try:
-                text = self.normalizer.normalize(text)
-            except Exception as e:
-                print(f"⚠️  Hazm normalization failed: {e}")
-                text = self._basic_normalize(text)
-        else:
-            text = self._basic_normalize(text)
-        
-        # Apply Persian typography rules
-        text = self._apply_persian_typography(text)
-        
-        # Clean up whitespace and punctuation
-        text = self._cleanup_text(text)
+        # NFC, Hazm (or basic) normalization, Persian typography rules and
+        # whitespace/punctuation cleanup; see normalization_rules.PROFILES
+        text = self.pipeline.normalize(str(text))
         
         return text
     
-    def _basic_normalize(self, text: str) -> str:
-        """Basic normalization when Hazm is not available"""
-        # Convert Arabic variants to Persian
-        arabic_to_persian = {
-            'ي': 'ی', 'ك': 'ک', 'ة': 'ه', 'ؤ': 'و',
-            'إ': 'ا', 'أ': 'ا', 'آ': 'آ', 'ئ': 'ی'
-        }
-        
-        for arabic, persian in arabic_to_persian.items():
-            text = text.replace(arabic, persian)
-        
-        # Normalize numerals: Arabic-Indic to ASCII
-        arabic_indic_digits = '٠١٢٣٤٥٦٧٨٩'
-        for i, d in enumerate(arabic_indic_digits):
-            text = text.replace(d, str(i))
-        
-        return text
+    @property
+    def pipeline(self) -> RulePipeline:
+        """The 'hazm' rule pipeline, or 'persian' when Hazm is not available"""
+        return self._hazm_pipeline if self.normalizer else get_pipeline('persian')
     
-    def _apply_persian_typography(self, text: str) -> str:
-        """Apply Persian typography rules"""
-        # Remove tatweel (kashida)
-        text = text.replace('ـ', '')
-        
-        # Normalize ellipsis
-        text = re.sub(r'\.\.{2,}', '…', text)
-        
-        # ZWNJ for common prefixes: می / نمی / بی
-        text = re.sub(r'(?<!\S)(ن?می)[\s\u200c]+(?=[\u0600-\u06FF])', r'\1‌', text)
-        text = re.sub(r'(?<!\S)(بی)[\s\u200c]+(?=[\u0600-\u06FF])', r'\1‌', text)
-        
-        # ZWNJ for common suffixes: ها / تر / ترین
-        text = re.sub(r'([\u0600-\u06FF])\s+(ها|تر|ترین)\b', r'\1‌\2', text)
-        text = re.sub(r'ها\s+ی\b', 'ها‌ی', text)
-        
-        # Convert ASCII quotes to Persian guillemets
-        text = re.sub(r'"([^"\n]{1,80})"', r'«\1»', text)
-        
-        # Normalize comma/semicolon spacing
-        text = re.sub(r'\s*[،,]\s*', '، ', text)
-        text = re.sub(r'\s*;\s*', '؛ ', text)
-        
-        # Prefer Persian question mark after Persian letters
-        text = re.sub(r'([\u0600-\u06FF])\?\b', r'\1؟', text)
-        
-        return text
+    def _hazm_normalize(self, text: str) -> str:
+        """Hazm normalizer step of the 'hazm' pipeline"""
+        try:
+            return self.normalizer.normalize(text)
+        except Exception as e:
+            print(f"⚠️  Hazm normalization failed: {e}")
+            return self._basic_normalize(text)
     
-    def _cleanup_text(self, text: str) -> str:
-        """Final text cleanup"""
-        # Standardize punctuation spaces
-        text = re.sub(r'\s*([،,:;؛.!?؟])\s*', r'\1 ', text)
-        
-        # Collapse multiple spaces
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Strip leading/trailing whitespace
-        text = text.strip()
-        
-        # Ensure sentence-ending punctuation (only if not already present)
-        if text and text[-1] not in '。．.؟!?！،;':
-            text += '.'
-        
-        return text
+    def _basic_normalize(self, text: str) -> str:
+        """Basic normalization when Hazm is not available"""
+        # Convert Arabic variants to Persian, and Arabic-Indic numerals to ASCII
+        return RULES['digits'].apply(RULES['arabic_letters'].apply(text))
     
     def segment_sentences(self, text: str) -> List[str]:
         """Advanced sentence segmentation for Persian text"""
@@ -117,11 +117,27 @@ class PersianTextNormalizer:
             return []
         
         # Normalize text first
-        text = self.normalize_text(text)
+        return self._segment_normalized(self.normalize_text(text))
+    
+    def _segment_normalized(self, text: str) -> List[str]:
+        """Sentence segmentation of text that normalize_text already produced"""
+        if not text:
+            return []
         
+        sentences = self._merge_fragments([], self._sentence_candidates(text))
+        
+        # Fallback for long text without punctuation
+        if len(sentences) <= 1:
+            sentences = self._fallback_sentences(' '.join(sentences).split()) or sentences
+        
+        return self._finish_sentences(sentences)
+    
+    def _sentence_candidates(self, text: str) -> List[str]:
+        """Split normalized text after sentence-ending punctuation"""
         # Use Hazm word tokenization if available
         if self.normalizer:
             try:
+                from hazm import word_tokenize
                 # Tokenize and then reconstruct for better sentence boundaries
                 words = word_tokenize(text)
                 text = ' '.join(words)
@@ -133,10 +149,10 @@ class PersianTextNormalizer:
         text = re.sub(r'([.!?؟])([^\s])', r'\1 \2', text)
         
         # Split on sentence boundaries
-        candidates = re.split(r'(?<=[.!?؟])\s+', text)
-        
-        # Clean up sentences
-        sentences = []
+        return re.split(r'(?<=[.!?؟])\s+', text)
+    
+    def _merge_fragments(self, sentences: List[str], candidates: List[str]) -> List[str]:
+        """Append candidates to sentences, merging very short fragments into the previous one"""
         for s in candidates:
             s = s.strip()
             if not s:
@@ -149,21 +165,23 @@ class PersianTextNormalizer:
             
             sentences.append(s)
         
-        # Fallback for long text without punctuation
-        if len(sentences) <= 1:
-            words = text.split()
-            chunk_size = 18
-            fallback = []
-            for i in range(0, len(words), chunk_size):
-                chunk = ' '.join(words[i:i + chunk_size]).strip()
-                if not chunk:
-                    continue
-                if chunk[-1] not in '.!?؟':
-                    chunk += '.'
-                fallback.append(chunk)
-            if fallback:
-                sentences = fallback
-        
+        return sentences
+    
+    def _fallback_sentences(self, words: List[str]) -> List[str]:
+        """Fixed word windows for text with at most one sentence"""
+        chunk_size = FALLBACK_WINDOW_WORDS
+        fallback = []
+        for i in range(0, len(words), chunk_size):
+            chunk = ' '.join(words[i:i + chunk_size]).strip()
+            if not chunk:
+                continue
+            if chunk[-1] not in '.!?؟':
+                chunk += '.'
+            fallback.append(chunk)
+        return fallback
+    
+    def _finish_sentences(self, sentences: List[str]) -> List[str]:
+        """Break overly long sentences and ensure each ends with punctuation"""
         # Break overly long sentences
         refined = []
         for s in sentences:
@@ -197,47 +215,281 @@ class PersianTextNormalizer:
         
         return result
     
-    def analyze_text(self, text: str) -> dict:
-        """Analyze Persian text and return detailed information"""
+    def process_text(self, text: str, already_normalized: bool = False) -> dict:
+        """Normalize once and segment, with comma-free copies for transcript files.
+        
+        Returns normalized_text, sentences, clean_text and clean_sentences
+        (the last two without Persian or Latin commas). Pass
+        already_normalized=True for text that normalize_text produced, to
+        segment it as is: normalize_text is not idempotent, so normalizing
+        such text again can change it.
+        """
         if not text:
-            return {}
+            return {'normalized_text': '', 'sentences': [], 'clean_text': '', 'clean_sentences': []}
         
-        normalized = self.normalize_text(text)
-        sentences = self.segment_sentences(normalized)
+        text = str(text)
+        normalized = text if already_normalized else self.normalize_text(text)
+        sentences = self._segment_normalized(normalized)
         
-        analysis = {
-            'original_length': len(text),
-            'normalized_length': len(normalized),
-            'sentence_count': len(sentences),
-            'word_count': len(normalized.split()),
+        return {
             'normalized_text': normalized,
-            'sentences': sentences
+            'sentences': sentences,
+            'clean_text': strip_commas(normalized),
+            'clean_sentences': [strip_commas(s) for s in sentences]
         }
+    
+    def analyze_text(self, text: str) -> dict:
+        """Analyze Persian text and return detailed information"""
+        return self.analyze_texts([text])[0]
+    
+    def analyze_texts(self, texts: Iterable[str], workers: int = 1) -> List[dict]:
+        """Analyze many documents; each result is what analyze_text returns.
+        
+        All documents are POS-tagged in one tag_sents call (one document per
+        sequence, as analyze_text tags it) and lemmas come from the (word, POS)
+        LRU cache (see cache_stats). With workers > 1 the documents are spread
+        over a process pool; each worker process uses its own shared
+        normalizer, which loads the Hazm models once.
+        """
+        texts = list(texts)
+        if workers > 1 and len(texts) > 1:
+            return _analyze_in_processes(texts, workers)
+        
+        analyses = []
+        for text in texts:
+            if not text:
+                analyses.append({})
+                continue
+            processed = self.process_text(text)
+            normalized = processed['normalized_text']
+            sentences = processed['sentences']
+            analyses.append({
+                'original_length': len(text),
+                'normalized_length': len(normalized),
+                'sentence_count': len(sentences),
+                'word_count': len(normalized.split()),
+                'normalized_text': normalized,
+                'sentences': sentences
+            })
         
         # Add Hazm analysis if available
-        if self.postagger and self.lemmatizer:
+        documents = [analysis for analysis in analyses if analysis]
+        if documents and self.postagger and self.lemmatizer:
             try:
-                words = word_tokenize(normalized)
-                pos_tags = self.postagger.tag(words)
-                lemmas = [self.lemmatizer.lemmatize(word, pos) for word, pos in pos_tags]
+                from hazm import word_tokenize
+                token_lists = [word_tokenize(analysis['normalized_text']) for analysis in documents]
+                # The tagger model is shared by all threads using this instance
+                with self._analysis_lock:
+                    tagged = self.postagger.tag_sents(token_lists)
+                lemma_lists = [[self._lemmatize(word, pos) for word, pos in pos_tags] for pos_tags in tagged]
                 
-                analysis['pos_analysis'] = pos_tags
-                analysis['lemmas'] = lemmas
-                analysis['unique_words'] = len(set(lemmas))
+                for analysis, pos_tags, lemmas in zip(documents, tagged, lemma_lists):
+                    analysis['pos_analysis'] = pos_tags
+                    analysis['lemmas'] = lemmas
+                    analysis['unique_words'] = len(set(lemmas))
             except Exception as e:
                 print(f"⚠️  Hazm analysis failed: {e}")
         
-        return analysis
+        return analyses
+    
+    def _lemmatize_uncached(self, word: str, pos: str) -> str:
+        """Lemmatizer.lemmatize; called through the _lemmatize LRU cache"""
+        return self.lemmatizer.lemmatize(word, pos)
+    
+    def cache_stats(self) -> dict:
+        """Hits, misses, size and hit rate of the (word, POS) lemma cache"""
+        info = self._lemmatize.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize,
+            'max_size': info.maxsize,
+            'hit_rate': info.hits / lookups if lookups else 0.0
+        }
+
+
+def _analyze_batch(texts: List[str]) -> List[dict]:
+    """Process pool worker for analyze_texts"""
+    return get_shared_normalizer().analyze_texts(texts)
+
+
+def _analyze_in_processes(texts: List[str], workers: int) -> List[dict]:
+    from concurrent.futures import ProcessPoolExecutor
+    # A few batches per worker keeps the pool busy without tagging tiny batches
+    size = max(1, -(-len(texts) // (workers * 4)))
+    batches = [texts[i:i + size] for i in range(0, len(texts), size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [analysis for batch in pool.map(_analyze_batch, batches) for analysis in batch]
+
+
+_shared_normalizer: Optional[PersianTextNormalizer] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_normalizer() -> PersianTextNormalizer:
+    """Process-wide PersianTextNormalizer, created on first use"""
+    global _shared_normalizer
+    if _shared_normalizer is None:
+        with _shared_lock:
+            if _shared_normalizer is None:
+                _shared_normalizer = PersianTextNormalizer()
+    return _shared_normalizer
 
 
 # Backward compatibility functions
 def normalize_text(text: str) -> str:
-    """Backward compatibility function"""
-    normalizer = PersianTextNormalizer()
-    return normalizer.normalize_text(text)
+    """Backward compatibility function (uses the shared normalizer)"""
+    return get_shared_normalizer().normalize_text(text)
 
 
 def segment_sentences(text: str) -> List[str]:
-    """Backward compatibility function"""
-    normalizer = PersianTextNormalizer()
-    return normalizer.segment_sentences(text)
+    """Backward compatibility function (uses the shared normalizer)"""
+    return get_shared_normalizer().segment_sentences(text)
+
+
+def process_text(text: str, already_normalized: bool = False) -> dict:
+    """Normalize and segment in one call (uses the shared normalizer)"""
+    return get_shared_normalizer().process_text(text, already_normalized)
+
+
+class StreamingSegmenter:
+    """Sentence segmentation of chunk transcripts as they arrive.
+
+    feed() takes the text of one chunk and returns the sentences that can no
+    longer change; flush() returns the rest. Together they return exactly
+    what segment_sentences returns for the chunk texts joined with spaces.
+
+    Raw text is only cut where normalizing the two sides separately gives the
+    same result as normalizing them together: after a single . ! ? or ؟ and
+    whitespace, before a letter or digit, and never inside an open quotation.
+    The last sentence is held back because a short fragment after it would be
+    merged into it, and nothing is released before there are two sentences,
+    because text with fewer is split into fixed word windows instead.
+
+    Recognizer transcripts rarely have punctuation, so with only these cuts
+    everything would wait for flush(). max_pending_words (default: None)
+    trades that guarantee for earlier output: once more
+    raw words than that are held back, all held-back sentences are released
+    along with whole fixed word windows of the text after them, cut where
+    normalizing both sides separately gives the same words as normalizing
+    them together. The output can then differ from segment_sentences: a
+    window may start at a different word, a short fragment is not merged into
+    the sentence before it, and normalization rules spanning more than two
+    words, or quotes, may see the cut.
+    """
+
+    def __init__(self, normalizer: Optional[PersianTextNormalizer] = None,
+                 max_pending_words: Optional[int] = None):
+        self.normalizer = normalizer or get_shared_normalizer()
+        self.max_pending_words = max_pending_words
+        self._pending = ''          # raw text after the last cut
+        self._started = False
+        self._normalized_parts = []
+        self._sentences = []        # merged sentences not yet released
+        self._released = False
+        self._forced = False        # text was released at a word bound
+
+    @property
+    def normalized_text(self) -> str:
+        """normalize_text of everything cut so far (of all text after flush)"""
+        return ' '.join(self._normalized_parts)
+
+    def feed(self, text: str) -> List[str]:
+        """Add the text of the next chunk and return the finished sentences"""
+        if not text:
+            return []
+        if self._started:
+            self._pending += ' '
+        self._pending += str(text)
+        self._started = True
+        if not self._normalized_parts:
+            self._pending = self._pending.lstrip()
+
+        sentences = self._cut_sentences()
+        if self.max_pending_words:
+            sentences += self._cut_words()
+        return sentences
+
+    def _cut_sentences(self) -> List[str]:
+        cuts = list(_SENTENCE_CUT_RE.finditer(self._pending))
+        if not cuts:
+            return []
+        normalized = self.normalizer.normalize_text(self._pending[:cuts[-1].end()])
+        end = cuts[-1].end()
+        # A quote left unmatched could still pair with one in later text;
+        # text before the first quote is always safe
+        if '"' in normalized:
+            quote = self._pending.find('"')
+            safe = [cut for cut in cuts if cut.end() <= quote]
+            if not safe:
+                return []
+            end = safe[-1].end()
+            normalized = self.normalizer.normalize_text(self._pending[:end])
+        self._pending = self._pending[end:]
+        return self._add(normalized)
+
+    def _cut_words(self) -> List[str]:
+        """Release whole word windows once more than max_pending_words are held back"""
+        words = [m.span() for m in re.finditer(r'\S+', self._pending)]
+        if len(words) <= self.max_pending_words:
+            return []
+        window = FALLBACK_WINDOW_WORDS
+        # Keep at least one word back; prefer a multiple of the window, as
+        # segment_sentences would split there too
+        count = max(1, (len(words) - 1) // window * window)
+        for k in range(count, max(0, count - window), -1):
+            left = self._pending[slice(*words[k - 1])]
+            right = self._pending[slice(*words[k])]
+            together = self.normalizer.normalize_text(f"{left} {right}")
+            if together == f"{self._normalize_open(left)} {self.normalizer.normalize_text(right)}":
+                count = k
+                break
+        normalized = self._normalize_open(self._pending[:words[count - 1][1]])
+        self._pending = self._pending[words[count][0]:]
+        return self._add_all(normalized)
+
+    def _normalize_open(self, text: str) -> str:
+        """normalize_text of text that continues later, without the final stop it adds"""
+        normalized = self.normalizer.normalize_text(text)
+        if normalized.endswith('.') and not text.rstrip().endswith('.'):
+            normalized = normalized[:-1]
+        return normalized
+
+    def flush(self) -> List[str]:
+        """Return the sentences of whatever text is still held back"""
+        rest, self._pending = self._pending.rstrip(), ''
+        finished = self._add(self.normalizer.normalize_text(rest)) if rest else []
+        sentences, self._sentences = self._sentences, []
+        # Fallback for long text without punctuation, as in segment_sentences
+        if (not self._released or self._forced) and len(sentences) <= 1:
+            sentences = self.normalizer._fallback_sentences(' '.join(sentences).split()) or sentences
+        return finished + self.normalizer._finish_sentences(sentences)
+
+    def _add(self, normalized: str) -> List[str]:
+        self._normalized_parts.append(normalized)
+        self._sentences = self.normalizer._merge_fragments(
+            self._sentences, self.normalizer._sentence_candidates(normalized))
+        if len(self._sentences) < 2:
+            return []
+        self._released = True
+        done, self._sentences = self._sentences[:-1], self._sentences[-1:]
+        return self.normalizer._finish_sentences(done)
+
+    def _add_all(self, normalized: str) -> List[str]:
+        """Release everything up to a word bound; unpunctuated text goes in word windows"""
+        self._normalized_parts.append(normalized)
+        done = self.normalizer._merge_fragments(self._sentences, self.normalizer._sentence_candidates(normalized))
+        self._sentences = []
+        self._released = self._forced = True
+        if done and done[-1][-1] not in '.!?؟':
+            done[-1:] = self.normalizer._fallback_sentences(done[-1].split())
+        return self.normalizer._finish_sentences(done)
+
+
+def iter_sentences(texts: Iterable[str], normalizer: Optional[PersianTextNormalizer] = None) -> Iterator[str]:
+    """Yield finished sentences while chunk texts are still arriving"""
+    segmenter = StreamingSegmenter(normalizer)
+    for text in texts:
+        yield from segmenter.feed(text)
+    yield from segmenter.flush()
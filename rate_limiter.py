@@ -0,0 +1,233 @@
+"""Request budget for the speech service, shared by every process that uses it.
+
+Several converters running at once (worker processes on one node, or nodes
+sharing a volume) each see only their own requests and together exceed the
+recognizer quota. SharedRateLimiter keeps one token bucket and a per-day
+request count in a SQLite file: every request first takes a token, so all
+processes pointed at the same file share requests_per_minute between them,
+and none starts a request once daily_budget requests were sent that (UTC)
+day. Each process is a worker with its own row, recording its requests and
+how long it waited for tokens (see usage()).
+
+The limits are stored once, by the first process that sets any, and every
+later process must ask for the same ones (or none, to adopt them): a
+mismatch raises ValueError instead of letting the last process to start
+change the rate for all of them.
+
+The file uses SQLite's rollback journal rather than WAL, since WAL needs
+shared memory and so does not work across machines on a network volume.
+Each token is one short IMMEDIATE transaction, which SQLite's file locks
+serialize between processes. Clocks of hosts sharing the file should be in
+sync (e.g. via NTP), as refills are computed from wall-clock time.
+"""
+import datetime
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import speech_recognition as sr
+
+# Seconds of requests_per_minute that may be sent at once after an idle spell
+DEFAULT_BURST_SECONDS = 10
+# Longest single sleep while waiting for a token, to notice a raised limit
+_MAX_POLL = 1.0
+
+
+class BudgetExhausted(sr.RequestError):
+    """The day's request budget is used up; retrying today cannot succeed"""
+
+    # Tells RequestController to give up at once instead of retrying
+    final = True
+
+
+def utc_day(now: float) -> str:
+    return datetime.datetime.fromtimestamp(now, datetime.timezone.utc).strftime('%Y-%m-%d')
+
+
+class SharedRateLimiter:
+    """SQLite-backed token bucket and daily budget shared across processes.
+
+    requests_per_minute=None leaves the rate unlimited and daily_budget=None
+    the day's total; burst is the bucket size (default: 10 seconds' worth of
+    requests). Without any of the three, the limits already stored in the
+    file are used. worker names this process in usage() (default: host:pid).
+    """
+
+    def __init__(self, path: str, requests_per_minute: Optional[float] = None,
+                 daily_budget: Optional[int] = None, burst: Optional[float] = None,
+                 worker: Optional[str] = None):
+        self.path = path
+        self.requests_per_minute = requests_per_minute
+        self.daily_budget = daily_budget
+        if burst is None and requests_per_minute:
+            burst = max(1.0, requests_per_minute * DEFAULT_BURST_SECONDS / 60)
+        self.burst = burst
+        self.worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+        # This process's totals, for its own summary
+        self.requests = 0
+        self.queued_seconds = 0.0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS bucket (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL,
+                requests_per_minute REAL,
+                daily_budget INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS settings (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                requests_per_minute REAL,
+                daily_budget INTEGER,
+                burst REAL
+            );
+            CREATE TABLE IF NOT EXISTS daily_usage (
+                day TEXT PRIMARY KEY,
+                requests INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS recent_requests (time REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS workers (
+                worker TEXT PRIMARY KEY,
+                requests INTEGER NOT NULL,
+                queued_seconds REAL NOT NULL,
+                max_wait REAL NOT NULL,
+                last_seen REAL NOT NULL
+            );"""
+        )
+        self._settle_limits()
+
+    def _settle_limits(self):
+        """Store this process's limits if the file has none yet, adopt the
+        stored ones if it asked for none, and refuse different ones"""
+        limits = (self.requests_per_minute, self.daily_budget, self.burst)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                stored = self._conn.execute(
+                    "SELECT requests_per_minute, daily_budget, burst FROM settings WHERE id=0").fetchone()
+                if stored is None and limits != (None, None, None):
+                    self._conn.execute("INSERT INTO settings VALUES (0, ?, ?, ?)", limits)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        if stored is None or limits == tuple(stored):
+            return
+        if limits == (None, None, None):
+            self.requests_per_minute, self.daily_budget, self.burst = stored
+            return
+        self.close()
+        raise ValueError(f"{self.path} is shared with requests_per_minute={stored[0]}, "
+                         f"daily_budget={stored[1]}, burst={stored[2]}; this process asked for "
+                         f"requests_per_minute={limits[0]}, daily_budget={limits[1]}, burst={limits[2]} "
+                         f"(use the same limits, or another rate limit file)")
+
+    def acquire(self):
+        """Block until this process may send one request.
+        Raises BudgetExhausted once the day's budget is used up."""
+        start = time.monotonic()
+        while True:
+            wait = self._take(time.monotonic() - start)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """acquire() for coroutines; the SQLite transaction runs off the event loop"""
+        import asyncio
+        start = time.monotonic()
+        while True:
+            wait = await asyncio.to_thread(self._take, time.monotonic() - start)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def _take(self, waited: float) -> float:
+        """Take a token if one is free: 0, else seconds until the next one"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Read the clock only once holding the lock, so refills never go back in time
+                wait = self._take_locked(time.time(), waited)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            if not wait:
+                self.requests += 1
+                self.queued_seconds += waited
+        return wait
+
+    def _take_locked(self, now, waited):
+        day = utc_day(now)
+        row = self._conn.execute("SELECT requests FROM daily_usage WHERE day=?", (day,)).fetchone()
+        used = row[0] if row else 0
+        if self.daily_budget is not None and used >= self.daily_budget:
+            raise BudgetExhausted(f"daily request budget of {self.daily_budget} used up for {day} (UTC)")
+
+        row = self._conn.execute("SELECT tokens, updated FROM bucket WHERE id=0").fetchone()
+        # A host whose clock lags behind the last writer's must not refill the same time twice
+        refilled = now if row is None else max(now, row[1])
+        if self.requests_per_minute:
+            rate = self.requests_per_minute / 60
+            tokens = self.burst if row is None else min(self.burst, row[0] + (refilled - row[1]) * rate)
+            if tokens < 1:
+                self._save_bucket(tokens, refilled)
+                return min(_MAX_POLL, (1 - tokens) / rate)
+            tokens -= 1
+        else:
+            tokens = row[0] if row else 0.0
+        self._save_bucket(tokens, refilled)
+
+        self._conn.execute(
+            "INSERT INTO daily_usage VALUES (?, 1) ON CONFLICT(day) DO UPDATE SET requests = requests + 1", (day,))
+        self._conn.execute("DELETE FROM recent_requests WHERE time < ?", (now - 60,))
+        self._conn.execute("INSERT INTO recent_requests VALUES (?)", (now,))
+        self._conn.execute(
+            """INSERT INTO workers VALUES (?, 1, ?, ?, ?)
+               ON CONFLICT(worker) DO UPDATE SET requests = requests + 1,
+                   queued_seconds = queued_seconds + excluded.queued_seconds,
+                   max_wait = MAX(max_wait, excluded.max_wait), last_seen = excluded.last_seen""",
+            (self.worker, waited, waited, now))
+        return 0.0
+
+    def _save_bucket(self, tokens, now):
+        self._conn.execute("INSERT OR REPLACE INTO bucket (id, tokens, updated) VALUES (0, ?, ?)", (tokens, now))
+
+    def usage(self) -> dict:
+        """Current usage of the shared budget and every worker's requests and queued time"""
+        now = time.time()
+        day = utc_day(now)
+        with self._lock:
+            settings = self._conn.execute(
+                "SELECT requests_per_minute, daily_budget FROM settings WHERE id=0").fetchone()
+            today = self._conn.execute("SELECT requests FROM daily_usage WHERE day=?", (day,)).fetchone()
+            last_minute = self._conn.execute(
+                "SELECT COUNT(*) FROM recent_requests WHERE time >= ?", (now - 60,)).fetchone()[0]
+            workers = self._conn.execute(
+                "SELECT worker, requests, queued_seconds, max_wait, last_seen FROM workers "
+                "ORDER BY last_seen DESC").fetchall()
+        requests_per_minute, daily_budget = settings or (self.requests_per_minute, self.daily_budget)
+        return {
+            'day': day,
+            'requests_today': today[0] if today else 0,
+            'daily_budget': daily_budget,
+            'requests_last_minute': last_minute,
+            'requests_per_minute': requests_per_minute,
+            'workers': [{'worker': worker, 'requests': requests, 'queued_seconds': queued,
+                         'avg_wait': queued / requests if requests else 0.0, 'max_wait': max_wait,
+                         'idle_seconds': max(0.0, now - last_seen)}
+                        for worker, requests, queued, max_wait, last_seen in workers],
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
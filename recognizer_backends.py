@@ -0,0 +1,223 @@
+"""Speech recognition backends used by WorkingYouTubeToText.
+
+A backend turns one chunk of sr.AudioData into text for one language. It
+raises sr.UnknownValueError when nothing was understood and sr.RequestError
+when the service could not be reached, exactly like the SpeechRecognition
+recognizers. Backends also declare the languages they support and whether
+they have a native asyncio implementation.
+
+- google:   Google Web Speech through SpeechRecognition (default); its
+            asyncio path shares keep-alive connections (see speech_client.py)
+- stub:     deterministic local engine with configurable latency and failure
+            rates, for measuring the pipeline without network access
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+from typing import Callable
+
+from language_policy import DEFAULT_LANGUAGES, PRIMARY_LANGUAGE
+
+
+class RecognizerBackend:
+    """Base class: recognize one chunk in one language"""
+
+    name = 'base'
+    # Native coroutine support; recognize_async falls back to a worker thread otherwise
+    supports_async = False
+    # Encoding the backend uploads; 'flac' lets the transcriber pre-encode
+    # chunks (see flac_encoder.py)
+    payload_format = None
+
+    def __init__(self, languages=DEFAULT_LANGUAGES):
+        self.languages = tuple(languages)
+
+    def recognize(self, audio_data, language: str = PRIMARY_LANGUAGE) -> str:
+        raise NotImplementedError
+
+    async def recognize_async(self, audio_data, language: str = PRIMARY_LANGUAGE) -> str:
+        import asyncio
+        return await asyncio.to_thread(self.recognize, audio_data, language)
+
+    async def aclose(self):
+        """Release resources recognize_async holds on the running event loop"""
+
+    def close(self):
+        """Release resources held by the backend"""
+
+
+class GoogleBackend(RecognizerBackend):
+    """Google Web Speech API via sr.Recognizer.recognize_google.
+
+    recognize_async sends the same requests through an AsyncSpeechClient
+    instead, with at most max_in_flight requests on pooled keep-alive
+    connections. timeout bounds each request in seconds; endpoint and key
+    default to SpeechRecognition's.
+    """
+
+    name = 'google'
+    supports_async = True
+    payload_format = 'flac'
+
+    def __init__(self, recognizer=None, languages=DEFAULT_LANGUAGES, endpoint=None, key=None,
+                 max_in_flight: int = 8, timeout: float = 60.0):
+        super().__init__(languages)
+        self.recognizer = recognizer
+        self.endpoint = endpoint
+        self.key = key
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.client = None
+        self._client_loop = None
+
+    def recognize(self, audio_data, language=PRIMARY_LANGUAGE):
+        if self.recognizer is None:
+            import speech_recognition as sr
+            recognizer = sr.Recognizer()
+            recognizer.operation_timeout = self.timeout
+            self.recognizer = recognizer
+        options = {name: value for name, value in (('key', self.key), ('endpoint', self.endpoint)) if value}
+        return self.recognizer.recognize_google(audio_data, language=language, **options)
+
+    async def recognize_async(self, audio_data, language=PRIMARY_LANGUAGE):
+        import asyncio
+        loop = asyncio.get_running_loop()
+        if self.client is None or self._client_loop is not loop:
+            # Connections belong to the loop they were opened on
+            from speech_client import ENDPOINT, AsyncSpeechClient
+            self.client = AsyncSpeechClient(self.endpoint or ENDPOINT, self.key,
+                                            self.max_in_flight, self.timeout)
+            self._client_loop = loop
+        return await self.client.recognize(audio_data, language)
+
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.aclose()
+        self._client_loop = None
+
+
+class CallableBackend(RecognizerBackend):
+    """Adapter for a plain (audio_data, language) -> text callable"""
+
+    name = 'callable'
+
+    def __init__(self, recognize: Callable, languages=DEFAULT_LANGUAGES):
+        super().__init__(languages)
+        self._recognize = recognize
+
+    def recognize(self, audio_data, language=PRIMARY_LANGUAGE):
+        return self._recognize(audio_data, language=language)
+
+
+class StubBackend(RecognizerBackend):
+    """Deterministic local engine for load tests.
+
+    Every request sleeps for latency (+/- jitter) seconds, then fails with
+    sr.RequestError at failure_rate, hears nothing at no_speech_rate, and
+    otherwise returns a short text derived from the audio. Only spoken_language
+    is ever understood. Outcomes depend on the seed, the audio and how often
+    the same request was made before, never on thread scheduling, so runs
+    are reproducible at any worker count. The one exception is capacity:
+    requests arriving while capacity others are in flight are rejected at
+    once with a 429 (Too Many Requests) error, like a throttling service.
+    """
+
+    name = 'stub'
+    supports_async = True
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, failure_rate: float = 0.0,
+                 no_speech_rate: float = 0.0, spoken_language: str = PRIMARY_LANGUAGE,
+                 seed: int = 0, capacity=None, languages=DEFAULT_LANGUAGES):
+        super().__init__(languages)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.no_speech_rate = no_speech_rate
+        self.spoken_language = spoken_language
+        self.seed = seed
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._attempts = Counter()
+        self.calls = 0
+        self.failures = 0
+        self.throttled = 0
+        self.in_flight = 0
+
+    def _plan(self, audio_data, language):
+        """(delay, outcome, text) for this request; outcome is 'ok', 'fail' or 'silent'"""
+        digest = hashlib.blake2b(audio_data.get_raw_data(), digest_size=8).hexdigest()
+        with self._lock:
+            attempt = self._attempts[(digest, language)]
+            self._attempts[(digest, language)] += 1
+            self.calls += 1
+        draw = hashlib.blake2b(f"{self.seed}:{digest}:{language}:{attempt}".encode(),
+                               digest_size=8).digest()
+        # Two independent uniform numbers in [0, 1) from one hash
+        u1 = int.from_bytes(draw[:4], 'big') / 2 ** 32
+        u2 = int.from_bytes(draw[4:], 'big') / 2 ** 32
+        delay = max(0.0, self.latency + self.jitter * (2 * u1 - 1))
+        if u2 < self.failure_rate:
+            outcome = 'fail'
+        elif language != self.spoken_language or u2 < self.failure_rate + self.no_speech_rate:
+            outcome = 'silent'
+        else:
+            outcome = 'ok'
+        return delay, outcome, f"stub-{digest[:8]}"
+
+    def _answer(self, outcome, text):
+        import speech_recognition as sr
+        if outcome == 'fail':
+            with self._lock:
+                self.failures += 1
+            raise sr.RequestError("stub backend: simulated failure")
+        if outcome == 'silent':
+            raise sr.UnknownValueError()
+        return text
+
+    def _enter(self):
+        """Count the request in flight, or reject it when over capacity"""
+        import speech_recognition as sr
+        with self._lock:
+            if self.capacity is not None and self.in_flight >= self.capacity:
+                self.throttled += 1
+                error = sr.RequestError("recognition request failed: Too Many Requests")
+                error.status = 429
+                raise error
+            self.in_flight += 1
+
+    def _leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def recognize(self, audio_data, language=PRIMARY_LANGUAGE):
+        self._enter()
+        try:
+            delay, outcome, text = self._plan(audio_data, language)
+            time.sleep(delay)
+            return self._answer(outcome, text)
+        finally:
+            self._leave()
+
+    async def recognize_async(self, audio_data, language=PRIMARY_LANGUAGE):
+        import asyncio
+        self._enter()
+        try:
+            delay, outcome, text = self._plan(audio_data, language)
+            await asyncio.sleep(delay)
+            return self._answer(outcome, text)
+        finally:
+            self._leave()
+
+
+BACKENDS = {backend.name: backend for backend in (GoogleBackend, StubBackend)}
+
+
+def make_backend(name: str = 'google', **options) -> RecognizerBackend:
+    """Create a backend by name; options are passed to its constructor"""
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown recognizer backend: {name!r} "
+                         f"(choose from {', '.join(BACKENDS)})") from None
+    return backend(**options)
@@ -0,0 +1,353 @@
+"""Retries, adaptive concurrency and a circuit breaker for recognizer requests.
+
+Google Web Speech answers bursts with errors and 429 (Too Many Requests)
+when it throttles a client. Failing the whole video on the first
+sr.RequestError, or retrying at full concurrency, both collapse throughput,
+so every request of a video goes through one RequestController:
+
+- retries:     a failed request is tried again up to max_retries times after
+               a jittered exponential backoff ("full jitter": a uniform delay
+               between 0 and base_delay * 2**attempt, capped at max_delay)
+- concurrency: AIMD, as in TCP congestion control. Each success raises the
+               limit on concurrent requests by 1/limit (about +1 per round of
+               requests); a 429, or an error right after another failure,
+               halves it, at most once per base_delay, never below 1 or above
+               max_concurrency. A lone error is more likely a glitch than
+               overload, and is only retried
+- breaker:     after failure_threshold failures in a row the circuit opens
+               and new requests wait for cooldown seconds; then a single
+               probe is let through, which closes the circuit on success and
+               reopens it with twice the cooldown on failure. Failed probes do
+               not use up their request's retries, so the pipeline pauses
+               rather than fails; the error is only raised once it has been
+               paused for max_pause seconds in total
+
+sr.UnknownValueError means the service answered, so it counts as a success.
+OSError (e.g. a socket timeout recognize_google lets through) is retried like
+sr.RequestError and raised as one once the retries are used up.
+A RequestError with a true final attribute (e.g. rate_limiter.BudgetExhausted)
+is raised at once: it was not the service failing, and retrying cannot help.
+call() is used from worker threads and call_async() from coroutines. Their
+before hook (the shared rate limiter's token) runs ahead of each attempt,
+outside the concurrency slots, so waiting for it never holds a slot that
+another request could use.
+"""
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+import speech_recognition as sr
+
+DEFAULT_MAX_RETRIES = 4
+
+
+def is_throttled(error: Exception) -> bool:
+    """Whether a RequestError is the service asking for fewer requests (HTTP 429)"""
+    return getattr(error, 'status', None) == 429 or 'too many requests' in str(error).lower()
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float, rng=random) -> float:
+    """Full-jitter delay before retry number attempt + 1"""
+    return rng.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class AIMDLimit:
+    """Additive-increase, multiplicative-decrease limit on concurrent requests"""
+
+    def __init__(self, max_limit: int, min_limit: int = 1, decrease_interval: float = 0.5):
+        self.max_limit = max(1, int(max_limit))
+        self.min_limit = max(1, min(int(min_limit), self.max_limit))
+        self.decrease_interval = decrease_interval
+        self.limit = float(self.max_limit)
+        self.lowest = self.limit
+        self.decreases = 0
+        self._last_decrease = float('-inf')
+
+    @property
+    def allowed(self) -> int:
+        return int(self.limit)
+
+    def on_success(self):
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def on_error(self, now: float):
+        # Requests already in flight fail together; one halving per interval
+        if now - self._last_decrease >= self.decrease_interval:
+            self.limit = max(self.min_limit, self.limit / 2)
+            self.lowest = min(self.lowest, self.limit)
+            self.decreases += 1
+            self._last_decrease = now
+
+
+class CircuitBreaker:
+    """Closed, open (everyone waits) or half-open (one probe request)"""
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 5.0, max_cooldown: float = 60.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = 'closed'
+        self.failures = 0
+        self.trips = 0
+        self._opened_at = 0.0
+        self._paused_since = 0.0
+        self._probing = False
+        self._open_seconds = 0.0
+
+    def admit(self, now: float) -> float:
+        """0 when a request may start now, else seconds to wait"""
+        if self.state == 'open':
+            remaining = self._opened_at + self.cooldown - now
+            if remaining > 0:
+                return remaining
+            self.state = 'half-open'
+            self._probing = False
+        if self.state == 'half-open':
+            if self._probing:
+                return self.cooldown
+            self._probing = True
+        return 0.0
+
+    def record(self, success: bool, now: float):
+        if success:
+            self.failures = 0
+            if self.state != 'closed':
+                self._open_seconds += now - self._paused_since
+                self.state = 'closed'
+                self.cooldown = self.base_cooldown
+            return
+        self.failures += 1
+        if self.state == 'half-open':
+            self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+            self._open(now)
+        elif self.state == 'closed' and self.failures >= self.failure_threshold:
+            self._paused_since = now
+            self._open(now)
+
+    def _open(self, now):
+        self.state = 'open'
+        self.trips += 1
+        self._opened_at = now
+        self._probing = False
+
+    def paused_seconds(self, now: float) -> float:
+        """Total time the circuit has not been closed"""
+        return self._open_seconds + (now - self._paused_since if self.state != 'closed' else 0.0)
+
+
+class RequestController:
+    """Retries, AIMD concurrency and circuit breaking for one video's requests.
+
+    max_retries=0 sends every request once and raises its error right away,
+    without pausing, as before. adaptive=False keeps the limit at
+    max_concurrency (retries and the breaker still apply).
+    """
+
+    def __init__(self, max_concurrency: int = 4, max_retries: int = DEFAULT_MAX_RETRIES,
+                 base_delay: float = 0.5, max_delay: float = 30.0, failure_threshold: int = 5,
+                 cooldown: float = 5.0, max_pause: float = 600.0, adaptive: bool = True,
+                 seed: Optional[int] = None):
+        self.max_retries = max(0, int(max_retries))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_pause = max_pause
+        self.adaptive = adaptive
+        self.limit = AIMDLimit(max_concurrency, decrease_interval=base_delay)
+        self.breaker = CircuitBreaker(failure_threshold, cooldown) if self.max_retries else None
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self._async_waiters = []
+        self._last_error = None
+        self._started = time.monotonic()
+        self.in_flight = 0
+        self.requests = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.throttled = 0
+        self.retries = 0
+        self.gave_up = 0
+        self._failed_last = False
+
+    def call(self, request: Callable, before: Optional[Callable] = None):
+        """Run request() (one recognizer request) under the controller.
+        before() runs ahead of every attempt, without holding a concurrency
+        slot (e.g. SharedRateLimiter.acquire); its errors are raised as is."""
+        attempt = 0
+        while True:
+            if before is not None:
+                before()
+            probe = self._acquire()
+            try:
+                result = request()
+            except sr.UnknownValueError:
+                self._release('ok')
+                raise
+            except (sr.RequestError, OSError) as e:
+                if getattr(e, 'final', False):
+                    self._release(None, probe)
+                    raise
+                delay, attempt = self._failed(e, attempt, probe)
+                if delay is None:
+                    raise _request_error(e)
+                time.sleep(delay)
+                continue
+            except BaseException:
+                self._release(None, probe)
+                raise
+            self._release('ok')
+            return result
+
+    async def call_async(self, request: Callable, before: Optional[Callable] = None):
+        """call() for coroutine functions request and before"""
+        import asyncio
+        attempt = 0
+        while True:
+            if before is not None:
+                await before()
+            probe = await self._acquire_async()
+            try:
+                result = await request()
+            except sr.UnknownValueError:
+                self._release('ok')
+                raise
+            except (sr.RequestError, OSError) as e:
+                if getattr(e, 'final', False):
+                    self._release(None, probe)
+                    raise
+                delay, attempt = self._failed(e, attempt, probe)
+                if delay is None:
+                    raise _request_error(e)
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self._release(None, probe)
+                raise
+            self._release('ok')
+            return result
+
+    def _admit(self):
+        """Under the lock: 0 when the request may start, else the seconds to
+        wait, or None to wait until a request finishes"""
+        if self.in_flight >= (self.limit.allowed if self.adaptive else self.limit.max_limit):
+            return None
+        now = time.monotonic()
+        wait = self.breaker.admit(now) if self.breaker else 0.0
+        if wait:
+            paused = self.breaker.paused_seconds(now)
+            if paused > self.max_pause:
+                self.gave_up += 1
+                raise sr.RequestError(f"recognition paused for {paused:.0f} s after repeated failures: "
+                                      f"{self._last_error}")
+            return wait
+        self.in_flight += 1
+        self.requests += 1
+        return 0.0
+
+    def _probing(self):
+        return self.breaker is not None and self.breaker.state == 'half-open'
+
+    def _acquire(self):
+        """Wait for a turn to send a request; returns whether it is the breaker's probe"""
+        with self._released:
+            while True:
+                wait = self._admit()
+                if wait == 0:
+                    return self._probing()
+                self._released.wait(wait)
+
+    async def _acquire_async(self):
+        import asyncio
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                wait = self._admit()
+                if wait == 0:
+                    return self._probing()
+                waiter = loop.create_future()
+                self._async_waiters.append(waiter)
+            try:
+                await asyncio.wait_for(waiter, wait)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._lock:
+                    if waiter in self._async_waiters:
+                        self._async_waiters.remove(waiter)
+
+    def _failed(self, error, attempt, probe):
+        """Record a failed request. Returns (delay before retrying it or None
+        to give up, attempt number of the retry)"""
+        with self._lock:
+            self._last_error = error
+        self._release('throttled' if is_throttled(error) else 'error')
+        with self._lock:
+            # A failed probe costs pause time (see max_pause), not a retry
+            if attempt >= self.max_retries and not probe:
+                self.gave_up += 1
+                return None, attempt
+            self.retries += 1
+            delay = backoff_delay(min(attempt, self.max_retries), self.base_delay, self.max_delay, self._random)
+            return delay, attempt if probe else attempt + 1
+
+    def _release(self, outcome, probe=False):
+        """A request finished: 'ok', 'error', 'throttled' or None (not the service's doing)"""
+        with self._lock:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if outcome == 'ok':
+                self.succeeded += 1
+                self.limit.on_success()
+            elif outcome is not None:
+                self.failed += 1
+                self.throttled += outcome == 'throttled'
+                if outcome == 'throttled' or self._failed_last:
+                    self.limit.on_error(now)
+            if outcome is not None:
+                self._failed_last = outcome != 'ok'
+            if self.breaker and outcome is not None:
+                self.breaker.record(outcome == 'ok', now)
+            elif self.breaker and probe:
+                # The probe gave no answer; count it as failed, or nobody else is ever let through
+                self.breaker.record(False, now)
+            self._released.notify_all()
+            for waiter in self._async_waiters:
+                waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+            self._async_waiters.clear()
+
+    def stats(self) -> dict:
+        """Request outcomes and goodput (successful requests per second)"""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._started
+            return {
+                'requests': self.requests,
+                'succeeded': self.succeeded,
+                'failed': self.failed,
+                'throttled': self.throttled,
+                'retries': self.retries,
+                'gave_up': self.gave_up,
+                'breaker_trips': self.breaker.trips if self.breaker else 0,
+                'paused_seconds': self.breaker.paused_seconds(now) if self.breaker else 0.0,
+                'limit': self.limit.allowed if self.adaptive else self.limit.max_limit,
+                'lowest_limit': int(self.limit.lowest) if self.adaptive else self.limit.max_limit,
+                'elapsed': elapsed,
+                'goodput': self.succeeded / elapsed if elapsed else 0.0,
+                'success_ratio': self.succeeded / self.requests if self.requests else 1.0,
+            }
+
+
+def _request_error(error):
+    """error as the sr.RequestError the pipeline handles"""
+    if isinstance(error, sr.RequestError):
+        return error
+    wrapped = sr.RequestError(f"recognition connection failed: {error or type(error).__name__}")
+    wrapped.__cause__ = error
+    return wrapped
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
@@ -0,0 +1,308 @@
+"""Asyncio client for Google Web Speech over pooled keep-alive connections.
+
+recognize_google sends every chunk with urllib, which opens a new TCP (and,
+for HTTPS, TLS) connection per request and blocks a thread until the answer
+arrives. AsyncSpeechClient sends the same requests over HTTP/1.1 on asyncio
+streams and keeps each connection open for the next request, so all chunks of
+a video share at most max_in_flight connections. Requests are built and
+answers parsed with SpeechRecognition's own Google helpers, so both paths send
+the same bytes and read the same transcript.
+
+StubSpeechServer is a local stand-in for the endpoint that answers in the
+same line-delimited JSON format, for tests and benchmarks without network
+access (see bench_speech_client.py).
+"""
+import asyncio
+import hashlib
+import json
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import speech_recognition as sr
+from speech_recognition.recognizers.google import ENDPOINT, OutputParser, create_request_builder
+
+DEFAULT_MAX_IN_FLIGHT = 8
+# Seconds for one request, from sending the audio to the last byte of the answer
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_CONNECT_TIMEOUT = 10.0
+
+
+class _Connection:
+    """One HTTP/1.1 connection and the number of requests it has carried"""
+
+    __slots__ = ('reader', 'writer', 'requests')
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.requests = 0
+
+    def close(self):
+        self.writer.close()
+
+
+class ConnectionPool:
+    """Keep-alive HTTP/1.1 connections per host for one event loop.
+
+    At most max_connections requests are in flight; each holds one
+    connection, and finished connections wait for the next request instead of
+    being closed. A request on a reused connection that the server closed in
+    the meantime is retried once on a new connection.
+    """
+
+    def __init__(self, max_connections: int = DEFAULT_MAX_IN_FLIGHT,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT):
+        self.max_connections = max(1, int(max_connections))
+        self.connect_timeout = connect_timeout
+        self._slots = asyncio.Semaphore(self.max_connections)
+        self._idle = {}
+        self._ssl = None
+        self.opened = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def request(self, method: str, url: str, body: bytes = b'', headers=None, timeout=None):
+        """Send one request; returns (status, reason, headers, body) with lower-case header names"""
+        parts = urlsplit(url)
+        https = parts.scheme == 'https'
+        port = parts.port or (443 if https else 80)
+        key = (https, parts.hostname, port)
+        target = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        host = parts.hostname if parts.port is None else f"{parts.hostname}:{port}"
+        head = [f"{method} {target} HTTP/1.1", f"Host: {host}", f"Content-Length: {len(body)}"]
+        head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        message = ("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + body
+
+        async with self._slots:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                for attempt in range(2):
+                    connection = self._idle_connection(key) or await self._connect(key)
+                    reused = connection.requests > 0
+                    try:
+                        response = await asyncio.wait_for(self._exchange(connection, message), timeout)
+                    except (ConnectionError, asyncio.IncompleteReadError):
+                        connection.close()
+                        if reused and attempt == 0:
+                            # Keep-alive connection closed by the server while idle
+                            continue
+                        raise
+                    except BaseException:
+                        connection.close()
+                        raise
+                    status, reason, response_headers, response_body, keep_alive = response
+                    self.requests += 1
+                    if keep_alive:
+                        self._idle.setdefault(key, []).append(connection)
+                    else:
+                        connection.close()
+                    return status, reason, response_headers, response_body
+            finally:
+                self.in_flight -= 1
+
+    def _idle_connection(self, key):
+        idle = self._idle.get(key)
+        while idle:
+            connection = idle.pop()
+            if not connection.reader.at_eof() and not connection.writer.is_closing():
+                return connection
+            connection.close()
+        return None
+
+    async def _connect(self, key):
+        https, host, port = key
+        if https and self._ssl is None:
+            self._ssl = ssl.create_default_context()
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=self._ssl if https else None), self.connect_timeout)
+        self.opened += 1
+        return _Connection(reader, writer)
+
+    async def _exchange(self, connection, message):
+        connection.writer.write(message)
+        await connection.writer.drain()
+        connection.requests += 1
+        reader = connection.reader
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed before the response")
+        version, status, *reason = status_line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n'):
+                break
+            if not line:
+                raise asyncio.IncompleteReadError(b'', None)
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            parts = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    # Trailer headers end with an empty line
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                parts.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b''.join(parts)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        return int(status), reason[0] if reason else '', headers, body, keep_alive
+
+    async def aclose(self):
+        """Close all idle connections"""
+        for connections in self._idle.values():
+            for connection in connections:
+                connection.close()
+        self._idle.clear()
+
+
+class AsyncSpeechClient:
+    """Google Web Speech requests on a ConnectionPool.
+
+    max_in_flight bounds concurrent requests (and open connections); timeout
+    bounds each request and connect_timeout each new connection, in seconds.
+    Raises sr.RequestError and sr.UnknownValueError like recognize_google.
+    """
+
+    def __init__(self, endpoint: str = ENDPOINT, key=None, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 timeout: float = DEFAULT_TIMEOUT, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT):
+        self.endpoint = endpoint
+        self.key = key
+        self.timeout = timeout
+        self.pool = ConnectionPool(max_in_flight, connect_timeout)
+        self._parser = OutputParser(show_all=False, with_confidence=False)
+        self.failures = 0
+
+    async def recognize(self, audio_data, language: str = 'en-US') -> str:
+        builder = create_request_builder(endpoint=self.endpoint, key=self.key, language=language)
+        # Pre-encoded chunks (flac_encoder.EncodedAudioData) return at once;
+        # anything else runs the flac encoder, off the event loop
+        data = await asyncio.to_thread(builder.build_data, audio_data)
+        try:
+            status, reason, _, body = await self.pool.request(
+                'POST', builder.build_url(), data, builder.build_headers(audio_data), self.timeout)
+        except asyncio.TimeoutError:
+            self.failures += 1
+            raise sr.RequestError("recognition connection failed: timed out") from None
+        except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+            self.failures += 1
+            raise sr.RequestError(f"recognition connection failed: {e}") from e
+        if status != 200:
+            self.failures += 1
+            error = sr.RequestError(f"recognition request failed: {reason}")
+            # Lets callers tell throttling (429) from other failures
+            error.status = status
+            raise error
+        return self._parser.parse(body.decode('utf-8'))
+
+    def stats(self) -> dict:
+        """Requests sent, connections opened and the most requests in flight at once"""
+        return {
+            'requests': self.pool.requests,
+            'connections': self.pool.opened,
+            'failures': self.failures,
+            'max_in_flight': self.pool.max_in_flight,
+        }
+
+    async def aclose(self):
+        await self.pool.aclose()
+
+
+class _StubSpeechHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; with Nagle's algorithm a kept-alive
+    # connection would wait for the client's delayed ACK in between
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        # Stand-in for the TCP and TLS handshakes of a new connection
+        time.sleep(self.server.handshake)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        language = parse_qs(urlsplit(self.path).query).get('lang', [''])[0]
+        time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.requests += 1
+        # Google answers with one JSON object per line; the first is often empty
+        lines = ['{"result":[]}']
+        if language == self.server.spoken_language and body:
+            transcript = f"stub-{hashlib.blake2b(body, digest_size=4).hexdigest()}"
+            lines.append(json.dumps({'result': [{'alternative': [{'transcript': transcript, 'confidence': 0.9}],
+                                                 'final': True}], 'result_index': 0}))
+        answer = ("\n".join(lines) + "\n").encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(answer)))
+        self.end_headers()
+        self.wfile.write(answer)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for every connection of a burst of parallel uncached requests
+    request_queue_size = 256
+
+
+class StubSpeechServer:
+    """Local HTTP stand-in for the Google Web Speech endpoint.
+
+    Answers every request after latency seconds in the endpoint's response
+    format; only spoken_language is understood, with a transcript derived
+    from the uploaded audio. Every new connection first waits handshake
+    seconds, standing in for the round trips of TCP and TLS setup. Keeps
+    connections alive like the real service and counts connections and
+    requests. Use url as the client's endpoint.
+    """
+
+    def __init__(self, latency: float = 0.05, spoken_language: str = 'fa-IR', handshake: float = 0.0,
+                 host: str = '127.0.0.1'):
+        self._server = _StubHTTPServer((host, 0), _StubSpeechHandler)
+        self._server.latency = latency
+        self._server.spoken_language = spoken_language
+        self._server.handshake = handshake
+        self._server.lock = threading.Lock()
+        self._server.connections = 0
+        self._server.requests = 0
+        self.url = f"http://{host}:{self._server.server_address[1]}/speech-api/v2/recognize"
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-speech-server",
+                                        daemon=True)
+        self._thread.start()
+
+    @property
+    def connections(self) -> int:
+        return self._server.connections
+
+    @property
+    def requests(self) -> int:
+        return self._server.requests
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
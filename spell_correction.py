@@ -0,0 +1,330 @@
+"""Dictionary-based spelling correction of Persian transcripts.
+
+Words missing from the lexicon are replaced by the most frequent lexicon word
+within a small Damerau-Levenshtein distance. Candidates come from a symmetric
+delete index (SymSpell): every lexicon word is indexed under each string made
+by deleting up to max_distance of its characters, so the words near a
+misspelling are exactly those that share one of its deletes, and a lookup is a
+few dozen binary searches instead of a scan of the lexicon.
+
+The index is built once and saved as one flat file of little-endian arrays
+that is memory-mapped when loaded: startup parses nothing, and processes
+using the same file share its pages. Build one from Hazm's word lists with
+
+    python spell_correction.py build spell_index.bin
+
+or from a file of "word [count]" lines with
+
+    python spell_correction.py build spell_index.bin words.txt
+"""
+import functools
+import zlib
+import os
+import re
+import struct
+import sys
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+MAGIC = b'SYMSPEL1'
+# magic, max_distance, prefix_length, word count, word bytes, key count
+_HEADER = struct.Struct('<8sBBxxIIQ4x')
+# A key packs the 38-bit hash of a delete, how many characters were deleted
+# (2 bits) and the 24-bit id of the word, so the keys of one delete sort
+# together, nearest words first
+_ID_BITS = 24
+_ID_MASK = (1 << _ID_BITS) - 1
+_DEPTH_SHIFT = _ID_BITS
+_HASH_SHIFT = _ID_BITS + 2
+MAX_WORDS = _ID_MASK + 1
+MAX_DISTANCE = 3
+WORD_CACHE_SIZE = 100_000
+
+_LETTERS = 'ء-يپچژکگی'
+# Persian words, including ones joined by ZWNJ; digits and punctuation are left out
+_WORD_RE = re.compile(f'[{_LETTERS}]+(?:‌[{_LETTERS}]+)*')
+# Plural, ezafe and pronoun endings (formal and spoken) a known word may carry
+_SUFFIXES = ('هایی', 'های', 'ها', 'تون', 'شون', 'مون', 'ای', 'رو', 'ی', 'ش', 'م', 'ت', 'ه', 'و')
+# Words repeated this often in one transcript are taken to be names or terms
+# the lexicon lacks rather than recognition errors
+MAX_REPEATS = 2
+
+
+def _hash(text: str) -> int:
+    # CRC-32 plus the length: collisions only cost a wasted candidate check
+    return zlib.crc32(text.encode('utf-8')) << 6 | min(len(text), 63)
+
+
+def _deletes(word: str, max_distance: int) -> set:
+    """word and every string made by deleting up to max_distance characters"""
+    deletes = frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        deletes = deletes | frontier
+    return deletes
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance (adjacent swaps count as one edit),
+    or max_distance + 1 as soon as it is certain to exceed max_distance"""
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    # A common prefix or suffix does not change the distance
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if not a or not b:
+        return min(len(a) + len(b), max_distance + 1)
+    before = None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] * (len(b) + 1)
+        for j, cb in enumerate(b, 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                value = min(value, before[j - 2] + 1)
+            current[j] = value
+        if min(current) > max_distance:
+            return max_distance + 1
+        before, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+def build_index(words: Union[Dict[str, int], Iterable[Tuple[str, int]]], path: str,
+                max_distance: int = 2, prefix_length: int = 7, known_words: Iterable[str] = ()) -> int:
+    """Write the symmetric delete index of a lexicon to path; returns the word count.
+
+    words maps each word to its frequency (counts of repeated words are
+    added up). known_words are accepted as correct but never suggested, e.g.
+    verb conjugations. Only the first prefix_length characters of a word are
+    indexed, which bounds the deletes of long words.
+    """
+    if not 0 <= max_distance <= MAX_DISTANCE:
+        raise ValueError(f"max_distance must be between 0 and {MAX_DISTANCE}")
+    counts = {}
+    for word, count in (words.items() if isinstance(words, dict) else words):
+        if word and not any(c.isspace() for c in word):
+            counts[word] = counts.get(word, 0) + max(1, int(count))
+    for word in known_words:
+        if word and not any(c.isspace() for c in word):
+            counts.setdefault(word, 0)
+    # Most frequent first, so ties on frequency keep a stable order
+    vocabulary = sorted(counts, key=lambda word: (-counts[word], word))
+    if len(vocabulary) > MAX_WORDS:
+        raise ValueError(f"Spell index holds at most {MAX_WORDS:,} words, got {len(vocabulary):,}")
+
+    def keys():
+        for word_id, word in enumerate(vocabulary):
+            prefix = word[:prefix_length]
+            # Known words only need the key that finds them exactly
+            deletes = _deletes(prefix, max_distance) if counts[word] else (prefix,)
+            for delete in deletes:
+                yield _hash(delete) << _HASH_SHIFT | (len(prefix) - len(delete)) << _DEPTH_SHIFT | word_id
+
+    key_array = np.fromiter(keys(), dtype='<u8')
+    key_array.sort()
+    encoded = [word.encode('utf-8') for word in vocabulary]
+    lengths = np.array([min(len(word), 255) for word in vocabulary], dtype='<u1')
+    offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+    np.cumsum([len(word) for word in encoded], out=offsets[1:])
+    frequencies = np.array([counts[word] for word in vocabulary], dtype='<u8')
+
+    # Write under a temporary name first so a running process never maps half a file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, max_distance, prefix_length, len(vocabulary),
+                             int(offsets[-1]), len(key_array)))
+        f.write(key_array.tobytes())
+        f.write(frequencies.tobytes())
+        f.write(offsets.tobytes())
+        f.write(lengths.tobytes())
+        f.write(b''.join(encoded))
+    os.replace(tmp_path, path)
+    return len(vocabulary)
+
+
+def hazm_lexicon() -> Tuple[Dict[str, int], set]:
+    """(word frequencies, other known words) from the lists shipped with Hazm.
+    The known words are formal and spoken verb conjugations and spoken word
+    forms, which transcripts are full of."""
+    from hazm import InformalLemmatizer
+    from hazm.utils import words_list
+    frequencies = {}
+    for word, count, _ in words_list():
+        frequencies[word] = frequencies.get(word, 0) + count
+    lemmatizer = InformalLemmatizer()
+    return frequencies, set(lemmatizer.verbs) | set(lemmatizer.words)
+
+
+def build_hazm_index(path: str, max_distance: int = 2, prefix_length: int = 7) -> int:
+    frequencies, verbs = hazm_lexicon()
+    return build_index(frequencies, path, max_distance, prefix_length, known_words=verbs)
+
+
+class SpellIndex:
+    """Memory-mapped symmetric delete index written by build_index"""
+
+    def __init__(self, path: str, word_cache_size: int = WORD_CACHE_SIZE):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size or header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a spell index: {path}")
+        _, self.max_distance, self.prefix_length, words, word_bytes, keys = _HEADER.unpack(header)
+        # Plain ndarray views index faster than the memmap subclass
+        data = np.asarray(np.memmap(path, dtype=np.uint8, mode='r'))
+        start = _HEADER.size
+        self._keys = data[start:start + 8 * keys].view('<u8')
+        start += 8 * keys
+        self._counts = data[start:start + 8 * words].view('<u8')
+        start += 8 * words
+        self._offsets = data[start:start + 4 * (words + 1)].view('<u4')
+        start += 4 * (words + 1)
+        self._lengths = data[start:start + words]
+        start += words
+        self._words = data[start:start + word_bytes]
+        self._data = data
+        self.correct_word = functools.lru_cache(maxsize=word_cache_size)(self._correct_word)
+
+    def __len__(self):
+        return len(self._counts)
+
+    def __contains__(self, word):
+        return self.lookup(word, max_distance=0) is not None
+
+    def word(self, word_id: int) -> str:
+        start, end = self._offsets[word_id], self._offsets[word_id + 1]
+        return self._words[start:end].tobytes().decode('utf-8')
+
+    def _candidates(self, word, max_distance, depth=None):
+        """Ids of the words that share a delete of word's prefix, deleting at
+        most depth characters of their own, and whose length is within
+        max_distance of word's; most frequent first"""
+        depth = max_distance if depth is None else depth
+        prefix = word[:self.prefix_length]
+        hashes = np.array([_hash(d) << _HASH_SHIFT for d in _deletes(prefix, depth)], dtype='<u8')
+        starts = np.searchsorted(self._keys, hashes)
+        ends = np.searchsorted(self._keys, hashes | np.uint64(depth << _DEPTH_SHIFT | _ID_MASK), side='right')
+        found = [self._keys[start:end] for start, end in zip(starts, ends) if end > start]
+        if not found:
+            return []
+        ids = np.unique(np.concatenate(found) & np.uint64(_ID_MASK))
+        ids = ids[np.abs(self._lengths[ids].astype(np.int64) - len(word)) <= max_distance]
+        # Ids are assigned in order of decreasing frequency
+        return ids.tolist()
+
+    def lookup(self, word: str, max_distance: Optional[int] = None) -> Optional[Tuple[str, int, int]]:
+        """Closest lexicon word as (word, distance, frequency), or None.
+
+        Among words at the smallest distance the most frequent one wins. A
+        known word that is never suggested is returned with frequency 0 when
+        it matches exactly.
+        """
+        if max_distance is None or max_distance > self.max_distance:
+            max_distance = self.max_distance
+        for word_id in self._candidates(word, 0):
+            if self.word(word_id) == word:
+                return word, 0, int(self._counts[word_id])
+        # One edit at a time: the first tier with a match holds the closest
+        # words, and candidates come most frequent first
+        for distance in range(1, max_distance + 1):
+            for word_id in self._candidates(word, distance):
+                count = int(self._counts[word_id])
+                if not count:
+                    break
+                candidate = self.word(word_id)
+                if edit_distance(word, candidate, distance) <= distance:
+                    return candidate, distance, count
+        return None
+
+    def known_form(self, word: str) -> Optional[str]:
+        """word if the lexicon accepts it, with or without one of the usual
+        endings; the ZWNJ-joined form of a می/نمی verb written without it;
+        otherwise None"""
+        if word in self:
+            return word
+        for prefix in ('نمی', 'می'):
+            if word.startswith(prefix) and not word.startswith(prefix + '\u200c'):
+                joined = f"{prefix}\u200c{word[len(prefix):]}"
+                if joined in self:
+                    return joined
+        for suffix in _SUFFIXES:
+            stem = word[:-len(suffix)].rstrip('\u200c')
+            if word.endswith(suffix) and len(stem) >= 2 and stem in self:
+                return word
+        return None
+
+    def _correct_word(self, word: str) -> str:
+        known = self.known_form(word)
+        if known:
+            return known
+        # Short words are too ambiguous: none below 4 letters, one edit up to 6
+        max_distance = min(self.max_distance, (len(word) - 1) // 3)
+        if max_distance < 1:
+            return word
+        match = self.lookup(word, max_distance)
+        return match[0] if match else word
+
+    def correct_text(self, text: str, keep: Optional[set] = None) -> str:
+        """Replace every Persian word missing from the lexicon by its closest word.
+
+        Words in keep are left alone; by default those are the words repeated
+        more than MAX_REPEATS times in text (see repeated_words).
+        """
+        if keep is None:
+            keep = repeated_words(text)
+        return _WORD_RE.sub(lambda m: m.group() if m.group() in keep else self.correct_word(m.group()), text)
+
+    def cache_stats(self) -> dict:
+        info = self.correct_word.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize,
+            'max_size': info.maxsize,
+            'hit_rate': info.hits / lookups if lookups else 0.0,
+        }
+
+
+def repeated_words(text: str, max_repeats: int = MAX_REPEATS) -> set:
+    """Persian words occurring more than max_repeats times in text"""
+    counts = Counter(_WORD_RE.findall(text))
+    return {word for word, count in counts.items() if count > max_repeats}
+
+
+def load_or_build_index(path: str) -> SpellIndex:
+    """SpellIndex at path, built from Hazm's word lists first if it does not exist"""
+    if not os.path.exists(path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        build_hazm_index(path)
+    return SpellIndex(path)
+
+
+def _read_word_file(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if parts:
+                yield parts[0], int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 1
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != 'build':
+        print("Usage: python spell_correction.py build <index file> [words.txt]")
+        sys.exit(1)
+    if len(sys.argv) > 3:
+        count = build_index(_read_word_file(sys.argv[3]), sys.argv[2])
+    else:
+        count = build_hazm_index(sys.argv[2])
+    print(f"✅ نمایه املایی با {count:,} واژه در {sys.argv[2]} ساخته شد")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for incremental re-normalization of the saved transcript archive
+تست نرمال‌سازی دوباره و افزایشی آرشیو رونوشت‌ها
+"""
+
+import glob
+import json
+import os
+import shutil
+
+import archive_renormalizer
+from archive_renormalizer import renormalize_archive
+from persian_text_normalizer import process_text
+from recognizer_backends import StubBackend
+from working_youtube_to_text import WorkingYouTubeToText
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def copy_archive(tmp_path):
+    os.makedirs(tmp_path, exist_ok=True)
+    for path in glob.glob(os.path.join(HERE, 'output', '*.*')):
+        shutil.copy(path, tmp_path)
+    return str(tmp_path)
+
+
+def snapshot(directory):
+    return {os.path.basename(p): open(p, 'rb').read() for p in sorted(glob.glob(os.path.join(directory, '*')))}
+
+
+def test_renormalizes_transcripts_then_skips_unchanged(tmp_path, monkeypatch):
+    archive = copy_archive(tmp_path)
+    transcripts = len(archive_renormalizer.find_transcripts(archive))
+    assert transcripts >= 2
+    with open(os.path.join(archive, 'requirements.txt'), 'rb') as f:
+        unrelated = f.read()
+
+    # The sample archive predates raw_transcript: left alone unless asked for
+    original = snapshot(archive)
+    untouched = renormalize_archive(archive, workers=1)
+    assert untouched['renormalized'] == 0 and untouched['without_raw'] == transcripts
+    assert snapshot(archive) == original
+
+    first = renormalize_archive(archive, workers=1, include_without_raw=True)
+    assert first['renormalized'] == transcripts and first['skipped'] == 0
+    for json_path, txt_path in archive_renormalizer.find_transcripts(archive):
+        with open(json_path, encoding='utf-8') as f:
+            data = json.load(f)
+        assert data['sentences'] == process_text(data['transcript'])['clean_sentences']
+        with open(txt_path, encoding='utf-8') as f:
+            assert f.read() == '\n'.join(data['sentences'])
+    with open(os.path.join(archive, 'requirements.txt'), 'rb') as f:
+        assert f.read() == unrelated
+
+    written = snapshot(archive)
+    second = renormalize_archive(archive, workers=1, include_without_raw=True)
+    assert second['renormalized'] == 0 and second['skipped'] == transcripts
+    assert snapshot(archive) == written
+    assert not glob.glob(os.path.join(archive, '*.tmp'))
+
+    # An edited file is processed again, and so is everything after a rule change
+    txt_path = archive_renormalizer.find_transcripts(archive)[0][1]
+    with open(txt_path, 'a', encoding='utf-8') as f:
+        f.write('\nویرایش دستی')
+    assert renormalize_archive(archive, workers=1, include_without_raw=True)['renormalized'] == 1
+    monkeypatch.setattr(archive_renormalizer, 'rules_version', lambda profile: 'changed')
+    assert renormalize_archive(archive, workers=1, include_without_raw=True)['renormalized'] == transcripts
+
+
+def test_process_pool_writes_the_same_files(tmp_path):
+    sequential = copy_archive(tmp_path / 'sequential')
+    pooled = copy_archive(tmp_path / 'pooled')
+    renormalize_archive(sequential, workers=1, include_without_raw=True)
+    stats = renormalize_archive(pooled, workers=2, force=True, include_without_raw=True)
+    assert stats['chars_per_sec'] > 0 and stats['files_per_sec'] > 0
+    assert snapshot(sequential) == snapshot(pooled)
+
+
+def test_renormalizes_from_the_raw_transcript(tmp_path):
+    # A long sentence is split at its comma, which the stored, comma-free text no longer has
+    raw = f"{' '.join(['کلمه'] * 30)}، {' '.join(['واژه'] * 30)}. این جمله کوتاه پایانی است"
+    converter = WorkingYouTubeToText(backend=StubBackend(), chunk_cache=False, audio_cache=False)
+    converter.output_dir = str(tmp_path)
+    text_file, json_file = converter._write_transcript('abc', 'https://youtu.be/abc', 'lecture', raw)
+    with open(json_file, encoding='utf-8') as f:
+        data = json.load(f)
+    assert data['raw_transcript'] == raw
+    assert process_text(data['transcript'])['clean_sentences'] != data['sentences']
+    written = {path: open(path, 'rb').read() for path in (text_file, json_file)}
+
+    # Renormalizing gives exactly what the fresh run wrote
+    stats = renormalize_archive(str(tmp_path), workers=1)
+    assert stats['renormalized'] == 1 and stats['changed'] == 0 and stats['without_raw'] == 0
+    assert {path: open(path, 'rb').read() for path in written} == written
+
+    # Older transcripts without the raw text are reported and left alone
+    del data['raw_transcript']
+    with open(json_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    legacy = {path: open(path, 'rb').read() for path in written}
+    stats = renormalize_archive(str(tmp_path), workers=1)
+    assert stats['without_raw'] == 1 and stats['renormalized'] == stats['changed'] == 0
+    assert {path: open(path, 'rb').read() for path in written} == legacy
+    # unless they are explicitly rewritten from their normalized text
+    stats = renormalize_archive(str(tmp_path), workers=1, include_without_raw=True)
+    assert stats['without_raw'] == 1 and stats['renormalized'] == stats['changed'] == 1
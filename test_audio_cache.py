@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the downloaded-audio cache
+تست حافظه نهان فایل‌های صوتی دانلود شده
+"""
+
+import os
+import time
+
+from audio_cache import AudioCache, cache_key
+
+
+def add_entry(cache, tmp_path, video_id, size):
+    path = os.path.join(tmp_path, f'{video_id}.wav')
+    with open(path, 'wb') as f:
+        f.write(b'\0' * size)
+    return cache.store(video_id, None, path, {'id': video_id, 'title': video_id, 'formats': [1, 2]})
+
+
+def test_store_and_lookup(tmp_path):
+    cache = AudioCache(os.path.join(tmp_path, 'cache'))
+    cached_path = add_entry(cache, tmp_path, 'abc', 100)
+
+    audio_path, info = cache.lookup('abc')
+    assert audio_path == cached_path and cache.contains(audio_path)
+    assert info == {'id': 'abc', 'title': 'abc'}
+    assert cache.lookup('abc', 5) is None
+    assert cache_key('abc', 5) != cache_key('abc', None)
+
+
+def test_lru_cap_evicts_least_recently_used(tmp_path):
+    cache = AudioCache(os.path.join(tmp_path, 'cache'), max_bytes=2500)
+    add_entry(cache, tmp_path, 'old', 1000)
+    time.sleep(0.01)
+    add_entry(cache, tmp_path, 'used', 1000)
+    time.sleep(0.01)
+    cache.lookup('old')  # touch: now most recently used
+    time.sleep(0.01)
+    add_entry(cache, tmp_path, 'new', 1000)
+
+    assert cache.lookup('used') is None
+    assert cache.lookup('old') is not None and cache.lookup('new') is not None
+
+
+def test_purge_removes_everything(tmp_path):
+    cache = AudioCache(os.path.join(tmp_path, 'cache'))
+    add_entry(cache, tmp_path, 'a', 10)
+    add_entry(cache, tmp_path, 'b', 10)
+
+    removed, freed = cache.purge()
+    assert removed == 2 and freed >= 20
+    assert cache.size_bytes() == 0
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for silence-aware (VAD) chunk planning on synthetic audio
+تست تقسیم‌بندی صوت بر اساس سکوت با صدای مصنوعی
+"""
+
+import numpy as np
+
+from audio_segmenter import FRAME_MS, MAX_CHUNK_MS, StreamingChunker, frame_energies, plan_chunks
+
+SAMPLE_RATE = 16000
+
+
+def synthesize(layout, seed=0):
+    """Build 16-bit PCM from (kind, seconds) pairs; returns (pcm, pause spans in ms)"""
+    rng = np.random.default_rng(seed)
+    parts, pauses, position = [], [], 0
+    for kind, seconds in layout:
+        n = int(seconds * SAMPLE_RATE)
+        if kind == 'speech':
+            t = np.arange(n) / SAMPLE_RATE
+            envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)  # ~4 syllables per second
+            parts.append(rng.normal(0, 0.25, n) * envelope)
+        else:
+            parts.append(rng.normal(0, 0.0003, n))
+            pauses.append((position, position + int(seconds * 1000)))
+        position += int(seconds * 1000)
+    samples = np.clip(np.concatenate(parts), -1, 1)
+    return (samples * 32767).astype(np.int16).tobytes(), pauses
+
+
+def plan(layout):
+    pcm, pauses = synthesize(layout)
+    duration_ms = len(pcm) // 2 * 1000 // SAMPLE_RATE
+    return plan_chunks(frame_energies(pcm), duration_ms=duration_ms), pauses
+
+
+def test_cuts_fall_inside_pauses():
+    """Boundaries between speech chunks land in the known pauses"""
+    chunks, pauses = plan([('speech', 40), ('pause', 1), ('speech', 30), ('pause', 1), ('speech', 40)])
+
+    assert [c.has_speech for c in chunks] == [True, True, True]
+    for previous, following in zip(chunks, chunks[1:]):
+        assert any(start <= previous.end_ms and following.start_ms <= end for start, end in pauses)
+    assert all(c.end_ms - c.start_ms <= MAX_CHUNK_MS for c in chunks)
+
+
+def test_silence_is_skipped_and_speech_trimmed():
+    """Long silent stretches become chunks without speech"""
+    chunks, _ = plan([('speech', 10), ('pause', 120), ('speech', 10)])
+
+    speech = [c for c in chunks if c.has_speech]
+    assert len(speech) == 2
+    assert any(not c.has_speech for c in chunks)
+    assert sum(c.end_ms - c.start_ms for c in speech) < 25_000
+
+
+def test_short_voiced_regions_are_merged():
+    """Many short utterances are merged into one request-sized chunk"""
+    chunks, _ = plan([('speech', 3), ('pause', 0.5)] * 10)
+
+    assert len(chunks) == 1 and chunks[0].has_speech
+
+
+def test_all_silence_has_no_speech():
+    chunks, _ = plan([('pause', 90)])
+
+    assert chunks and not any(c.has_speech for c in chunks)
+
+
+def test_frame_energies_counts_partial_frame():
+    frame_len = SAMPLE_RATE * FRAME_MS // 1000
+    energies = frame_energies(np.full(frame_len * 2 + 10, 1000, dtype=np.int16).tobytes())
+
+    assert len(energies) == 3
+    assert np.allclose(energies, energies[0])
+
+
+def test_streaming_chunker_emits_before_end_of_stream():
+    """Chunks come out while audio is still arriving, cut at pauses, with absolute offsets"""
+    layout = [('speech', 40), ('pause', 1), ('speech', 30), ('pause', 1)] * 3
+    pcm, pauses = synthesize(layout)
+    chunker = StreamingChunker()
+    block = SAMPLE_RATE * 2  # one second per feed
+    emitted = []
+    for offset in range(0, len(pcm), block):
+        emitted += [(offset, chunk) for chunk, _ in chunker.feed(pcm[offset:offset + block])]
+    first_seen = emitted[0][0]
+    chunks = [chunk for _, chunk in emitted] + [chunk for chunk, _ in chunker.flush()]
+
+    assert first_seen < len(pcm) // 2
+    assert all(c.has_speech and c.end_ms - c.start_ms <= MAX_CHUNK_MS for c in chunks)
+    assert chunks[-1].end_ms > 200_000
+    for previous, following in zip(chunks, chunks[1:]):
+        assert previous.end_ms <= following.start_ms
+        assert any(start <= previous.end_ms and following.start_ms <= end for start, end in pauses)
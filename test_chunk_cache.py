@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the persistent per-chunk result cache
+تست حافظه نهان نتایج قطعه‌های صوتی
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from chunk_cache import ChunkResultCache, audio_fingerprint
+
+
+def test_roundtrip_and_language_key(tmp_path):
+    cache = ChunkResultCache(os.path.join(tmp_path, 'cache.sqlite3'))
+    cache.put('abc', 0, 55_000, 'fallback:fa-IR,en-US', 'سلام', 'fa-IR')
+
+    assert cache.get('abc', 0, 55_000, 'fallback:fa-IR,en-US') == ('سلام', 'fa-IR')
+    assert cache.get('abc', 0, 55_000, 'probe:fa-IR,en-US') is None
+    assert cache.get('abc', 0, 50_000, 'fallback:fa-IR,en-US') is None
+
+
+def test_lru_eviction_keeps_recent_results(tmp_path):
+    cache = ChunkResultCache(os.path.join(tmp_path, 'cache.sqlite3'), max_bytes=4096)
+    for i in range(40):
+        cache.put('abc', i, i + 1, 'k', 'x' * 100, 'fa-IR')
+        cache.get('abc', 0, 1, 'k')  # keep the first chunk hot
+
+    assert cache.size_bytes() <= 4096
+    assert cache.get('abc', 0, 1, 'k') is not None
+    assert cache.get('abc', 1, 2, 'k') is None
+    assert cache.get('abc', 39, 40, 'k') is not None
+
+
+def _write_results(args):
+    path, worker = args
+    cache = ChunkResultCache(path)
+    for i in range(50):
+        cache.put(f'audio{worker}', i, i + 1, 'k', f'{worker}-{i}', None)
+    cache.close()
+    return worker
+
+
+def test_concurrent_processes_share_cache(tmp_path):
+    path = os.path.join(tmp_path, 'cache.sqlite3')
+    ChunkResultCache(path).close()
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(_write_results, [(path, w) for w in range(4)]))
+
+    cache = ChunkResultCache(path)
+    assert all(cache.get(f'audio{w}', 49, 50, 'k') == (f'{w}-49', None) for w in range(4))
+
+
+def test_fingerprint_depends_on_format():
+    pcm = b'\x01\x02' * 100
+    assert audio_fingerprint(pcm, 16000, 2) != audio_fingerprint(pcm, 8000, 2)
+    assert audio_fingerprint(pcm, 16000, 2) == audio_fingerprint(bytearray(pcm), 16000, 2)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for FLAC payload profiles and the pre-encoding pool
+تست پروفایل‌های FLAC و پیش‌رمزگذاری قطعه‌ها
+"""
+
+import os
+import subprocess
+import wave
+
+import numpy as np
+import pytest
+import speech_recognition as sr
+
+from flac_encoder import PAYLOAD_PROFILES, EncodedAudioData, FlacEncoderPool, encode_audio_data
+from recognizer_backends import GoogleBackend
+from working_youtube_to_text import WorkingYouTubeToText
+
+
+def speech_like(seconds, rate=16000, seed=0):
+    """Harmonic tone with a wandering pitch, pauses and a little noise"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * rate)) / rate
+    phase = 2 * np.pi * np.cumsum(140 + 40 * np.sin(2 * np.pi * 0.3 * t)) / rate
+    x = sum(np.sin(h * phase) / h for h in range(1, 12)) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    x = x * 0.2 + rng.normal(0, 0.005, len(t))
+    return (np.clip(x, -1, 1) * 32767).astype('<i2').tobytes()
+
+
+def flac_decode(flac_data):
+    """PCM decoded by the flac binary bundled with SpeechRecognition"""
+    try:
+        converter = sr.audio.get_flac_converter()
+    except OSError:
+        pytest.skip("no flac binary available")
+    result = subprocess.run([converter, '-d', '-c', '-s', '--force-raw-format', '--endian=little',
+                             '--sign=signed', '-'], input=flac_data, capture_output=True, check=True)
+    return result.stdout
+
+
+def test_profiles_shrink_the_payload_and_decode_to_their_pcm():
+    audio = sr.AudioData(speech_like(5), 16000, 2)
+    sizes = {}
+    for name, profile in PAYLOAD_PROFILES.items():
+        encoded = encode_audio_data(audio, name)
+        assert encoded.sample_rate == profile.sample_rate
+        assert flac_decode(encoded.flac_data) == encoded.get_raw_data()
+        sizes[name] = len(encoded.flac_data)
+    assert sizes['minimal'] < sizes['compact'] < sizes['lossless']
+    assert sizes['narrowband'] < sizes['lossless']
+    # lossless decodes to the PCM recognize_google would have sent
+    assert flac_decode(encode_audio_data(audio).flac_data) == audio.get_raw_data()
+
+
+def test_encoding_and_sending_start_no_flac_process(monkeypatch):
+    pytest.importorskip('soundfile')
+
+    def no_converter():
+        raise AssertionError("flac process started")
+    monkeypatch.setattr(sr.audio, 'get_flac_converter', no_converter)
+    # libFLAC runs in-process
+    encoded = encode_audio_data(sr.AudioData(speech_like(1), 16000, 2))
+    # The call recognize_google makes for 8 kHz and above
+    assert encoded.get_flac_data(convert_rate=None, convert_width=2) is encoded.flac_data
+    with pytest.raises(AssertionError):
+        encoded.get_flac_data(convert_rate=8000)
+
+
+def test_prefetch_encodes_ahead_and_records_every_chunk():
+    pcm = speech_like(4)
+    chunks = [pcm[i * 16000:(i + 1) * 16000] for i in range(8)]
+    made = []
+
+    def make_audio(i):
+        made.append(i)
+        return sr.AudioData(chunks[i], 16000, 2)
+
+    with FlacEncoderPool('compact', workers=2) as pool:
+        prefetch = pool.prefetch(make_audio, len(chunks), lookahead=2)
+        first = prefetch.get(0)
+        assert isinstance(first, EncodedAudioData) and max(made) <= 2
+        prefetch.skip(1)
+        assert [len(prefetch.get(i).flac_data) > 0 for i in range(2, 8)] == [True] * 6
+        prefetch.close()
+    stats = pool.stats()
+    assert stats['profile'] == 'compact'
+    assert {r['index'] for r in stats['per_chunk']} >= {0, 2, 3, 4, 5, 6, 7}
+    assert 0 < stats['payload_bytes'] < stats['pcm_bytes'] and stats['encode_seconds'] > 0
+
+
+class FlacRecognizer:
+    """recognize_google stand-in that checks what would be uploaded"""
+
+    def __init__(self):
+        self.payloads = []
+
+    def recognize_google(self, audio_data, language='en-US'):
+        self.payloads.append((type(audio_data), audio_data.sample_rate,
+                              audio_data.get_flac_data(convert_rate=None, convert_width=2)))
+        if language == 'fa-IR':
+            raise sr.UnknownValueError()
+        return f"{len(self.payloads)}"
+
+
+def test_transcriber_sends_pre_encoded_chunks(tmp_path):
+    wav_path = os.path.join(tmp_path, 'speech.wav')
+    with wave.open(wav_path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(speech_like(120))
+    recognizer = FlacRecognizer()
+    converter = WorkingYouTubeToText(max_workers=2, backend=GoogleBackend(recognizer), chunking='fixed',
+                                     chunk_cache=False, payload_profile='narrowband')
+
+    text, _ = converter.transcribe_audio_file(wav_path)
+
+    assert len(text.split()) == 3
+    # fa-IR and the en-US fallback share one encoding per chunk
+    assert len(recognizer.payloads) == 6
+    assert {(kind, rate) for kind, rate, _ in recognizer.payloads} == {(EncodedAudioData, 8000)}
+    stats = converter.last_encode_stats
+    assert stats['chunks'] == 3 and stats['payload_bytes'] == sum(len(p) for _, _, p in recognizer.payloads) // 2
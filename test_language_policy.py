@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for per-video language policies
+تست سیاست‌های انتخاب زبان برای هر ویدیو
+"""
+
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from language_policy import make_language_policy
+
+
+def make_recognizer(spoken):
+    """Stub: chunk i is only understood in the language spoken[i] (None = silence)"""
+    calls = []
+
+    def recognize(chunk, language):
+        calls.append((chunk, language))
+        return f"{language}:{chunk}" if spoken[chunk] == language else ""
+
+    return recognize, calls
+
+
+def run(policy_name, spoken):
+    policy = make_language_policy(policy_name)
+    recognize, calls = make_recognizer(spoken)
+    try:
+        results = [policy.recognize(recognize, chunk) for chunk in range(len(spoken))]
+    finally:
+        policy.close()
+    return results, calls, policy.stats()
+
+
+ENGLISH_LECTURE = ['en-US'] * 10
+
+
+def test_fallback_tries_persian_first():
+    results, calls, stats = run('fallback', ENGLISH_LECTURE)
+
+    assert [lang for _, lang in results] == ['en-US'] * 10
+    assert stats['requests'] == 20
+    assert stats['saved_requests'] == 0
+
+
+def test_probe_locks_onto_detected_language():
+    results, calls, stats = run('probe', ENGLISH_LECTURE)
+
+    assert [text for text, _ in results] == [f"en-US:{i}" for i in range(10)]
+    assert stats['requests'] == 11
+    assert stats['saved_requests'] == 9
+
+
+def test_probe_retries_until_speech_is_heard():
+    results, _, stats = run('probe', [None, None] + ENGLISH_LECTURE)
+
+    assert results[0] == ("", None)
+    assert stats['requests'] == 2 + 2 + 2 + 9
+
+
+def test_sticky_follows_recent_language():
+    spoken = ['fa-IR'] * 3 + ['en-US'] * 6 + ['fa-IR'] * 3
+    results, _, stats = run('sticky', spoken)
+
+    assert [lang for _, lang in results] == spoken
+    assert stats['requests'] < run('fallback', spoken)[2]['requests']
+
+
+def test_race_sends_all_languages():
+    results, calls, stats = run('race', ['fa-IR', 'en-US'])
+
+    assert [lang for _, lang in results] == ['fa-IR', 'en-US']
+    assert stats['requests'] == 4
+
+
+@pytest.mark.parametrize('name', ['fallback', 'probe', 'sticky', 'race'])
+def test_async_recognition_matches_threaded(name):
+    spoken = [None, 'fa-IR', 'en-US', 'en-US', None, 'fa-IR', 'en-US']
+    recognize, _ = make_recognizer(spoken)
+
+    async def recognize_async(chunk, language):
+        await asyncio.sleep(0.001 * (chunk % 3))
+        return recognize(chunk, language)
+
+    async def run_async():
+        policy = make_language_policy(name)
+        # Chunks overlap, like the transcriber's concurrent coroutines
+        results = await asyncio.gather(*(policy.recognize_async(recognize_async, chunk)
+                                         for chunk in range(len(spoken))))
+        policy.close()
+        return results, policy.stats()
+
+    results, stats = asyncio.run(run_async())
+    expected = run(name, spoken)
+    if name in ('fallback', 'race'):
+        assert results == expected[0] and stats == expected[2]
+    else:
+        # Order-dependent policies still hear every chunk they try
+        assert stats['chunks'] == len(spoken)
+        assert all(text.endswith(f":{chunk}") for chunk, (text, _) in enumerate(results) if text)
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        make_language_policy('guess')
+
+
+def test_race_pool_covers_every_chunk_in_flight():
+    max_workers = 3
+    policy = make_language_policy('race', max_workers=max_workers)
+    # Every language of every in-flight chunk must be running at once to pass the barrier
+    barrier = threading.Barrier(2 * max_workers, timeout=5)
+
+    def recognize(chunk, language):
+        barrier.wait()
+        return f"{language}:{chunk}" if language == 'fa-IR' else ""
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as chunks:
+            results = list(chunks.map(lambda chunk: policy.recognize(recognize, chunk), range(max_workers)))
+    finally:
+        policy.close()
+    assert [lang for _, lang in results] == ['fa-IR'] * max_workers
+
+
+def test_main_rejects_unknown_policy_before_running(monkeypatch, capsys):
+    import working_youtube_to_text
+
+    def no_converter(*args, **kwargs):
+        raise AssertionError("converter created")
+    monkeypatch.setattr(working_youtube_to_text, 'WorkingYouTubeToText', no_converter)
+    monkeypatch.setattr(sys, 'argv', ['working_youtube_to_text.py', 'https://youtu.be/abc',
+                                      '--language-policy', 'guess'])
+    working_youtube_to_text.main()
+    assert "Unknown language policy: 'guess'" in capsys.readouterr().out
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Conformance tests for the shared normalization rule registry
+تست انطباق قواعد مشترک نرمال‌سازی با رفتار دو نرمال‌ساز قبلی
+"""
+
+import pytest
+
+from normalization_rules import PROFILES, RULES, RulePipeline
+from persian_text_normalizer import PersianTextNormalizer
+from test_normalizer_differential import (INPUTS, reference_normalize, reference_persian_normalize,
+                                          reference_typography)
+
+
+def test_profiles_pin_both_legacy_normalizers():
+    basic = RulePipeline('basic')
+    typography = RulePipeline('basic_typography')
+    persian = RulePipeline('persian')
+    for text in INPUTS:
+        if not text:
+            continue
+        assert basic.normalize(text) == reference_normalize(text), text
+        assert typography.normalize(text) == reference_typography(text), text
+        assert persian.normalize(text) == reference_persian_normalize(text), text
+
+
+def test_profiles_only_use_declared_rules():
+    for profile, names in PROFILES.items():
+        assert set(names) - set(RULES) <= {'hazm'}, profile
+    with pytest.raises(ValueError):
+        RulePipeline('hazm')
+    with pytest.raises(ValueError):
+        RulePipeline('no-such-profile')
+
+
+class FakeHazmNormalizer:
+    """Stands in for hazm.Normalizer to check where the profile calls it"""
+
+    def normalize(self, text):
+        return text.replace('ك', 'K')
+
+
+def test_hazm_profile_replaces_basic_letter_rules():
+    normalizer = PersianTextNormalizer()
+    normalizer.normalizer = FakeHazmNormalizer()
+    assert normalizer.pipeline.profile == 'hazm'
+    assert normalizer.normalize_text("كتاب   ٣") == "Kتاب ٣."
+    normalizer.normalizer = None
+    assert normalizer.normalize_text("كتاب   ٣") == "کتاب 3."
+
+
+def test_timing_records_every_rule_without_changing_output():
+    pipeline = RulePipeline('basic')
+    text = ' '.join(INPUTS[:50])
+    expected = pipeline.normalize(text)
+    with pipeline.timed() as timings:
+        assert pipeline.normalize(text) == expected
+    assert list(timings) == list(dict.fromkeys(PROFILES['basic']))
+    assert all(seconds >= 0 for seconds in timings.values())
+    pipeline.normalize(text)
+    assert pipeline._timings is None
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Differential tests: compiled normalizer rules against the original re.sub chains
+تست تفاضلی: قواعد کامپایل‌شده نرمال‌ساز در برابر پیاده‌سازی اولیه
+
+The reference functions below are verbatim copies of the rule chains before they
+were precompiled into rule tables. Output must be byte-identical on the transcripts in
+output/, on damaged copies of them, and on random strings built from the
+characters the rules react to.
+"""
+
+import glob
+import json
+import os
+import random
+import re
+import unicodedata
+
+import pytest
+
+import text_normalizer
+from persian_text_normalizer import STREAM_MAX_PENDING_WORDS, PersianTextNormalizer, StreamingSegmenter
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# --- Reference implementations (original code) ---
+def reference_typography(value):
+    if not value:
+        return value
+    value = value.replace('ـ', '')
+    value = re.sub(r'\.\.{2,}', '…', value)
+    value = re.sub(r'([!؟?\.،])\1{1,}', r'\1', value)
+    value = re.sub(r'([\u0600-\u06FF])\1{2,}', r'\1\1', value)
+    value = re.sub(r'(?<!\S)(ن?می)[\s\u200c]+(?=[\u0600-\u06FF])', r'\1‌', value)
+    value = re.sub(r'(?<!\S)(بی)[\s\u200c]+(?=[\u0600-\u06FF])', r'\1‌', value)
+    value = re.sub(r'([\u0600-\u06FF])\s+(ها|تر|ترین)\b', r'\1‌\2', value)
+    value = re.sub(r'ها\s+ی\b', 'ها‌ی', value)
+    value = re.sub(r'"([^"\n]{1,80})"', r'«\1»', value)
+    value = re.sub(r'\(\s+', '(', value)
+    value = re.sub(r'\s+\)', ')', value)
+    value = re.sub(r'«\s+', '«', value)
+    value = re.sub(r'\s+»', '»', value)
+    value = re.sub(r'\s*[،,]\s*', '، ', value)
+    value = re.sub(r'\s*;\s*', '؛ ', value)
+    value = re.sub(r'([\u0600-\u06FF])\?\b', r'\1؟', value)
+    value = re.sub(r'\s+', ' ', value)
+    return value.strip()
+
+
+def reference_normalize(text):
+    if text is None:
+        return ""
+    value = unicodedata.normalize('NFC', str(text))
+    value = value.replace('ي', 'ی').replace('ك', 'ک')
+    value = reference_typography(value)
+    for i, d in enumerate('٠١٢٣٤٥٦٧٨٩'):
+        value = value.replace(d, str(i))
+    value = re.sub(r'\s*([،,:;؛.!?])\s*', r'\1 ', value)
+    value = re.sub(r'\s+', ' ', value)
+    value = value.strip()
+    if value and value[-1] not in '。．.؟!?！':
+        value += '.'
+    return value
+
+
+def reference_persian_normalize(text):
+    """PersianTextNormalizer.normalize_text without Hazm"""
+    if not text:
+        return ""
+    text = unicodedata.normalize('NFC', str(text))
+    for arabic, persian in {'ي': 'ی', 'ك': 'ک', 'ة': 'ه', 'ؤ': 'و',
+                            'إ': 'ا', 'أ': 'ا', 'آ': 'آ', 'ئ': 'ی'}.items():
+        text = text.replace(arabic, persian)
+    for i, d in enumerate('٠١٢٣٤٥٦٧٨٩'):
+        text = text.replace(d, str(i))
+    text = text.replace('ـ', '')
+    text = re.sub(r'\.\.{2,}', '…', text)
+    text = re.sub(r'(?<!\S)(ن?می)[\s\u200c]+(?=[\u0600-\u06FF])', r'\1‌', text)
+    text = re.sub(r'(?<!\S)(بی)[\s\u200c]+(?=[\u0600-\u06FF])', r'\1‌', text)
+    text = re.sub(r'([\u0600-\u06FF])\s+(ها|تر|ترین)\b', r'\1‌\2', text)
+    text = re.sub(r'ها\s+ی\b', 'ها‌ی', text)
+    text = re.sub(r'"([^"\n]{1,80})"', r'«\1»', text)
+    text = re.sub(r'\s*[،,]\s*', '، ', text)
+    text = re.sub(r'\s*;\s*', '؛ ', text)
+    text = re.sub(r'([\u0600-\u06FF])\?\b', r'\1؟', text)
+    text = re.sub(r'\s*([،,:;؛.!?؟])\s*', r'\1 ', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = text.strip()
+    if text and text[-1] not in '。．.؟!?！،;':
+        text += '.'
+    return text
+
+
+# --- Inputs ---
+def corpus():
+    texts = []
+    for path in sorted(glob.glob(os.path.join(HERE, 'output', '*.txt'))):
+        with open(path, encoding='utf-8') as f:
+            texts.append(f.read())
+    for path in sorted(glob.glob(os.path.join(HERE, 'output', '*.json'))):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        texts.append(data.get('transcript', ''))
+        texts.append('\n'.join(data.get('sentences', [])))
+    return [t for t in texts if t]
+
+
+def damage(text, seed):
+    """Undo typography the normalizer adds so its rules have work to do"""
+    rng = random.Random(seed)
+    text = text.replace('‌', ' ').replace('،', ' ,').replace('؟', ' ?')
+    text = text.replace('«', '" ').replace('»', ' "')
+    out = []
+    for ch in text:
+        roll = rng.random()
+        if roll < 0.01:
+            ch = ch * rng.randint(2, 5)
+        elif roll < 0.015:
+            ch += rng.choice(['  ', '\n', 'ـ', '...', ';', ' ( ', ' ) ', '٣', 'ي', 'ك'])
+        out.append(ch)
+    return ''.join(out)
+
+
+WORDS = ['می', 'نمی', 'بی', 'ها', 'ی', 'تر', 'ترین', 'کتاب', 'خواهم', 'ببببب', 'a', 'b1']
+SYMBOLS = list('.!?؟،,;؛:"()«»ـ') + ['...', '..', '!!', '٠١٢', 'ي', 'ك', 'ة', 'أ', '٣٣٣']
+SEPARATORS = [' ', ' ', '', '  ', '\u200c', '\n', '\t']
+
+
+def fuzz_strings(count=5000, seed=0):
+    """Random mixes of the words and symbols the rules look for"""
+    rng = random.Random(seed)
+    strings = []
+    for _ in range(count):
+        tokens = [rng.choice(WORDS if rng.random() < 0.6 else SYMBOLS) for _ in range(rng.randint(0, 12))]
+        strings.append(''.join(token + rng.choice(SEPARATORS) for token in tokens))
+    return strings
+
+
+CORPUS = corpus()
+INPUTS = CORPUS + [damage(t, k) for k, t in enumerate(CORPUS)] + fuzz_strings()
+
+
+def test_corpus_is_available():
+    assert len(CORPUS) >= 3
+
+
+def test_text_normalizer_matches_reference():
+    for text in INPUTS:
+        assert text_normalizer._apply_persian_typography(text) == reference_typography(text), text
+        assert text_normalizer.normalize_text(text) == reference_normalize(text), text
+
+
+@pytest.fixture(scope='module')
+def basic_normalizer():
+    normalizer = PersianTextNormalizer()
+    normalizer.normalizer = None  # compare the rule chain, not Hazm
+    return normalizer
+
+
+def test_persian_normalizer_matches_reference(basic_normalizer):
+    for text in INPUTS:
+        assert basic_normalizer.normalize_text(text) == reference_persian_normalize(text), text
+
+
+def test_process_text_matches_separate_calls(basic_normalizer):
+    """One-pass process_text gives what normalize_text + segment_sentences gave on transcripts"""
+    for text in CORPUS:
+        normalized = basic_normalizer.normalize_text(text)
+        sentences = basic_normalizer.segment_sentences(normalized)
+        processed = basic_normalizer.process_text(text)
+        assert processed['normalized_text'] == normalized
+        assert processed['sentences'] == sentences
+        assert processed['clean_text'] == normalized.replace('،', '').replace(',', '')
+        assert processed['clean_sentences'] == [s.replace('،', '').replace(',', '') for s in sentences]
+
+
+def test_process_text_does_not_normalize_twice(basic_normalizer):
+    """Sentences come from the single normalized text, also when it is passed in again"""
+    for text in INPUTS[:len(CORPUS) * 2]:
+        processed = basic_normalizer.process_text(text)
+        assert processed['sentences'] == basic_normalizer._segment_normalized(processed['normalized_text'])
+        assert basic_normalizer.process_text(processed['normalized_text'], already_normalized=True) == processed
+
+
+def test_process_text_does_not_depend_on_earlier_calls(basic_normalizer):
+    """normalize_text is not idempotent, so its earlier outputs must not be taken as normalized"""
+    fresh = PersianTextNormalizer()
+    fresh.normalizer = None
+    unstable = 0
+    for text in INPUTS:
+        normalized = basic_normalizer.normalize_text(text)
+        processed = basic_normalizer.process_text(normalized)
+        assert processed == fresh.process_text(normalized), text
+        unstable += processed['normalized_text'] != normalized
+    assert unstable > 0
+
+
+def split_into_chunks(text, seed):
+    """Cut text at spaces into pieces of 1-120 words, like per-chunk transcripts"""
+    rng = random.Random(seed)
+    words = text.split(' ')
+    chunks = []
+    while words:
+        size = rng.randint(1, 120)
+        chunks.append(' '.join(words[:size]))
+        words = words[size:]
+    return chunks
+
+
+def test_streaming_segmenter_matches_batch(basic_normalizer):
+    """Sentences fed chunk by chunk equal segment_sentences on the joined text"""
+    rng = random.Random(0)
+    chunked = [split_into_chunks(text, k) for k, text in enumerate(INPUTS[:len(CORPUS) * 2])]
+    fuzz = INPUTS[len(CORPUS) * 2:]
+    chunked += [fuzz[i:i + rng.randint(1, 12)] for i in range(0, len(fuzz), 6)]
+
+    released_early = 0
+    for chunks in chunked:
+        joined = " ".join(t for t in chunks if t).strip()
+        segmenter = StreamingSegmenter(basic_normalizer)
+        sentences = []
+        for chunk in chunks[:-1]:
+            sentences += segmenter.feed(chunk)
+        released_early += bool(sentences)
+        sentences += segmenter.feed(chunks[-1]) + segmenter.flush()
+        assert sentences == basic_normalizer.segment_sentences(joined), chunks
+        assert segmenter.normalized_text == (basic_normalizer.normalize_text(joined) if sentences else '')
+    assert released_early > len(chunked) // 10
+
+
+def test_streaming_segmenter_releases_unpunctuated_text_early(basic_normalizer):
+    """Transcripts without punctuation come out in word windows before flush()"""
+    for text in CORPUS:
+        words = re.sub(r'[.!?؟،,;:"«»()]', ' ', text).split()
+        chunks = [' '.join(words[i:i + 45]) for i in range(0, len(words), 45)]
+        if len(chunks) < 4:
+            continue
+        segmenter = StreamingSegmenter(basic_normalizer, max_pending_words=STREAM_MAX_PENDING_WORDS)
+        sentences = []
+        for chunk in chunks:
+            sentences += segmenter.feed(chunk)
+            # Nothing beyond the bound and the newest chunk is ever held back
+            assert len(segmenter._pending.split()) <= STREAM_MAX_PENDING_WORDS + 45
+        early = len(sentences)
+        sentences += segmenter.flush()
+
+        assert early >= len(sentences) // 2
+        batch = basic_normalizer.segment_sentences(' '.join(chunks))
+        # Same words in the same order; window boundaries may differ
+        assert ' '.join(sentences).replace('.', '').split() == ' '.join(batch).replace('.', '').split()
+        assert all(len(sentence.split()) <= 40 for sentence in sentences)
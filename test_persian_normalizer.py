@@ -123,5 +123,89 @@ def test_normalizer():
     print("\n✅ تست‌ها کامل شد!")
 
 
+def test_helpers_share_one_lazy_normalizer(monkeypatch):
+    """Module-level helpers reuse one instance; analysis models load only for analyze_text"""
+    import persian_text_normalizer as ptn
+
+    created = []
+    original_init = ptn.PersianTextNormalizer.__init__
+
+    def counting_init(self):
+        created.append(self)
+        original_init(self)
+
+    monkeypatch.setattr(ptn.PersianTextNormalizer, '__init__', counting_init)
+    monkeypatch.setattr(ptn, '_shared_normalizer', None)
+
+    ptn.normalize_text("سلام  جهان")
+    ptn.segment_sentences("سلام. چطور هستید؟")
+    ptn.normalize_text("خداحافظ")
+
+    assert len(created) == 1
+    assert created[0] is ptn.get_shared_normalizer()
+    assert not created[0]._analysis_loaded or created[0].normalizer is None
+
+
+def test_analyze_texts_tags_in_one_batch_and_memoizes_lemmas():
+    """Batch analysis equals analyze_text per document, with one tagger call"""
+    class FakeTagger:
+        def __init__(self):
+            self.batches = []
+
+        def tag(self, tokens):
+            return self.tag_sents([tokens])[0]
+
+        def tag_sents(self, sentences):
+            self.batches.append(len(sentences))
+            return [[(w, 'N' if len(w) > 2 else 'X') for w in tokens] for tokens in sentences]
+
+    class FakeLemmatizer:
+        def __init__(self):
+            self.calls = 0
+
+        def lemmatize(self, word, pos=''):
+            self.calls += 1
+            return word[:3] + pos
+
+    normalizer = PersianTextNormalizer()
+    normalizer._postagger, normalizer._lemmatizer = FakeTagger(), FakeLemmatizer()
+    normalizer._analysis_loaded = True
+    texts = ["سلام دوستان. امروز می خواهیم درس بخوانیم.", "", "کتاب ها را بخوانیم. کتاب ها خوب هستند."] * 5
+
+    analyses = normalizer.analyze_texts(texts)
+    assert normalizer.postagger.batches == [10]
+    assert normalizer.lemmatizer.calls < sum(len(a.get('lemmas', [])) for a in analyses) / 3
+    stats = normalizer.cache_stats()
+    assert stats['misses'] == normalizer.lemmatizer.calls and stats['hit_rate'] > 0.6
+    assert analyses[1] == {}
+    for text, analysis in zip(texts, analyses):
+        assert analysis == normalizer.analyze_text(text)
+        assert not analysis or len(analysis['lemmas']) == len(analysis['pos_analysis'])
+
+
+def test_lemma_cache_is_bounded():
+    class CountingLemmatizer:
+        calls = 0
+
+        def lemmatize(self, word, pos=''):
+            self.calls += 1
+            return word
+
+    normalizer = PersianTextNormalizer(lemma_cache_size=2)
+    normalizer._lemmatizer = CountingLemmatizer()
+    normalizer._analysis_loaded = True
+    for word in ['a', 'b', 'a', 'c', 'a', 'b']:
+        normalizer._lemmatize(word, 'N')
+    stats = normalizer.cache_stats()
+    assert stats['size'] == 2 and stats['max_size'] == 2
+    assert (stats['hits'], stats['misses']) == (2, 4) == (2, normalizer.lemmatizer.calls)
+
+
+def test_analyze_texts_process_pool_matches_sequential():
+    normalizer = PersianTextNormalizer()
+    texts = ["سلام دوستان. امروز می خواهیم درس بخوانیم.", "کتاب ها را بخوانیم", ""] * 3
+    assert normalizer.analyze_texts(texts, workers=2) == normalizer.analyze_texts(texts)
+
+
 if __name__ == "__main__":
     test_normalizer()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the request budget shared between processes
+تست سهمیه مشترک درخواست‌ها بین پردازه‌ها
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from rate_limiter import BudgetExhausted, SharedRateLimiter
+from recognizer_backends import StubBackend
+from test_transcription_pipeline import write_chunked_wav
+from working_youtube_to_text import WorkingYouTubeToText
+
+
+def test_token_bucket_paces_after_the_burst(tmp_path):
+    limiter = SharedRateLimiter(os.path.join(tmp_path, 'rate.sqlite3'), requests_per_minute=600, burst=2)
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    elapsed = time.monotonic() - start
+
+    # Two at once, then one every 0.1 s
+    assert 0.35 <= elapsed < 1.0
+    assert limiter.requests == 6 and limiter.queued_seconds > 0.3
+    usage = limiter.usage()
+    assert usage['requests_today'] == usage['requests_last_minute'] == 6
+    assert usage['requests_per_minute'] == 600
+
+
+def test_daily_budget_is_not_exceeded(tmp_path):
+    path = os.path.join(tmp_path, 'rate.sqlite3')
+    limiter = SharedRateLimiter(path, daily_budget=3)
+    for _ in range(3):
+        asyncio.run(limiter.acquire_async())
+    with pytest.raises(BudgetExhausted):
+        limiter.acquire()
+
+    # The count is shared: another worker on the same file is refused too
+    other = SharedRateLimiter(path, daily_budget=3, worker='other')
+    with pytest.raises(BudgetExhausted):
+        other.acquire()
+    assert other.usage()['requests_today'] == 3
+
+
+def test_limits_are_set_once_for_every_process(tmp_path):
+    path = os.path.join(tmp_path, 'rate.sqlite3')
+    first = SharedRateLimiter(path, requests_per_minute=600, daily_budget=1000)
+    # Another rate cannot silently replace the shared one
+    with pytest.raises(ValueError, match='requests_per_minute=600'):
+        SharedRateLimiter(path, requests_per_minute=60)
+    joined = SharedRateLimiter(path)
+    assert (joined.requests_per_minute, joined.daily_budget, joined.burst) == (600, 1000, first.burst)
+    same = SharedRateLimiter(path, requests_per_minute=600, daily_budget=1000)
+    same.acquire()
+    assert same.usage()['requests_per_minute'] == 600 and same.usage()['daily_budget'] == 1000
+    for limiter in (first, joined, same):
+        limiter.close()
+
+
+def _send(args):
+    path, worker, requests = args
+    limiter = SharedRateLimiter(path, requests_per_minute=1200, burst=1, worker=worker)
+    for _ in range(requests):
+        limiter.acquire()
+    limiter.close()
+    return time.monotonic()
+
+
+def test_processes_share_one_rate(tmp_path):
+    path = os.path.join(tmp_path, 'rate.sqlite3')
+    SharedRateLimiter(path).close()
+    start = time.monotonic()
+    with ProcessPoolExecutor(max_workers=3) as pool:
+        end = max(pool.map(_send, [(path, f'w{w}', 8) for w in range(3)]))
+
+    # 24 requests at 20/s between them, whatever each process would allow alone
+    assert end - start >= 1.0
+    usage = SharedRateLimiter(path).usage()
+    assert usage['requests_today'] == 24
+    workers = {w['worker']: w for w in usage['workers']}
+    assert sorted(workers) == ['w0', 'w1', 'w2']
+    assert all(w['requests'] == 8 for w in workers.values())
+    assert sum(w['queued_seconds'] for w in workers.values()) > 1.0
+
+
+@pytest.mark.parametrize('run_async', [False, True], ids=['threads', 'asyncio'])
+def test_every_request_goes_through_the_limiter(tmp_path, run_async):
+    wav_path = os.path.join(tmp_path, 'speech.wav')
+    write_chunked_wav(wav_path, 6)
+    limiter = SharedRateLimiter(os.path.join(tmp_path, 'rate.sqlite3'), daily_budget=100)
+    backend = StubBackend(latency=0.001, failure_rate=0.3, seed=3)
+    converter = WorkingYouTubeToText(backend=backend, chunking='fixed', chunk_cache=False, audio_cache=False,
+                                     rate_limiter=limiter, retry_options={'base_delay': 0.01, 'max_delay': 0.05})
+    if run_async:
+        text, _ = asyncio.run(converter.transcribe_audio_file_async(wav_path))
+    else:
+        text, _ = converter.transcribe_audio_file(wav_path)
+
+    # Retries take a token as well
+    stats = converter.last_request_stats
+    assert len(text.split()) == 6 and stats['retries'] > 0
+    assert limiter.usage()['requests_today'] == stats['requests'] == backend.calls
+
+    # Once the budget is used up the file fails at once instead of retrying
+    limiter.daily_budget = limiter.usage()['requests_today'] + 2
+    text, _ = converter.transcribe_audio_file(wav_path)
+    assert text.startswith('[خطا در اتصال') and 'budget' in text
+    assert converter.last_request_stats['gave_up'] == 0
+
+
+def test_queued_time_is_reported_per_file(tmp_path):
+    wav_path = os.path.join(tmp_path, 'speech.wav')
+    write_chunked_wav(wav_path, 3)
+    limiter = SharedRateLimiter(os.path.join(tmp_path, 'rate.sqlite3'), requests_per_minute=600, burst=1)
+    converter = WorkingYouTubeToText(backend=StubBackend(latency=0.001), chunking='fixed', chunk_cache=False,
+                                     audio_cache=False, rate_limiter=limiter)
+    files = []
+    for _ in range(3):
+        converter.transcribe_audio_file(wav_path)
+        files.append(converter.last_request_stats)
+
+    # Each file reports its own tokens and waits, which add up to the process totals
+    assert all(stats['limited_requests'] == stats['requests'] == 3 for stats in files)
+    assert all(0.1 <= stats['queued_seconds'] < 1.0 for stats in files[1:])
+    assert sum(stats['queued_seconds'] for stats in files) == pytest.approx(limiter.queued_seconds)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the recognizer backend interface and the local stub engine
+تست رابط موتورهای تشخیص گفتار و موتور محلی شبیه‌سازی
+"""
+
+import asyncio
+import os
+
+import pytest
+import speech_recognition as sr
+
+from recognizer_backends import StubBackend, make_backend
+from test_transcription_pipeline import SAMPLE_RATE, write_chunked_wav
+from working_youtube_to_text import WorkingYouTubeToText
+
+
+def chunk(value):
+    return sr.AudioData(value.to_bytes(2, 'little') * 1600, SAMPLE_RATE, 2)
+
+
+def outcomes(backend, count=200):
+    results = []
+    for k in range(count):
+        try:
+            results.append(backend.recognize(chunk(k + 1), 'fa-IR'))
+        except sr.RequestError:
+            results.append('fail')
+        except sr.UnknownValueError:
+            results.append('silent')
+    return results
+
+
+def test_stub_is_deterministic_with_configured_rates():
+    first = outcomes(StubBackend(latency=0, failure_rate=0.2, no_speech_rate=0.1, seed=3))
+    second = outcomes(StubBackend(latency=0, failure_rate=0.2, no_speech_rate=0.1, seed=3))
+
+    assert first == second
+    assert 20 <= first.count('fail') <= 60
+    assert 5 <= first.count('silent') <= 40
+
+
+def test_stub_only_understands_its_language():
+    backend = StubBackend(latency=0, spoken_language='en-US')
+
+    with pytest.raises(sr.UnknownValueError):
+        backend.recognize(chunk(1), 'fa-IR')
+    assert backend.recognize(chunk(1), 'en-US') == asyncio.run(backend.recognize_async(chunk(1), 'en-US'))
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        make_backend('whisper')
+
+
+def test_pipeline_runs_on_stub_backend(tmp_path):
+    """Same transcript at any worker count, with English fallback driven by the stub"""
+    wav_path = os.path.join(tmp_path, 'stub.wav')
+    write_chunked_wav(wav_path, 4)
+    texts = []
+    for workers in (1, 4):
+        backend = StubBackend(latency=0.01, spoken_language='en-US')
+        converter = WorkingYouTubeToText(max_workers=workers, backend=backend,
+                                         chunking='fixed', chunk_cache=False)
+        text, _ = converter.transcribe_audio_file(wav_path)
+        texts.append(text)
+        assert backend.calls == 8
+        assert converter.last_language_stats['detected'] == {'en-US': 4}
+
+    assert texts[0] == texts[1] and len(texts[0].split()) == 4
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for recognizer retries, adaptive concurrency and the circuit breaker
+تست تلاش دوباره، همزمانی تطبیقی و قطع‌کننده مدار درخواست‌های تشخیص گفتار
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+
+import pytest
+import speech_recognition as sr
+
+from recognizer_backends import CallableBackend, StubBackend
+from request_control import AIMDLimit, CircuitBreaker, RequestController, backoff_delay, is_throttled
+from test_transcription_pipeline import write_chunked_wav
+from working_youtube_to_text import WorkingYouTubeToText
+
+FAST_RETRIES = {'base_delay': 0.01, 'max_delay': 0.05, 'cooldown': 0.05}
+
+
+def test_backoff_is_jittered_and_capped():
+    rng = random.Random(1)
+    delays = [[backoff_delay(attempt, 0.5, 4.0, rng) for _ in range(200)] for attempt in range(6)]
+
+    assert all(0 <= d <= min(4.0, 0.5 * 2 ** a) for a, ds in enumerate(delays) for d in ds)
+    assert max(delays[0]) < 0.5 < max(delays[2])
+    # Full jitter spreads retries over the whole window
+    assert len({round(d, 3) for d in delays[5]}) > 150
+
+
+def test_aimd_halves_once_per_interval_and_grows_back():
+    limit = AIMDLimit(16, decrease_interval=1.0)
+    limit.on_error(now=10.0)
+    limit.on_error(now=10.2)
+    assert limit.allowed == 8
+    limit.on_error(now=11.5)
+    assert limit.allowed == 4
+    # About +1 per round of limit successes
+    for _ in range(5):
+        limit.on_success()
+    assert limit.allowed == 5 and limit.lowest == 4
+
+
+def test_breaker_opens_probes_and_closes():
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=1.0)
+    for now in (0.0, 0.1, 0.2):
+        assert breaker.admit(now) == 0
+        breaker.record(False, now)
+    assert breaker.state == 'open' and breaker.admit(0.5) == pytest.approx(0.7)
+    # One probe after the cooldown; it fails, so the cooldown doubles
+    assert breaker.admit(1.3) == 0 and breaker.admit(1.3) > 0
+    breaker.record(False, 1.4)
+    assert breaker.admit(2.4) == pytest.approx(1.0)
+    assert breaker.admit(3.5) == 0
+    breaker.record(True, 3.6)
+    assert breaker.state == 'closed' and breaker.trips == 2
+    assert breaker.paused_seconds(10.0) == pytest.approx(3.4)
+
+
+def test_throttling_errors_are_recognized():
+    error = sr.RequestError("recognition request failed: Too Many Requests")
+    assert is_throttled(error) and not is_throttled(sr.RequestError("recognition connection failed"))
+
+
+def scripted(*outcomes):
+    """Request function raising the given exceptions in turn, then returning 'ok'"""
+    pending = list(outcomes)
+
+    def request():
+        if pending:
+            raise pending.pop(0)
+        return 'ok'
+    return request
+
+
+@pytest.mark.parametrize('run_async', [False, True], ids=['threads', 'asyncio'])
+def test_probe_ending_in_another_error_reopens_the_breaker(run_async):
+    control = RequestController(max_retries=2, failure_threshold=1, cooldown=0.05, max_pause=5.0,
+                                base_delay=0.01, max_delay=0.02)
+    request = scripted(sr.RequestError("connection reset"), RuntimeError("not the service"))
+
+    def call(request):
+        if run_async:
+            async def coroutine():
+                return request()
+            return asyncio.run(control.call_async(coroutine))
+        return control.call(request)
+
+    # The first failure opens the circuit; the probe after the cooldown raises something else
+    with pytest.raises(RuntimeError):
+        call(request)
+    start = time.monotonic()
+    assert call(request) == 'ok'
+    # A stuck probe would hold every later request until max_pause
+    assert time.monotonic() - start < 1.0
+    assert control.breaker.state == 'closed' and control.breaker.trips == 2
+
+
+def test_socket_timeouts_are_retried():
+    control = RequestController(max_retries=1, base_delay=0.01, max_delay=0.02)
+    assert control.call(scripted(TimeoutError("timed out"))) == 'ok'
+    assert control.stats()['retries'] == 1
+
+    # Once the retries are used up it reaches the pipeline as a RequestError
+    with pytest.raises(sr.RequestError, match='timed out'):
+        control.call(scripted(TimeoutError("timed out"), TimeoutError("timed out")))
+
+
+def test_waiting_in_before_holds_no_slot():
+    control = RequestController(max_concurrency=1, adaptive=False)
+    token = threading.Event()
+    waiting = threading.Event()
+
+    def wait_for_token():
+        waiting.set()
+        assert token.wait(5)
+
+    waiter = threading.Thread(target=control.call, args=(scripted(),), kwargs={'before': wait_for_token})
+    waiter.start()
+    assert waiting.wait(5)
+    # The only slot is free while the other request waits for its token
+    assert control.call(scripted()) == 'ok'
+    assert control.stats()['requests'] == 1
+    token.set()
+    waiter.join(5)
+    assert control.stats()['requests'] == 2
+
+
+def transcribe(tmp_path, backend, run_async=False, chunks=8, **options):
+    wav_path = os.path.join(tmp_path, 'speech.wav')
+    write_chunked_wav(wav_path, chunks)
+    converter = WorkingYouTubeToText(backend=backend, chunking='fixed', chunk_cache=False, audio_cache=False,
+                                     **options)
+    if run_async:
+        text, _ = asyncio.run(converter.transcribe_audio_file_async(wav_path))
+    else:
+        text, _ = converter.transcribe_audio_file(wav_path)
+    return text, converter.last_request_stats
+
+
+class OutageBackend(CallableBackend):
+    """Every request fails with a RequestError until outage seconds after the first one"""
+
+    def __init__(self, outage):
+        super().__init__(self._recognize)
+        self.outage = outage
+        self.start = None
+
+    def _recognize(self, audio_data, language):
+        self.start = self.start or time.monotonic()
+        if time.monotonic() - self.start < self.outage:
+            raise sr.RequestError("recognition connection failed: [Errno 111] Connection refused")
+        return f"chunk{audio_data.get_raw_data()[0]}"
+
+
+@pytest.mark.parametrize('run_async', [False, True], ids=['threads', 'asyncio'])
+def test_failed_chunks_are_retried(tmp_path, run_async):
+    text, stats = transcribe(tmp_path, StubBackend(latency=0.005, failure_rate=0.3, seed=2), run_async,
+                             max_retries=6, retry_options=FAST_RETRIES)
+
+    assert len(text.split()) == 8 and not text.startswith('[')
+    assert stats['failed'] == stats['retries'] > 0
+    assert stats['succeeded'] == 8 and stats['gave_up'] == 0
+    assert 0 < stats['success_ratio'] < 1 and stats['goodput'] > 0
+
+    # Without retries the first failure still fails the file
+    text, stats = transcribe(tmp_path, StubBackend(latency=0.005, failure_rate=0.3, seed=2), run_async,
+                             max_retries=0)
+    assert text.startswith('[خطا در اتصال') and stats['retries'] == 0 and stats['gave_up'] >= 1
+
+
+@pytest.mark.parametrize('run_async', [False, True], ids=['threads', 'asyncio'])
+def test_concurrency_backs_off_when_throttled(tmp_path, run_async):
+    backend = StubBackend(latency=0.02, capacity=2)
+    text, stats = transcribe(tmp_path, backend, run_async, chunks=16, max_workers=8,
+                             max_retries=10, retry_options=FAST_RETRIES)
+
+    assert len(text.split()) == 16
+    assert stats['throttled'] == backend.throttled > 0
+    assert stats['lowest_limit'] <= 2
+
+
+@pytest.mark.parametrize('run_async', [False, True], ids=['threads', 'asyncio'])
+def test_outage_pauses_the_pipeline(tmp_path, run_async):
+    options = dict(FAST_RETRIES, failure_threshold=3)
+    text, stats = transcribe(tmp_path, OutageBackend(0.4), run_async, max_workers=4, max_retries=2,
+                             retry_options=options)
+
+    # Two retries alone would have given up long before the outage ended
+    assert len(text.split()) == 8 and not text.startswith('[')
+    assert stats['breaker_trips'] >= 1 and stats['paused_seconds'] >= 0.2
+    assert stats['gave_up'] == 0
+
+    text, stats = transcribe(tmp_path, OutageBackend(60), run_async, max_workers=4, max_retries=2,
+                             retry_options=dict(options, max_pause=0.3))
+    assert text.startswith('[خطا در اتصال') and 'paused' in text
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the pooled asyncio speech client against the local stand-in server
+تست کلاینت ناهمگام تشخیص گفتار با اتصال‌های ماندگار (سرور محلی شبیه‌سازی)
+"""
+
+import asyncio
+import os
+
+import pytest
+import speech_recognition as sr
+
+from recognizer_backends import GoogleBackend
+from speech_client import AsyncSpeechClient, StubSpeechServer
+from test_transcription_pipeline import SAMPLE_RATE, write_chunked_wav
+from working_youtube_to_text import WorkingYouTubeToText
+
+
+def chunk(value):
+    return sr.AudioData(value.to_bytes(2, 'little') * 1600, SAMPLE_RATE, 2)
+
+
+def test_requests_share_keep_alive_connections():
+    async def run(client):
+        try:
+            return await asyncio.gather(*(client.recognize(chunk(k + 1), 'fa-IR') for k in range(24)))
+        finally:
+            await client.aclose()
+
+    with StubSpeechServer(latency=0.02) as server:
+        client = AsyncSpeechClient(server.url, max_in_flight=4)
+        texts = asyncio.run(run(client))
+        # The sync path sends the same request, one connection each
+        sync_backend = GoogleBackend(endpoint=server.url)
+        assert [sync_backend.recognize(chunk(k + 1), 'fa-IR') for k in range(3)] == texts[:3]
+
+        assert len(set(texts)) == 24 and all(t.startswith('stub-') for t in texts)
+        assert client.stats()['max_in_flight'] == 4
+        assert client.stats()['connections'] == 4
+        assert server.connections == 4 + 3 and server.requests == 24 + 3
+
+
+def test_errors_match_recognize_google():
+    async def recognize(client, language='fa-IR'):
+        try:
+            return await client.recognize(chunk(1), language)
+        finally:
+            await client.aclose()
+
+    with StubSpeechServer(latency=0.5) as server:
+        with pytest.raises(sr.UnknownValueError):
+            asyncio.run(recognize(AsyncSpeechClient(server.url), 'en-US'))
+        with pytest.raises(sr.RequestError, match='timed out'):
+            asyncio.run(recognize(AsyncSpeechClient(server.url, timeout=0.05)))
+        url = server.url
+    with pytest.raises(sr.RequestError, match='connection failed'):
+        asyncio.run(recognize(AsyncSpeechClient(url)))
+
+
+def test_connection_closed_while_idle_is_replaced():
+    """A chunked answer, then the server drops the idle connection"""
+    answer = b'{"result":[{"alternative":[{"transcript":"salam"}],"final":true}],"result_index":0}\n'
+
+    async def run():
+        connections = []
+
+        async def handle(reader, writer):
+            connections.append(writer)
+            head = await reader.readuntil(b'\r\n\r\n')
+            length = int(head.lower().split(b'content-length:')[1].split(b'\r\n')[0])
+            await reader.readexactly(length)
+            writer.write(b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n'
+                         + b'%x\r\n' % 20 + answer[:20] + b'\r\n'
+                         + b'%x\r\n' % (len(answer) - 20) + answer[20:] + b'\r\n0\r\n\r\n')
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/recognize"
+        client = AsyncSpeechClient(url, max_in_flight=1)
+        try:
+            texts = [await client.recognize(chunk(0), 'fa-IR') for _ in range(3)]
+        finally:
+            await client.aclose()
+            server.close()
+        return texts, len(connections)
+
+    texts, connections = asyncio.run(run())
+    assert texts == ['salam'] * 3 and connections == 3
+
+
+def test_async_transcription_matches_threaded(tmp_path):
+    wav_path = os.path.join(tmp_path, 'speech.wav')
+    write_chunked_wav(wav_path, 6)
+    with StubSpeechServer(latency=0.01, spoken_language='en-US') as server:
+        texts = []
+        for run_async in (False, True):
+            backend = GoogleBackend(endpoint=server.url, max_in_flight=2)
+            converter = WorkingYouTubeToText(max_workers=3, backend=backend, chunking='fixed',
+                                             chunk_cache=False, audio_cache=False)
+            if run_async:
+                connections = server.connections
+                text, _ = asyncio.run(converter.transcribe_audio_file_async(wav_path))
+                assert server.connections - connections == 2
+                assert backend.client.stats()['requests'] == 12
+            else:
+                text, _ = converter.transcribe_audio_file(wav_path)
+            texts.append(text)
+            assert converter.last_language_stats['detected'] == {'en-US': 6}
+        assert texts[0] == texts[1] and len(texts[0].split()) == 6
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the symmetric delete spelling correction index
+تست نمایه اصلاح املایی
+"""
+
+import random
+
+import pytest
+
+from spell_correction import SpellIndex, build_index, edit_distance
+
+LEXICON = {
+    'کتاب': 1000, 'کتابخانه': 300, 'دانشگاه': 800, 'دانشجو': 500, 'استفاده': 900,
+    'الگوریتم': 200, 'یادگیری': 400, 'یادگاری': 50, 'ماشین': 600, 'مدرسه': 700,
+    'کباب': 20, 'شتاب': 90, 'می‌روم': 10,
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = str(tmp_path / 'spell_index.bin')
+    build_index(LEXICON, path, known_words=['رفتم', 'کتابم'])
+    return SpellIndex(path)
+
+
+def test_lookup_finds_closest_most_frequent_word(index):
+    assert index.lookup('کتاب') == ('کتاب', 0, 1000)
+    assert index.lookup('کتاپ') == ('کتاب', 1, 1000)
+    # Adjacent swap is one edit
+    assert index.lookup('اسفتاده') == ('استفاده', 1, 900)
+    assert index.lookup('الگرتیم') == ('الگوریتم', 2, 200)
+    # یادگری is one edit from both; the more frequent word wins
+    assert index.lookup('یادگری')[0] == 'یادگیری'
+    assert index.lookup('اتوبوس') is None
+    assert index.lookup('الگرتیم', max_distance=1) is None
+
+
+def test_known_words_are_accepted_but_never_suggested(index):
+    assert 'رفتم' in index and 'کتابم' in index and 'رفتن' not in index
+    assert index.lookup('کتابم') == ('کتابم', 0, 0)
+    assert index.lookup('کتابی')[0] == 'کتاب'
+
+
+def test_correct_text_keeps_short_repeated_and_known_words(index):
+    assert index.correct_text("این کتاپ و دانشگه را دیدم.") == "این کتاب و دانشگاه را دیدم."
+    # Spaced and joined می prefix, a known word with an ending, a short word
+    assert index.correct_text("میروم کتابها کتب") == "می‌روم کتابها کتب"
+    # Repeated words are taken to be terms the lexicon lacks
+    assert index.correct_text("ماشینن ماشینن ماشینن") == "ماشینن ماشینن ماشینن"
+    assert index.correct_text("ماشینن ماشینن") == "ماشین ماشین"
+    assert index.cache_stats()['hits'] >= 1
+
+
+def test_lookup_matches_brute_force_scan(tmp_path):
+    rng = random.Random(0)
+    letters = 'ابتدرسکمنوهی'
+    lexicon = {''.join(rng.choice(letters) for _ in range(rng.randint(2, 9))): rng.randint(1, 1000)
+               for _ in range(2000)}
+    path = str(tmp_path / 'random.bin')
+    build_index(lexicon, path, prefix_length=12)
+    index = SpellIndex(path)
+    for _ in range(300):
+        word = ''.join(rng.choice(letters) for _ in range(rng.randint(2, 9)))
+        expected = min(((edit_distance(word, w, 2), -count, w) for w, count in lexicon.items()))
+        found = index.lookup(word)
+        if expected[0] > 2:
+            assert found is None, word
+        else:
+            assert found is not None and (found[1], -found[2]) == expected[:2], word
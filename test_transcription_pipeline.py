@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the chunked transcription pipeline using a local stub recognizer
+تست خط لوله تبدیل گفتار به متن با تشخیص‌دهنده محلی (بدون اینترنت)
+"""
+
+import os
+import struct
+import threading
+import time
+import wave
+
+import speech_recognition as sr
+
+from working_youtube_to_text import WorkingYouTubeToText
+
+
+CHUNK_SECONDS = 55
+SAMPLE_RATE = 16000
+
+
+def write_chunked_wav(path, chunk_count, chunk_seconds=CHUNK_SECONDS):
+    """Write a 16 kHz mono WAV where chunk k holds the constant sample value k + 1"""
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        for k in range(chunk_count):
+            wf.writeframes(struct.pack('<h', k + 1) * (SAMPLE_RATE * chunk_seconds))
+
+
+class StubRecognizer:
+    """Answers with the chunk number encoded in the audio, after a fixed delay"""
+
+    def __init__(self, latency=0.05, persian=True):
+        self.latency = latency
+        self.persian = persian
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, audio_data, language='en-US'):
+        with self._lock:
+            self.calls.append(language)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            value = struct.unpack('<h', audio_data.get_raw_data()[:2])[0]
+            # Early chunks are slowest so completion order differs from input order
+            time.sleep(self.latency * (1 + 1.0 / value))
+            if language == 'fa-IR' and not self.persian:
+                raise sr.UnknownValueError()
+            return f"بخش{value}"
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def test_concurrent_chunks_keep_order(tmp_path):
+    """Concurrent recognition must still join chunk texts in original order"""
+    wav_path = os.path.join(tmp_path, 'ordered.wav')
+    write_chunked_wav(wav_path, 6)
+    stub = StubRecognizer()
+    converter = WorkingYouTubeToText(max_workers=4, recognize=stub, chunking='fixed', chunk_cache=False)
+
+    text, _ = converter.transcribe_audio_file(wav_path)
+
+    assert text == " ".join(f"بخش{k}" for k in range(1, 7))
+    assert 1 < stub.max_in_flight <= 4
+
+
+def test_english_fallback_per_chunk(tmp_path):
+    """Chunks that are not recognized as Persian fall back to English"""
+    wav_path = os.path.join(tmp_path, 'fallback.wav')
+    write_chunked_wav(wav_path, 2)
+    stub = StubRecognizer(latency=0.0, persian=False)
+    converter = WorkingYouTubeToText(max_workers=2, recognize=stub, chunking='fixed', chunk_cache=False)
+
+    text, _ = converter.transcribe_audio_file(wav_path)
+
+    assert text == "بخش1 بخش2"
+    assert sorted(stub.calls) == ['en-US', 'en-US', 'fa-IR', 'fa-IR']
+
+
+def test_wall_time_scales_with_workers(tmp_path):
+    """More workers should cut wall-clock time for latency-bound recognition"""
+    wav_path = os.path.join(tmp_path, 'scaling.wav')
+    write_chunked_wav(wav_path, 8)
+
+    timings = {}
+    for workers in (1, 8):
+        converter = WorkingYouTubeToText(max_workers=workers, recognize=StubRecognizer(latency=0.2),
+                                         chunking='fixed', chunk_cache=False)
+        _, timings[workers] = converter.transcribe_audio_file(wav_path)
+
+    assert timings[8] < timings[1] / 2
+
+
+def test_in_memory_handoff_matches_wav_roundtrip(tmp_path):
+    """The in-memory chunk handoff must carry the same PCM as the temp-WAV path"""
+    from pydub import AudioSegment
+
+    wav_path = os.path.join(tmp_path, 'handoff.wav')
+    write_chunked_wav(wav_path, 1, chunk_seconds=2)
+    part = AudioSegment.from_file(wav_path)
+    converter = WorkingYouTubeToText(chunk_cache=False)
+
+    in_memory = converter._chunk_to_audio_data(part)
+    via_wav = converter._chunk_to_audio_data_via_wav(part)
+
+    assert in_memory.get_raw_data() == via_wav.get_raw_data()
+    assert (in_memory.sample_rate, in_memory.sample_width) == (via_wav.sample_rate, via_wav.sample_width)
+
+
+def test_vad_skips_silent_audio(tmp_path):
+    """With VAD chunking, audio without speech never reaches the recognizer"""
+    wav_path = os.path.join(tmp_path, 'silent.wav')
+    with wave.open(wav_path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(b'\x00\x00' * SAMPLE_RATE * 120)
+    stub = StubRecognizer(latency=0.0)
+    converter = WorkingYouTubeToText(recognize=stub, chunk_cache=False)
+
+    text, _ = converter.transcribe_audio_file(wav_path)
+
+    assert text.startswith('[')
+    assert stub.calls == []
+
+
+def test_rerun_only_sends_missing_chunks(tmp_path, monkeypatch):
+    """After a connection error, a rerun reuses every chunk that already succeeded"""
+    monkeypatch.chdir(tmp_path)
+    write_chunked_wav('resume.wav', 6)
+
+    class FlakyRecognizer(StubRecognizer):
+        def __call__(self, audio_data, language='en-US'):
+            if struct.unpack('<h', audio_data.get_raw_data()[:2])[0] == 4:
+                raise sr.RequestError("connection reset")
+            return super().__call__(audio_data, language)
+
+    first = WorkingYouTubeToText(max_workers=1, recognize=FlakyRecognizer(latency=0.0), chunking='fixed')
+    text, _ = first.transcribe_audio_file('resume.wav')
+    assert text.startswith('[')
+
+    stub = StubRecognizer(latency=0.0)
+    second = WorkingYouTubeToText(max_workers=1, recognize=stub, chunking='fixed')
+    text, _ = second.transcribe_audio_file('resume.wav')
+
+    assert text == " ".join(f"بخش{k}" for k in range(1, 7))
+    assert len(stub.calls) == 3
+
+
+def test_repeat_video_reuses_cached_download(tmp_path, monkeypatch):
+    """A second request for the same video id skips the download entirely"""
+    monkeypatch.chdir(tmp_path)
+    downloads = []
+
+    def fake_download(url, output_path="audio", max_minutes=None):
+        downloads.append(url)
+        write_chunked_wav('audio.wav', 2)
+        return 'audio.wav', {'id': 'abc123', 'title': 'Lecture'}, 0.1
+
+    url = 'https://www.youtube.com/watch?v=abc123'
+    for _ in range(2):
+        converter = WorkingYouTubeToText(recognize=StubRecognizer(latency=0.0),
+                                         chunking='fixed', chunk_cache=False)
+        monkeypatch.setattr(converter, '_download', fake_download)
+        result = converter.transcribe_video(url, max_minutes=2)
+        assert result and result['title'] == 'Lecture'
+
+    assert downloads == [url]
+    assert converter.audio_cache.lookup('abc123', 2) is not None
+    assert converter.audio_cache.lookup('abc123', None) is None
+
+
+def test_batch_overlaps_download_and_recognition(tmp_path, monkeypatch):
+    """The next video downloads while the current one is being recognized"""
+    monkeypatch.chdir(tmp_path)
+    download_starts = []
+
+    def slow_download(url, output_path="audio", max_minutes=None):
+        download_starts.append(time.time())
+        time.sleep(0.3)
+        write_chunked_wav(f'{output_path}.wav', 2)
+        return f'{output_path}.wav', {'title': url[-4:]}, 0.3
+
+    class TimedRecognizer(StubRecognizer):
+        def __call__(self, audio_data, language='en-US'):
+            self.times = getattr(self, 'times', []) + [time.time()]
+            return super().__call__(audio_data, language)
+
+    stub = TimedRecognizer(latency=0.2)
+    converter = WorkingYouTubeToText(max_workers=1, recognize=stub,
+                                     chunking='fixed', chunk_cache=False, audio_cache=False)
+    monkeypatch.setattr(converter, '_download', slow_download)
+    urls = [f'https://youtu.be/vid{k}' for k in range(3)]
+
+    summary = converter.transcribe_batch(urls)
+
+    assert summary['succeeded'] == 3
+    assert [item['url'] for item in summary['results']] == urls
+    assert abs(summary['audio_minutes'] - 3 * 2 * CHUNK_SECONDS / 60) < 0.01
+    assert summary['videos_per_hour'] > 0
+    # Later downloads start while earlier videos are still being recognized
+    assert any(stub.times[0] < started < stub.times[-1] for started in download_starts[1:])
+
+
+def test_stream_yields_segments_before_input_ends():
+    """Streaming recognizes finished chunks while later PCM is still being read"""
+    from test_audio_segmenter import synthesize
+
+    pcm, _ = synthesize([('speech', 40), ('pause', 1)] * 6)
+    block = SAMPLE_RATE * 2
+    consumed = []
+
+    def blocks():
+        for offset in range(0, len(pcm), block):
+            consumed.append(offset)
+            yield pcm[offset:offset + block]
+
+    stub = StubRecognizer(latency=0.0)
+    converter = WorkingYouTubeToText(max_workers=2, recognize=stub, chunk_cache=False, audio_cache=False)
+    segments = []
+    for segment in converter.iter_transcribe_pcm(blocks()):
+        segments.append((segment, len(consumed)))
+
+    assert [s['index'] for s, _ in segments] == list(range(len(segments)))
+    assert len(segments) >= 4
+    assert segments[0][1] < len(consumed)
+    assert all(s['text'] and s['language'] == 'fa-IR' for s, _ in segments)
+    assert converter.last_language_stats['chunks'] == len(segments)
+
+
+def test_stream_sentences_match_the_batch_path(tmp_path, monkeypatch):
+    """Without --early-sentences, unpunctuated streamed text gives the batch sentences"""
+    from persian_text_normalizer import segment_sentences
+
+    words = "امروز درباره یادگیری ماشین و کاربرد های آن در زندگی روزمره صحبت می کنیم".split()
+    texts = [' '.join(words[(i + k) % len(words)] for k in range(45)) for i in range(8)]
+    converter = WorkingYouTubeToText(recognize=StubRecognizer(latency=0.0), chunk_cache=False, audio_cache=False)
+    converter.output_dir = str(tmp_path)
+    monkeypatch.setattr(converter, '_open_pcm_stream', lambda url, max_minutes=None: (None, {'title': 'stream'}))
+    monkeypatch.setattr(converter, '_read_pcm', lambda process: iter(()))
+    monkeypatch.setattr(converter, '_close_pcm_stream', lambda process: None)
+    monkeypatch.setattr(converter, 'iter_transcribe_pcm', lambda blocks: (
+        {'index': i, 'start_ms': i * 55000, 'text': text} for i, text in enumerate(texts)))
+    written = {}
+
+    def write_transcript(video_id, url, title, text, output_file=None, sentences=None, raw_transcript=None):
+        written['sentences'] = sentences
+        return 'stream.txt', 'stream.json'
+    monkeypatch.setattr(converter, '_write_transcript', write_transcript)
+
+    assert converter.transcribe_video_stream('https://youtu.be/abcdefghijk')
+    assert written['sentences'] == segment_sentences(' '.join(texts))
+
+
+def test_import_defers_heavy_dependencies():
+    """Importing the CLI module must not load the download, audio or NLP stacks"""
+    import subprocess
+    import sys
+
+    heavy = ('yt_dlp', 'speech_recognition', 'pydub', 'hazm', 'nltk', 'numpy')
+    code = ("import sys, working_youtube_to_text; "
+            f"print(','.join(m for m in {heavy!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+
+    assert result.stdout.strip() == ''
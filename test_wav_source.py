@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the memory-mapped WAV chunk source
+تست خواندن قطعه‌های صوتی از فایل WAV نگاشت‌شده در حافظه
+"""
+
+import os
+import struct
+import wave
+
+import numpy as np
+from pydub import AudioSegment
+
+from chunk_cache import audio_fingerprint
+from recognizer_backends import StubBackend
+from wav_source import WavSource, open_wav_source
+from working_youtube_to_text import WorkingYouTubeToText
+
+
+def write_wav(path, samples, rate=16000, channels=1):
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(samples.astype('<i2').tobytes())
+
+
+def test_slices_match_pydub_without_copying(tmp_path):
+    path = str(tmp_path / 'ramp.wav')
+    write_wav(path, np.arange(16000 * 7) % 3000 - 1500)
+    segment = AudioSegment.from_file(path)
+
+    with WavSource(path) as source:
+        assert len(source) == len(segment) == 7000
+        part = source[1234:5678]
+        assert isinstance(part.raw_data, memoryview) and part.raw_data.obj is source.raw_data.obj
+        assert bytes(part.raw_data) == segment[1234:5678].raw_data
+        assert len(source[6900:9000].raw_data) == 100 * 16 * 2
+        source.release_ms(0, 7000)
+        # Released pages are read back from the file
+        assert bytes(source[:].raw_data) == segment.raw_data
+        assert (audio_fingerprint(source.blocks(960 * 3), 16000, 2)
+                == audio_fingerprint(segment.raw_data, 16000, 2))
+
+
+def test_only_matching_pcm_wavs_are_opened(tmp_path):
+    stereo = str(tmp_path / 'stereo.wav')
+    write_wav(stereo, np.zeros(3200), channels=2)
+    not_wav = str(tmp_path / 'audio.webm')
+    with open(not_wav, 'wb') as f:
+        f.write(b'\x1aE\xdf\xa3' + bytes(100))
+
+    assert open_wav_source(stereo, 16000, 1, 2) is None
+    assert open_wav_source(not_wav) is None
+    assert open_wav_source(str(tmp_path / 'missing.wav')) is None
+    assert open_wav_source(stereo).channels == 2
+
+
+def test_streamed_wav_with_extra_chunks_and_unset_size(tmp_path):
+    """FFmpeg writing to a pipe leaves the data size unset; LIST chunks come first"""
+    pcm = (np.arange(1601) * 7).astype('<i2').tobytes()
+    fmt = struct.pack('<HHIIHH', 1, 1, 16000, 32000, 2, 16)
+    body = (b'WAVE' + b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+            + b'LIST' + struct.pack('<I', 5) + b'INFOx\0'
+            + b'data' + struct.pack('<I', 0xFFFFFFFF) + pcm)
+    path = str(tmp_path / 'streamed.wav')
+    with open(path, 'wb') as f:
+        f.write(b'RIFF' + struct.pack('<I', 0xFFFFFFFF) + body)
+
+    with WavSource(path) as source:
+        # The odd trailing byte is not a whole frame
+        assert source.frame_count == 1601 and bytes(source.raw_data) == pcm
+
+
+def test_transcriber_reads_wavs_through_the_mapping(tmp_path):
+    path = str(tmp_path / 'speech.wav')
+    t = np.arange(16000 * 150) / 16000
+    # Two-second bursts of tone separated by one-second pauses
+    write_wav(path, 8000 * np.sin(2 * np.pi * 220 * t) * (t % 3 < 2))
+    texts = []
+    for in_memory in (True, False):
+        converter = WorkingYouTubeToText(max_workers=2, backend=StubBackend(latency=0),
+                                         in_memory_chunks=in_memory, chunk_cache=False, audio_cache=False)
+        loaded = converter._load_audio(path)
+        assert isinstance(loaded, WavSource) == in_memory
+        if in_memory:
+            chunks, fingerprint = converter._scan_audio(loaded)
+            segment = AudioSegment.from_file(path)
+            assert chunks == converter._plan_chunks(segment)
+            assert fingerprint == audio_fingerprint(segment.raw_data, 16000, 2)
+            loaded.close()
+        text, _ = converter.transcribe_audio_file(path)
+        texts.append(text)
+    assert texts[0] == texts[1] and len(texts[0].split()) == 3
+    assert os.path.exists(path)
@@ -1,6 +1,8 @@
 import re
 import unicodedata
 
+from normalization_rules import get_pipeline
+
 
 def normalize_text(text: str) -> str:
 	"""Normalize multilingual transcript text for readability.
@@ -14,31 +16,9 @@ def normalize_text(text: str) -> str:
 	if text is None:
 		return ""
 
-	# Unicode normalize
-	value = unicodedata.normalize('NFC', str(text))
-
-	# Convert Arabic variants to Persian where common
-	# Yeh: ي → ی, Kaf: ك → ک
-	value = value.replace('ي', 'ی').replace('ك', 'ک')
-
-	# Apply Persian typography rules (ZWNJ, punctuation, etc.)
-	value = _apply_persian_typography(value)
-
-	# Normalize numerals: Arabic-Indic to ASCII
-	arabic_indic_digits = '٠١٢٣٤٥٦٧٨٩'
-	for i, d in enumerate(arabic_indic_digits):
-		value = value.replace(d, str(i))
-
-	# Standardize punctuation spaces
-	value = re.sub(r'\s*([،,:;؛.!?])\s*', r'\1 ', value)
-	value = re.sub(r'\s+', ' ', value)
-	value = value.strip()
-
-	# Ensure sentence-ending punctuation
-	if value and value[-1] not in '。．.؟!?！':
-		value += '.'
-
-	return value
+	# NFC, Yeh/Kaf, typography (ZWNJ, punctuation, etc.), numerals, punctuation
+	# spacing and the final period; see normalization_rules.PROFILES['basic']
+	return get_pipeline('basic').normalize(str(text))
 
 
 def segment_sentences(text: str) -> list[str]:
@@ -137,47 +117,4 @@ def _apply_persian_typography(value: str) -> str:
 	if not value:
 		return value
 
-	# Remove tatweel (kashida)
-	value = value.replace('ـ', '')
-
-	# Normalize ellipsis: any 3+ dots → …
-	value = re.sub(r'\.\.{2,}', '…', value)
-
-	# Collapse repeated punctuation (!, ؟, ?, . , ،)
-	value = re.sub(r'([!؟?\.،])\1{1,}', r'\1', value)
-
-	# Reduce stretched letters (limit to 2 repeats for Persian letters)
-	value = re.sub(r'([\u0600-\u06FF])\1{2,}', r'\1\1', value)
-
-	# ZWNJ for common prefixes: می / نمی / بی
-	value = re.sub(r'(?<!\S)(ن?می)[\s\u200c]+(?=[\u0600-\u06FF])', r'\1‌', value)
-	value = re.sub(r'(?<!\S)(بی)[\s\u200c]+(?=[\u0600-\u06FF])', r'\1‌', value)
-
-	# ZWNJ for common suffixes: ها / تر / ترین
-	value = re.sub(r'([\u0600-\u06FF])\s+(ها|تر|ترین)\b', r'\1‌\2', value)
-
-	# ZWNJ for Ezafe after plural: ها ی → ها‌ی
-	value = re.sub(r'ها\s+ی\b', 'ها‌ی', value)
-
-	# Convert ASCII quotes to Persian guillemets for short spans
-	value = re.sub(r'"([^"\n]{1,80})"', r'«\1»', value)
-
-	# Parentheses and guillemets spacing
-	value = re.sub(r'\(\s+', '(', value)
-	value = re.sub(r'\s+\)', ')', value)
-	value = re.sub(r'«\s+', '«', value)
-	value = re.sub(r'\s+»', '»', value)
-
-	# Normalize comma/semicolon spacing and prefer Persian comma visually
-	value = re.sub(r'\s*[،,]\s*', '، ', value)
-	value = re.sub(r'\s*;\s*', '؛ ', value)
-
-	# Prefer Persian question mark when used after Persian letters
-	value = re.sub(r'([\u0600-\u06FF])\?\b', r'\1؟', value)
-
-	# Trim spaces around punctuation produced above
-	value = re.sub(r'\s+', ' ', value)
-	value = value.strip()
-
-	return value
-
+	return get_pipeline('basic_typography').normalize(value)
@@ -0,0 +1,149 @@
+"""Memory-mapped PCM WAV source for long recordings.
+
+AudioSegment.from_file reads a whole recording into memory, and every
+set_channels/set_frame_rate call makes another full copy. WavSource instead
+maps the WAV that download_audio and _ensure_wav write (16 kHz mono 16-bit)
+and hands out memoryview slices of it, so chunks are never copied. Pages of
+the mapping that have been read are released again with
+madvise(MADV_DONTNEED), which keeps resident memory roughly constant however
+long the recording is; released pages are simply read from the file again
+if they are touched later.
+"""
+import mmap
+import os
+import struct
+from collections import namedtuple
+from typing import Iterator, Optional
+
+# Roughly 4 MB of 16 kHz mono PCM, a multiple of every common frame size
+BLOCK_BYTES = 960 * 4096
+
+_WAVE_FORMAT_PCM = 1
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# A chunk of a WavSource; raw_data is a memoryview into the mapping
+PcmSlice = namedtuple('PcmSlice', 'raw_data frame_rate sample_width channels')
+
+
+def _read_layout(f):
+    """(channels, sample_rate, sample_width, data offset, data size) of a PCM WAV file, or None"""
+    header = f.read(12)
+    if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+        return None
+    file_size = os.fstat(f.fileno()).st_size
+    fmt = None
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            return None
+        chunk_id, size = struct.unpack('<4sI', chunk)
+        if chunk_id == b'fmt ':
+            body = f.read(size + (size & 1))
+            if len(body) < 16:
+                return None
+            audio_format, channels, rate, _, block_align, bits = struct.unpack('<HHIIHH', body[:16])
+            if audio_format == _WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                audio_format = struct.unpack('<H', body[24:26])[0]
+            if audio_format != _WAVE_FORMAT_PCM or bits % 8 or block_align != channels * bits // 8:
+                return None
+            fmt = (channels, rate, bits // 8)
+        elif chunk_id == b'data':
+            if fmt is None:
+                return None
+            offset = f.tell()
+            # Streamed writers may leave the size unset (0 or 0xFFFFFFFF)
+            available = file_size - offset
+            size = available if size in (0, 0xFFFFFFFF) else min(size, available)
+            return fmt + (offset, size)
+        else:
+            # Chunks are padded to an even size
+            f.seek(size + (size & 1), os.SEEK_CUR)
+
+
+class WavSource:
+    """Read-only memory map of a PCM WAV file, sliced in milliseconds like an AudioSegment"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            layout = _read_layout(self._file)
+            if layout is None:
+                raise ValueError(f"Not a PCM WAV file: {path}")
+            self.channels, self.frame_rate, self.sample_width, self._offset, size = layout
+            self.frame_width = self.channels * self.sample_width
+            self.frame_count = size // self.frame_width
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        except BaseException:
+            self._file.close()
+            raise
+        if self._mmap is None:
+            self.raw_data = memoryview(b'')
+        else:
+            self.raw_data = memoryview(self._mmap)[self._offset:self._offset + self.frame_count * self.frame_width]
+
+    def __len__(self) -> int:
+        """Duration in milliseconds"""
+        return round(1000 * self.frame_count / self.frame_rate)
+
+    def _frame(self, ms) -> int:
+        return min(self.frame_count, max(0, int(ms * self.frame_rate / 1000)))
+
+    def __getitem__(self, ms: slice) -> PcmSlice:
+        """Zero-copy slice from ms.start to ms.stop milliseconds"""
+        start = self._frame(ms.start or 0)
+        end = self._frame(len(self) if ms.stop is None else ms.stop)
+        return PcmSlice(self.raw_data[start * self.frame_width:max(start, end) * self.frame_width],
+                        self.frame_rate, self.sample_width, self.channels)
+
+    def blocks(self, block_bytes: int = BLOCK_BYTES) -> Iterator[memoryview]:
+        """The PCM in consecutive blocks, releasing each block's pages once the
+        consumer moves on; block_bytes should be a multiple of the frame size
+        the consumer works in"""
+        for start in range(0, len(self.raw_data), block_bytes):
+            yield self.raw_data[start:start + block_bytes]
+            self.release(start, start + block_bytes)
+
+    def release(self, start: int = 0, end: Optional[int] = None):
+        """Drop the resident pages that lie entirely within raw_data[start:end]"""
+        if self._mmap is None or self._mmap.closed:
+            return
+        end = len(self.raw_data) if end is None else min(end, len(self.raw_data))
+        first = -(-(self._offset + start) // mmap.PAGESIZE) * mmap.PAGESIZE
+        last = (self._offset + end) // mmap.PAGESIZE * mmap.PAGESIZE
+        if last > first and hasattr(self._mmap, 'madvise'):
+            self._mmap.madvise(mmap.MADV_DONTNEED, first, last - first)
+
+    def release_ms(self, start_ms, end_ms):
+        """release() for the bytes of a millisecond range"""
+        self.release(self._frame(start_ms) * self.frame_width, self._frame(end_ms) * self.frame_width)
+
+    def close(self):
+        try:
+            self.raw_data.release()
+            if self._mmap is not None:
+                self._mmap.close()
+        except BufferError:
+            # Chunks handed out are still alive; the mapping goes with the last of them
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_wav_source(path: str, frame_rate: Optional[int] = None, channels: Optional[int] = None,
+                    sample_width: Optional[int] = None) -> Optional[WavSource]:
+    """WavSource for path if it is a PCM WAV in the given format, else None"""
+    try:
+        source = WavSource(path)
+    except (OSError, ValueError):
+        return None
+    if any(wanted is not None and actual != wanted for wanted, actual in
+           ((frame_rate, source.frame_rate), (channels, source.channels), (sample_width, source.sample_width))):
+        source.close()
+        return None
+    return source
@@ -3,22 +3,158 @@ import sys
 import re
 import time
 from urllib.parse import urlparse, parse_qs
-import speech_recognition as sr
-import yt_dlp
 import tempfile
 import json
-from persian_text_normalizer import normalize_text, segment_sentences, PersianTextNormalizer
-from pydub import AudioSegment
+import shutil
+import subprocess
+import threading
+import queue
+import wave
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from persian_text_normalizer import STREAM_MAX_PENDING_WORDS, StreamingSegmenter, process_text, strip_commas
+from language_policy import PRIMARY_LANGUAGE, get_language_policy, make_language_policy
+from audio_cache import AudioCache
+from chunk_cache import ChunkResultCache, audio_fingerprint
+from recognizer_backends import CallableBackend, GoogleBackend, make_backend
+from wav_source import WavSource, open_wav_source
+
+# Format expected by Google Web Speech; audio is decoded straight to this once
+TARGET_SAMPLE_RATE = 16000
+TARGET_CHANNELS = 1
+# Fixed chunk length, slightly under 60s to reduce number of requests
+CHUNK_MS = 55_000
+# Per-chunk results of earlier runs, stored under output_dir
+CHUNK_CACHE_FILE = "chunk_cache.sqlite3"
+# Downloaded audio keyed by video id, stored under output_dir
+AUDIO_CACHE_DIR = "audio_cache"
+# Shared request budget of --rpm / --daily-budget (see rate_limiter.py)
+RATE_LIMIT_FILE = "rate_limit.sqlite3"
+# Bytes read from the FFmpeg pipe at a time in streaming mode (~2 s of PCM)
+STREAM_BLOCK_BYTES = 64 * 1024
+
+
+class _FileRun:
+    """State of one file's transcription, shared by the sync and async paths:
+    its speech chunks, language policy, chunk cache and payload prefetching"""
+
+    def __init__(self, segment, speech_chunks, audio_hash, policy, cache, encoder, prefetch, language_key):
+        self.segment = segment
+        self.speech_chunks = speech_chunks
+        self.audio_hash = audio_hash
+        self.policy = policy
+        self.cache = cache
+        self.encoder = encoder
+        self.prefetch = prefetch
+        self.language_key = language_key
+        self.cache_hits = []
+
+    def lookup(self, chunk, index):
+        """Text of the chunk from an earlier run, or None"""
+        if not self.cache:
+            return None
+        cached = self.cache.get(self.audio_hash, chunk.start_ms, chunk.end_ms, self.language_key)
+        if cached is None:
+            return None
+        if self.prefetch:
+            self.prefetch.skip(index)
+        self.cache_hits.append(chunk)
+        return cached[0]
+
+    def store(self, chunk, text, language):
+        if self.cache:
+            self.cache.put(self.audio_hash, chunk.start_ms, chunk.end_ms, self.language_key, text, language)
+
+    def release(self, chunk):
+        if isinstance(self.segment, WavSource):
+            # Done with the chunk's audio; pre-encoded payloads are copies
+            self.segment.release_ms(chunk.start_ms, chunk.end_ms)
+
 
 class WorkingYouTubeToText:
-    def __init__(self):
-        self.recognizer = sr.Recognizer()
-        self.recognizer.energy_threshold = 300
-        self.recognizer.dynamic_energy_threshold = True
-        self.recognizer.pause_threshold = 0.8
+    def __init__(self, max_workers: int = 4, recognize=None, in_memory_chunks: bool = True,
+                 chunking: str = 'vad', language_policy: str = 'fallback',
+                 chunk_cache: bool = True, audio_cache: bool = True, backend=None,
+                 spell_index=None, payload_profile='lossless', async_requests: bool = False,
+                 max_retries: int = 4, retry_options=None, rate_limiter=None):
+        """max_workers bounds how many chunks are recognized concurrently.
+        backend is a RecognizerBackend (see recognizer_backends.py); defaults
+        to Google Web Speech. recognize is a shortcut for a plain callable
+        (audio_data, language) -> text that raises sr.UnknownValueError when
+        nothing is heard.
+        in_memory_chunks hands chunk PCM straight to SpeechRecognition instead
+        of round-tripping each chunk through a temporary WAV file.
+        chunking is 'vad' (cut at pauses, skip chunks without speech) or
+        'fixed' (plain CHUNK_MS slices).
+        language_policy picks how chunks are matched to fa-IR / en-US
+        (fallback, probe, sticky or race; see language_policy.py).
+        chunk_cache keeps finished chunk results on disk so a rerun after a
+        failure only sends the chunks that are still missing.
+        audio_cache keeps downloaded audio and yt-dlp metadata per video id,
+        so repeat requests for the same video skip the download entirely.
+        spell_index is a SpellIndex or the path of one (see spell_correction.py);
+        when given, words missing from its lexicon are corrected after
+        normalization.
+        payload_profile names the FLAC payload profile (see flac_encoder.py)
+        for backends that upload FLAC: chunks are then encoded in-process on a
+        thread pool ahead of their requests instead of by a flac process per
+        request. None sends chunks through SpeechRecognition's own encoder.
+        async_requests makes transcribe_video recognize through
+        transcribe_audio_file_async (pooled keep-alive connections for Google)
+        instead of a thread per in-flight request.
+        max_retries is how often a request that failed with sr.RequestError is
+        tried again, with jittered exponential backoff, while concurrency
+        adapts to errors and throttling and a circuit breaker pauses the
+        pipeline during outages (see request_control.py); 0 fails the file on
+        the first error as before. retry_options are further RequestController
+        options (base_delay, cooldown, max_pause, ...).
+        rate_limiter is a SharedRateLimiter (see rate_limiter.py) that every
+        recognizer request, retries included, takes a token from first, so
+        converters in several processes share one request rate and daily budget.
+        """
+        self._recognizer = None
+        self._recognizer_lock = threading.Lock()
+        if backend is None:
+            backend = CallableBackend(recognize) if recognize else GoogleBackend()
+        self.backend = backend
+        self.max_workers = max(1, int(max_workers))
+        self.in_memory_chunks = in_memory_chunks
+        self.chunking = chunking
+        self.language_policy = language_policy
+        self.last_language_stats = None
+        self._adjust_lock = threading.Lock()
+        self._did_adjust = False
         self.output_dir = "output"
         os.makedirs(self.output_dir, exist_ok=True)
+        self.chunk_cache_path = os.path.join(self.output_dir, CHUNK_CACHE_FILE) if chunk_cache else None
+        self.audio_cache = AudioCache(os.path.join(self.output_dir, AUDIO_CACHE_DIR)) if audio_cache else None
+        if isinstance(spell_index, str):
+            from spell_correction import load_or_build_index
+            spell_index = load_or_build_index(spell_index)
+        self.spell_index = spell_index
+        self.payload_profile = payload_profile
+        self.last_encode_stats = None
+        self.async_requests = async_requests
+        self.max_retries = max_retries
+        self.retry_options = retry_options or {}
+        self._request_control = None
+        self._limiter_start = None
+        self.last_request_stats = None
+        self.rate_limiter = rate_limiter
         
+    @property
+    def recognizer(self):
+        """sr.Recognizer for the WAV file handoff, created on first use."""
+        with self._recognizer_lock:
+            if self._recognizer is None:
+                import speech_recognition as sr
+                recognizer = sr.Recognizer()
+                recognizer.energy_threshold = 300
+                recognizer.dynamic_energy_threshold = True
+                recognizer.pause_threshold = 0.8
+                self._recognizer = recognizer
+        return self._recognizer
+
     def extract_video_id(self, url):
         """Extract YouTube video ID from URL"""
         parsed_url = urlparse(url)
@@ -31,6 +167,15 @@ class WorkingYouTubeToText:
     
     def download_audio(self, url, output_path="audio", max_minutes: int | None = None):
         """Download audio from YouTube video. If max_minutes is provided, only download that initial segment."""
+        result = self._download(url, output_path, max_minutes)
+        if not result:
+            return None
+        downloaded_file, info, download_time = result
+        return downloaded_file, info.get('title') or "output", download_time
+
+    def _download(self, url, output_path="audio", max_minutes: int | None = None):
+        """Download audio and return (file_path, yt-dlp info, seconds), or None on failure."""
+        import yt_dlp
         start_time = time.time()
         print("در حال دانلود فایل صوتی...")
         
@@ -39,6 +184,11 @@ class WorkingYouTubeToText:
             'outtmpl': output_path,
             'quiet': True,
             'no_warnings': True,
+            # Single decode: let FFmpeg write 16 kHz mono PCM WAV right after download
+            'postprocessors': [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'wav'}],
+            'postprocessor_args': {
+                'extractaudio': ['-ac', str(TARGET_CHANNELS), '-ar', str(TARGET_SAMPLE_RATE)]
+            },
         }
 
         # Limit download duration for quick tests
@@ -51,155 +201,464 @@ class WorkingYouTubeToText:
         try:
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 info = ydl.extract_info(url, download=True)
-                downloaded_file = ydl.prepare_filename(info)
-                title = info.get('title') or "output"
+                downloaded_file = self._downloaded_filepath(ydl, info)
                 download_time = time.time() - start_time
                 print(f"دانلود فایل صوتی کامل شد! (زمان: {download_time:.1f} ثانیه)")
-                return downloaded_file, title, download_time
+                return downloaded_file, ydl.sanitize_info(info), download_time
         except Exception as e:
             print(f"خطا در دانلود: {e}")
             return None
+
+    def _downloaded_filepath(self, ydl, info):
+        """Path of the file left on disk after yt-dlp post-processing."""
+        for download in info.get('requested_downloads') or []:
+            if download.get('filepath'):
+                return download['filepath']
+        # Older yt-dlp: the extractor swaps the extension for the WAV it produced
+        return os.path.splitext(ydl.prepare_filename(info))[0] + '.wav'
     
     def transcribe_audio_file(self, audio_path):
-        """Transcribe audio file. For long audio, process in ~50s chunks to
-        avoid Google Web Speech length limits."""
+        """Transcribe audio file. For long audio, process in <60s chunks
+        (cut at pauses by default) to avoid Google Web Speech length limits.
+        Chunks are recognized concurrently (up to self.max_workers) and joined
+        in original order."""
         start_time = time.time()
         print("در حال تبدیل گفتار به متن...")
 
+        segment = None
         try:
-            # Load and normalize audio (mono, 16 kHz)
-            segment = AudioSegment.from_file(audio_path)
-            segment = segment.set_channels(1).set_frame_rate(16000)
+            segment = self._load_audio(audio_path)
+            run = self._start_file(segment, *self._scan_audio(segment))
 
-            chunk_ms = 55_000  # slightly under 60s to reduce number of requests
-            texts = []
-            total_chunks = max(1, (len(segment) + chunk_ms - 1) // chunk_ms)
+            def transcribe(item):
+                index, chunk = item
+                try:
+                    return self._transcribe_cached_chunk(run, chunk, index)
+                finally:
+                    run.release(chunk)
 
-            did_adjust = False
-            for idx in range(0, len(segment), chunk_ms):
-                part = segment[idx: idx + chunk_ms]
+            try:
+                texts = self._map_ordered(transcribe, list(enumerate(run.speech_chunks)))
+            finally:
+                self._finish_file(run)
+            return self._join_transcript(texts, run.cache_hits, start_time)
 
-                # Export temporary WAV for SpeechRecognition
-                tmp_wav = None
-                try:
-                    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tf:
-                        tmp_wav = tf.name
-                    part.export(tmp_wav, format='wav')
-
-                    with sr.AudioFile(tmp_wav) as source:
-                        # Calibrate once for speed
-                        if not did_adjust:
-                            self.recognizer.adjust_for_ambient_noise(source, duration=0.0)
-                            did_adjust = True
-                        audio_data = self.recognizer.record(source)
-
-                    # Try Persian first, then English
+        except Exception as e:
+            return self._file_error(e)
+        finally:
+            if isinstance(segment, WavSource):
+                segment.close()
+
+    async def transcribe_audio_file_async(self, audio_path):
+        """transcribe_audio_file on the running event loop. Up to max_workers
+        chunks are recognized concurrently as coroutines through
+        backend.recognize_async; for Google all requests then share a few
+        keep-alive connections (see speech_client.py) instead of opening one
+        per request on a blocked thread. Decoding, chunking and encoding still
+        run on worker threads. Returns (text, seconds) like the sync version."""
+        import asyncio
+        start_time = time.time()
+        print("در حال تبدیل گفتار به متن (درخواست‌های ناهمگام)...")
+
+        segment = None
+        try:
+            segment = await asyncio.to_thread(self._load_audio, audio_path)
+            run = self._start_file(segment, *await asyncio.to_thread(self._scan_audio, segment))
+            in_flight = asyncio.Semaphore(self.max_workers)
+
+            async def transcribe(index, chunk):
+                async with in_flight:
                     try:
-                        text = self.recognizer.recognize_google(
-                            audio_data,
-                            language='fa-IR'
-                        )
-                        print("✅ متن فارسی تشخیص داده شد!")
-                    except sr.UnknownValueError:
-                        try:
-                            text = self.recognizer.recognize_google(
-                                audio_data,
-                                language='en-US'
-                            )
-                            print("✅ متن انگلیسی تشخیص داده شد!")
-                        except sr.UnknownValueError:
-                            text = ""
-                            print("❌ گفتار تشخیص داده نشد (بخشی از فایل)")
-                    texts.append(text)
-                finally:
-                    if tmp_wav and os.path.exists(tmp_wav):
-                        try:
-                            os.remove(tmp_wav)
-                        except:
-                            pass
+                        return await self._transcribe_cached_chunk_async(run, chunk, index)
+                    finally:
+                        run.release(chunk)
 
-            transcription_time = time.time() - start_time
-            print(f"تبدیل گفتار به متن کامل شد! (زمان: {transcription_time:.1f} ثانیه)")
-            # Join chunks simply; sentence segmentation will handle readability
-            full_text = " ".join(t for t in texts if t).strip()
-            if not full_text:
-                return "[گفتار تشخیص داده نشد - Speech not recognized]", transcription_time
-            return full_text, transcription_time
+            try:
+                texts = await self._gather_ordered([transcribe(index, chunk)
+                                                    for index, chunk in enumerate(run.speech_chunks)])
+            finally:
+                self._finish_file(run)
+                await self.backend.aclose()
+            return self._join_transcript(texts, run.cache_hits, start_time)
 
-        except sr.RequestError as e:
-            print(f"❌ خطا در اتصال: {e}")
-            return f"[خطا در اتصال به سرویس تشخیص گفتار - {e}]", 0
         except Exception as e:
-            print(f"خطا در پردازش فایل صوتی: {e}")
-            return f"[خطا در پردازش فایل صوتی - {e}]", 0
+            return self._file_error(e)
+        finally:
+            if isinstance(segment, WavSource):
+                segment.close()
+
+    def _start_file(self, segment, chunks, audio_hash):
+        """Report the chunk plan and set up one file's language policy, chunk
+        cache, payload prefetching and request controller (see _FileRun)"""
+        speech_chunks = [c for c in chunks if c.has_speech]
+        print(f"فایل صوتی به {len(chunks)} قطعه تقسیم شد ({self.max_workers} پردازش همزمان)")
+        if len(speech_chunks) < len(chunks):
+            print(f"ℹ️ {len(chunks) - len(speech_chunks)} قطعه بدون گفتار نادیده گرفته شد")
+
+        self._did_adjust = False
+        policy = make_language_policy(self.language_policy, self.backend.languages, self.max_workers)
+        cache = ChunkResultCache(self.chunk_cache_path) if self.chunk_cache_path else None
+        encoder = self._flac_encoder() if self.in_memory_chunks else None
+        prefetch = None
+        if encoder:
+            prefetch = encoder.prefetch(
+                lambda i: self._chunk_to_audio_data(segment[speech_chunks[i].start_ms: speech_chunks[i].end_ms]),
+                len(speech_chunks), 2 * self.max_workers)
+        run = _FileRun(segment, speech_chunks, audio_hash, policy, cache, encoder, prefetch,
+                       self._chunk_language_key(policy, prefetch))
+        self._request_control = self._request_controller()
+        return run
+
+    def _finish_file(self, run):
+        """Report one file's requests, language stats and payloads, and close what _start_file opened"""
+        self._report_requests()
+        run.policy.close()
+        if run.cache:
+            run.cache.close()
+        self.last_language_stats = run.policy.stats()
+        if run.encoder:
+            run.prefetch.close()
+            run.encoder.close()
+            self._report_encoding(run.encoder)
+
+    def _file_error(self, error):
+        """Print why a file failed and return its placeholder transcript, as (text, 0)"""
+        import speech_recognition as sr
+        if isinstance(error, sr.RequestError):
+            print(f"❌ خطا در اتصال: {error}")
+            return f"[خطا در اتصال به سرویس تشخیص گفتار - {error}]", 0
+        print(f"خطا در پردازش فایل صوتی: {error}")
+        return f"[خطا در پردازش فایل صوتی - {error}]", 0
+
+    def _join_transcript(self, texts, cache_hits, start_time):
+        """Report a finished file and join its chunk texts. Returns (text, seconds)."""
+        if cache_hits:
+            print(f"♻️ {len(cache_hits)} قطعه از اجرای قبلی بازیابی شد")
+        stats = self.last_language_stats
+        print(f"📊 سیاست زبان '{stats['policy']}': {stats['requests']} درخواست برای "
+              f"{stats['chunks']} قطعه (صرفه‌جویی تخمینی نسبت به fallback: {stats['saved_requests']})")
+
+        transcription_time = time.time() - start_time
+        print(f"تبدیل گفتار به متن کامل شد! (زمان: {transcription_time:.1f} ثانیه)")
+        # Join chunks simply; sentence segmentation will handle readability
+        full_text = " ".join(t for t in texts if t).strip()
+        if not full_text:
+            return "[گفتار تشخیص داده نشد - Speech not recognized]", transcription_time
+        return full_text, transcription_time
+
+    def _load_audio(self, audio_path):
+        """Audio to transcribe, as 16 kHz mono. WAVs already in that format
+        (what download_audio and _ensure_wav write) are memory-mapped, so long
+        recordings are never held in memory; anything else is decoded and
+        converted by pydub."""
+        if self.in_memory_chunks:
+            source = open_wav_source(audio_path, TARGET_SAMPLE_RATE, TARGET_CHANNELS, 2)
+            if source:
+                return source
+        from pydub import AudioSegment
+        segment = AudioSegment.from_file(audio_path)
+        return segment.set_channels(TARGET_CHANNELS).set_frame_rate(TARGET_SAMPLE_RATE)
+
+    def _scan_audio(self, segment):
+        """(chunk plan, audio fingerprint) in one pass over the audio. A
+        WavSource is read block by block and its pages released behind."""
+        if not isinstance(segment, WavSource):
+            return self._plan_chunks(segment), audio_fingerprint(segment.raw_data, segment.frame_rate,
+                                                                 segment.sample_width, segment.channels)
+        import numpy as np
+        from audio_segmenter import FRAME_MS, frame_energies, supports_sample_width
+        vad = self.chunking == 'vad' and supports_sample_width(segment.sample_width)
+        parts = []
+
+        def blocks():
+            # Whole VAD frames per block, so per-block energies join up exactly
+            frame_bytes = segment.frame_rate * FRAME_MS // 1000 * segment.frame_width
+            for block in segment.blocks(frame_bytes * 4096):
+                if vad:
+                    parts.append(frame_energies(block, segment.sample_width, segment.frame_rate))
+                yield block
+        audio_hash = audio_fingerprint(blocks(), segment.frame_rate, segment.sample_width, segment.channels)
+        energies = (np.concatenate(parts) if parts else np.zeros(0)) if vad else None
+        return self._plan_chunks(segment, energies), audio_hash
+
+    def _plan_chunks(self, segment, energies=None):
+        """Chunk boundaries for loaded audio according to self.chunking;
+        energies are the frame energies for VAD when already computed."""
+        from audio_segmenter import Chunk, frame_energies, plan_chunks, supports_sample_width
+        if self.chunking == 'vad' and supports_sample_width(segment.sample_width):
+            if energies is None:
+                energies = frame_energies(segment.raw_data, segment.sample_width, segment.frame_rate)
+            return plan_chunks(energies, duration_ms=len(segment))
+        return [Chunk(start, min(start + CHUNK_MS, len(segment)), True)
+                for start in range(0, len(segment), CHUNK_MS)]
+
+    def _map_ordered(self, fn, items):
+        """Run fn over items on a bounded thread pool, returning results in input order.
+        The first exception cancels chunks that have not started yet and is re-raised."""
+        if self.max_workers <= 1 or len(items) <= 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool:
+            futures = [pool.submit(fn, item) for item in items]
+            try:
+                return [future.result() for future in futures]
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    async def _gather_ordered(self, coroutines):
+        """Await coroutines concurrently, returning results in input order.
+        The first exception cancels the others and is re-raised."""
+        import asyncio
+        tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+        try:
+            return [await task for task in tasks]
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    def _chunk_language_key(self, policy, prefetch=None):
+        """Chunk cache key part for the backend, language policy and payload"""
+        language_key = f"{self.backend.name}:{policy.name}:{','.join(policy.languages)}"
+        if prefetch and prefetch.pool.profile.name != 'lossless':
+            # Reduced payloads may be heard differently; lossless sends the same audio as before
+            language_key += f":{prefetch.pool.profile.name}"
+        return language_key
+
+    def _transcribe_cached_chunk(self, run, chunk, index):
+        """Return the cached text for a chunk, or recognize it and cache the result.
+        With prefetching (see flac_encoder.Prefetcher) the chunk's pre-encoded
+        audio is sent."""
+        cached = run.lookup(chunk, index)
+        if cached is not None:
+            return cached
+        if run.prefetch:
+            text, language = self._recognize_audio_data(run.prefetch.get(index), run.policy)
+        else:
+            text, language = self._transcribe_chunk(run.segment[chunk.start_ms: chunk.end_ms], run.policy)
+        run.store(chunk, text, language)
+        return text
+
+    async def _transcribe_cached_chunk_async(self, run, chunk, index):
+        """_transcribe_cached_chunk with the requests made through backend.recognize_async"""
+        import asyncio
+        # SQLite may wait on another process's write; keep it off the event loop
+        cached = await asyncio.to_thread(run.lookup, chunk, index) if run.cache else None
+        if cached is not None:
+            return cached
+        part = run.segment[chunk.start_ms: chunk.end_ms]
+        if run.prefetch:
+            audio_data = await asyncio.to_thread(run.prefetch.get, index)
+        elif self.in_memory_chunks:
+            audio_data = self._chunk_to_audio_data(part)
+        else:
+            audio_data = await asyncio.to_thread(self._chunk_to_audio_data_via_wav, part)
+        text, language = self._report_language(
+            *await run.policy.recognize_async(self._recognize_or_empty_async, audio_data))
+        if run.cache:
+            await asyncio.to_thread(run.store, chunk, text, language)
+        return text
+
+    def _transcribe_chunk(self, part, policy):
+        """Recognize a single audio chunk with the video's language policy.
+        Returns (text, language)."""
+        if self.in_memory_chunks:
+            audio_data = self._chunk_to_audio_data(part)
+        else:
+            audio_data = self._chunk_to_audio_data_via_wav(part)
+        return self._recognize_audio_data(audio_data, policy)
+
+    def _flac_encoder(self):
+        """FlacEncoderPool for the payload profile, or None when the backend
+        does not upload FLAC or pre-encoding is off"""
+        if self.payload_profile is None or self.backend.payload_format != 'flac':
+            return None
+        from flac_encoder import FlacEncoderPool
+        return FlacEncoderPool(self.payload_profile, workers=self.max_workers)
+
+    def _request_controller(self):
+        """RequestController for one file's requests (see request_control.py)"""
+        from request_control import RequestController
+        # Race sends every language of a chunk at once
+        per_chunk = len(self.backend.languages) if self.language_policy == 'race' else 1
+        limiter = self.rate_limiter
+        # The limiter's totals span every file; _report_requests prints this file's share
+        self._limiter_start = (limiter.requests, limiter.queued_seconds) if limiter else None
+        return RequestController(self.max_workers * per_chunk, self.max_retries, **self.retry_options)
+
+    def _report_requests(self):
+        """Store and print retry, throttling and goodput stats of the file's requests"""
+        control, self._request_control = self._request_control, None
+        stats = self.last_request_stats = control.stats()
+        limiter = self.rate_limiter
+        if limiter:
+            requests, queued = self._limiter_start
+            stats['limited_requests'] = limiter.requests - requests
+            stats['queued_seconds'] = limiter.queued_seconds - queued
+            if stats['queued_seconds'] >= 0.1:
+                print(f"⏳ {stats['queued_seconds']:.1f} ثانیه انتظار برای سهمیه مشترک درخواست‌ها "
+                      f"({stats['limited_requests']} درخواست از این فایل)")
+        if stats['failed']:
+            print(f"🔁 {stats['failed']} درخواست ناموفق ({stats['throttled']} مورد محدودیت نرخ)، "
+                  f"{stats['retries']} تلاش دوباره، کمترین همزمانی {stats['lowest_limit']}، "
+                  f"{stats['breaker_trips']} توقف موقت ({stats['paused_seconds']:.1f} ثانیه)")
+            print(f"   توان مفید: {stats['goodput']:.2f} درخواست موفق در ثانیه "
+                  f"({stats['success_ratio']:.0%} درخواست‌ها موفق)")
+
+    def _report_encoding(self, encoder):
+        """Store and print the encoder pool's per-chunk payload stats"""
+        stats = self.last_encode_stats = encoder.stats()
+        if stats['chunks']:
+            print(f"📦 پروفایل '{stats['profile']}': {stats['chunks']} قطعه، "
+                  f"{stats['payload_bytes'] / 1e6:.2f} مگابایت ارسالی ({stats['ratio']:.0%} PCM)، "
+                  f"زمان فشرده‌سازی {stats['encode_seconds']:.2f} ثانیه "
+                  f"(بیشینه {stats['max_chunk_seconds'] * 1000:.0f} میلی‌ثانیه برای هر قطعه)")
+
+    def _recognize_audio_data(self, audio_data, policy):
+        """Recognize prepared sr.AudioData with the language policy and report the result."""
+        return self._report_language(*policy.recognize(self._recognize_or_empty, audio_data))
+
+    def _report_language(self, text, language):
+        """Print which language a chunk was recognized in; returns (text, language)."""
+        if not language:
+            print("❌ گفتار تشخیص داده نشد (بخشی از فایل)")
+        elif language == PRIMARY_LANGUAGE:
+            print("✅ متن فارسی تشخیص داده شد!")
+        else:
+            print("✅ متن انگلیسی تشخیص داده شد!")
+        return text, language
+
+    def _recognize_or_empty(self, audio_data, language):
+        """Single recognizer request; returns "" when no speech was understood."""
+        import speech_recognition as sr
+        control = self._request_control
+        limiter = self.rate_limiter
+
+        def request():
+            return self.backend.recognize(audio_data, language)
+        try:
+            if control is not None:
+                # The token is taken before the concurrency slot, on every attempt
+                return control.call(request, before=limiter.acquire if limiter else None)
+            if limiter:
+                limiter.acquire()
+            return request()
+        except sr.UnknownValueError:
+            return ""
+
+    async def _recognize_or_empty_async(self, audio_data, language):
+        """_recognize_or_empty through the backend's coroutine."""
+        import speech_recognition as sr
+        control = self._request_control
+        limiter = self.rate_limiter
+
+        async def request():
+            return await self.backend.recognize_async(audio_data, language)
+        try:
+            if control is not None:
+                return await control.call_async(request, before=limiter.acquire_async if limiter else None)
+            if limiter:
+                await limiter.acquire_async()
+            return await request()
+        except sr.UnknownValueError:
+            return ""
+
+    def _chunk_to_audio_data(self, part):
+        """Wrap the chunk's raw PCM as sr.AudioData without touching the disk."""
+        import speech_recognition as sr
+        return sr.AudioData(part.raw_data, part.frame_rate, part.sample_width)
+
+    def _chunk_to_audio_data_via_wav(self, part):
+        """Legacy handoff: export the chunk to a temporary WAV and read it back."""
+        import speech_recognition as sr
+        tmp_wav = None
+        try:
+            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tf:
+                tmp_wav = tf.name
+            part.export(tmp_wav, format='wav')
+
+            with sr.AudioFile(tmp_wav) as source:
+                # Calibrate once for speed
+                with self._adjust_lock:
+                    if not self._did_adjust:
+                        self.recognizer.adjust_for_ambient_noise(source, duration=0.0)
+                        self._did_adjust = True
+                return self.recognizer.record(source)
+        finally:
+            if tmp_wav and os.path.exists(tmp_wav):
+                try:
+                    os.remove(tmp_wav)
+                except:
+                    pass
     
     def transcribe_video(self, url, output_file=None, max_minutes: int | None = None):
         """Main function to transcribe YouTube video"""
         total_start_time = time.time()
         print("شروع فرآیند تبدیل ویدیو به متن...")
-        
+
+        prepared = self._prepare_video(url, max_minutes)
+        if not prepared:
+            return False
+        return self._finish_video(prepared, output_file, total_start_time)
+
+    def _prepare_video(self, url, max_minutes: int | None = None):
+        """Validate the URL and fetch its audio. Returns a dict describing the
+        prepared video (see _finish_video), or None on failure."""
         # Extract video ID and validate URL
         video_id = self.extract_video_id(url)
         if not video_id:
             print("خطا: آدرس YouTube نامعتبر است")
-            return False
+            return None
         
         print(f"شناسه ویدیو: {video_id}")
         
-        # Download audio
-        audio_result = self.download_audio(url, max_minutes=max_minutes)
+        # Download audio (or reuse an earlier download of the same video)
+        audio_result = self._fetch_audio(url, video_id, max_minutes)
         if not audio_result:
-            return False
-        audio_path, video_title, download_time = audio_result
+            return None
+        audio_path, wav_audio_path, video_title, download_time = audio_result
+        return {
+            'url': url,
+            'video_id': video_id,
+            'audio_path': audio_path,
+            'wav_audio_path': wav_audio_path,
+            'title': video_title,
+            'download_time': download_time,
+        }
 
-        # Ensure we have a WAV file for SpeechRecognition
-        wav_audio_path = self._ensure_wav(audio_path)
+    def _finish_video(self, prepared, output_file=None, total_start_time=None):
+        """Transcribe, normalize and save a video returned by _prepare_video."""
+        if total_start_time is None:
+            total_start_time = time.time()
+        url = prepared['url']
+        video_id = prepared['video_id']
+        audio_path = prepared['audio_path']
+        wav_audio_path = prepared['wav_audio_path']
+        video_title = prepared['title']
+        download_time = prepared['download_time']
 
-        # Build output file base name from video title (max 20 chars)
-        base_name = self._make_safe_basename(video_title, fallback=video_id, max_length=20)
-        if not output_file:
-            output_file = os.path.join(self.output_dir, f"{base_name}.txt")
-        
         # Transcribe audio
-        transcript_result = self.transcribe_audio_file(wav_audio_path)
+        if self.async_requests:
+            import asyncio
+            transcript_result = asyncio.run(self.transcribe_audio_file_async(wav_audio_path))
+        else:
+            transcript_result = self.transcribe_audio_file(wav_audio_path)
         if isinstance(transcript_result, tuple):
             transcript_text, transcription_time = transcript_result
         else:
             transcript_text = transcript_result
             transcription_time = 0
-        normalized_text = normalize_text(transcript_text)
-        sentences = segment_sentences(normalized_text)
 
         # Determine if meaningful text was produced (avoid deleting audio if not)
         text_produced = isinstance(transcript_text, str) and not transcript_text.strip().startswith('[')
 
-        # Remove commas per user preference (both Persian and Latin)
-        clean_normalized_text = normalized_text.replace('،', '').replace(',', '')
-        clean_sentences = [s.replace('،', '').replace(',', '') for s in sentences]
-        
         # Save transcript to file
         try:
-            # Write sentences to .txt (one per line); fallback to normalized text if empty
-            text_to_write = "\n".join(clean_sentences) if clean_sentences else clean_normalized_text
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(text_to_write)
-            print(f"متن در فایل {output_file} ذخیره شد")
-            
-            # Also save as JSON for better structure
-            json_output = {
-                'video_id': video_id,
-                'url': url,
-                'title': video_title,
-                'transcript': clean_normalized_text,
-                'method': 'Google Speech Recognition',
-                'sentences': clean_sentences
-            }
-            
-            json_file = os.path.join(self.output_dir, f"{base_name}.json")
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(json_output, f, ensure_ascii=False, indent=2)
-            print(f"اطلاعات کامل در فایل {json_file} ذخیره شد")
-            
+            output_file, json_file = self._write_transcript(video_id, url, video_title,
+                                                            transcript_text, output_file)
+
             total_time = time.time() - total_start_time
             result_payload = {
                 'text_file': output_file,
@@ -224,7 +683,10 @@ class WorkingYouTubeToText:
             # Clean up audio files only if meaningful text was produced
             try:
                 should_delete = locals().get('should_delete_audio', False)
-                if should_delete:
+                if self.audio_cache and self.audio_cache.contains(wav_audio_path):
+                    # Cached audio stays for reuse; the cache's LRU cap bounds disk use
+                    pass
+                elif should_delete:
                     if os.path.exists(audio_path):
                         try:
                             os.remove(audio_path)
@@ -240,6 +702,359 @@ class WorkingYouTubeToText:
             except Exception:
                 pass
 
+    def _write_transcript(self, video_id, url, video_title, transcript_text, output_file=None, sentences=None,
+                          raw_transcript=None):
+        """Normalize a transcript, split it into sentences and save the .txt and .json files.
+        When sentences are given, transcript_text is already normalized and segmented
+        and raw_transcript is the recognizer text it came from. The raw text is
+        saved in the JSON too, so archive_renormalizer can start from it again.
+        Returns (text_file, json_file)."""
+        # Build output file base name from video title (max 20 chars)
+        base_name = self._make_safe_basename(video_title, fallback=video_id, max_length=20)
+        if not output_file:
+            output_file = os.path.join(self.output_dir, f"{base_name}.txt")
+
+        # Normalize and segment once; commas are removed per user preference
+        if sentences is None:
+            raw_transcript = transcript_text
+            processed = process_text(transcript_text)
+            clean_normalized_text = processed['clean_text']
+            clean_sentences = processed['clean_sentences']
+        else:
+            clean_normalized_text = strip_commas(transcript_text)
+            clean_sentences = [strip_commas(s) for s in sentences]
+        if self.spell_index is not None:
+            # Words are corrected one by one, so sentence boundaries stay where they are
+            from spell_correction import repeated_words
+            keep = repeated_words(clean_normalized_text)
+            clean_normalized_text = self.spell_index.correct_text(clean_normalized_text, keep)
+            clean_sentences = [self.spell_index.correct_text(s, keep) for s in clean_sentences]
+
+        # Write sentences to .txt (one per line); fallback to normalized text if empty
+        text_to_write = "\n".join(clean_sentences) if clean_sentences else clean_normalized_text
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(text_to_write)
+        print(f"متن در فایل {output_file} ذخیره شد")
+
+        # Also save as JSON for better structure
+        json_output = {
+            'video_id': video_id,
+            'url': url,
+            'title': video_title,
+            'transcript': clean_normalized_text,
+            'method': 'Google Speech Recognition',
+            'sentences': clean_sentences
+        }
+        if raw_transcript is not None:
+            json_output['raw_transcript'] = raw_transcript
+        if self.spell_index is not None:
+            json_output['spell_index'] = self.spell_index.path
+
+        json_file = os.path.join(self.output_dir, f"{base_name}.json")
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump(json_output, f, ensure_ascii=False, indent=2)
+        print(f"اطلاعات کامل در فایل {json_file} ذخیره شد")
+        return output_file, json_file
+
+    def iter_transcribe_stream(self, url, max_minutes: int | None = None):
+        """Transcribe a video while it downloads, yielding segments in order.
+
+        FFmpeg pipes the audio as 16 kHz mono PCM into a StreamingChunker and
+        every chunk is recognized as soon as it is complete, so the first text
+        arrives after roughly one chunk of audio instead of the whole download.
+        Each segment is a dict with index, start_ms, end_ms, text and language.
+        Streaming always cuts at pauses and does not use the chunk cache.
+        """
+        stream = self._open_pcm_stream(url, max_minutes)
+        if not stream:
+            return
+        process, _ = stream
+        try:
+            yield from self.iter_transcribe_pcm(self._read_pcm(process))
+        finally:
+            self._close_pcm_stream(process)
+
+    def iter_transcribe_pcm(self, pcm_blocks):
+        """Yield transcribed segments for an iterable of 16 kHz mono 16-bit PCM blocks.
+
+        At most 2 * max_workers chunks are in flight; when the oldest one is not
+        finished yet, reading stops until it is, which bounds memory on long videos.
+        """
+        import speech_recognition as sr
+        from audio_segmenter import StreamingChunker
+        chunker = StreamingChunker(TARGET_SAMPLE_RATE, 2)
+        policy = make_language_policy(self.language_policy, self.backend.languages, self.max_workers)
+        pending = deque()
+        index = 0
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        encoder = self._flac_encoder()
+        self._request_control = self._request_controller()
+
+        def recognize(audio_data):
+            if encoder:
+                # Encoded on the encoder pool while earlier chunks are still in flight
+                audio_data = audio_data.result()
+            return self._recognize_audio_data(audio_data, policy)
+
+        def submit(ready):
+            for chunk, pcm in ready:
+                if chunk.has_speech:
+                    audio_data = sr.AudioData(pcm, TARGET_SAMPLE_RATE, 2)
+                    if encoder:
+                        audio_data = encoder.submit(audio_data)
+                    pending.append((chunk, pool.submit(recognize, audio_data)))
+
+        def segment(chunk, future):
+            text, language = future.result()
+            return {'index': index, 'start_ms': chunk.start_ms, 'end_ms': chunk.end_ms,
+                    'text': text, 'language': language}
+
+        try:
+            for block in pcm_blocks:
+                submit(chunker.feed(block))
+                while pending and (pending[0][1].done() or len(pending) > 2 * self.max_workers):
+                    yield segment(*pending.popleft())
+                    index += 1
+            submit(chunker.flush())
+            while pending:
+                yield segment(*pending.popleft())
+                index += 1
+        finally:
+            for _, future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+            self._report_requests()
+            policy.close()
+            self.last_language_stats = policy.stats()
+            if encoder:
+                encoder.close()
+                self.last_encode_stats = encoder.stats()
+
+    def _open_pcm_stream(self, url, max_minutes: int | None = None):
+        """Start FFmpeg decoding the video's audio stream to PCM on stdout.
+        Returns (process, yt-dlp info), or None on failure."""
+        import yt_dlp
+        print("در حال آماده‌سازی پخش جریانی صوت...")
+        ydl_opts = {'format': 'bestaudio/best', 'quiet': True, 'no_warnings': True}
+        try:
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+            ffmpeg = shutil.which('ffmpeg')
+            if not ffmpeg:
+                raise FileNotFoundError("ffmpeg not found in PATH")
+            command = [ffmpeg, '-loglevel', 'error']
+            headers = info.get('http_headers') or {}
+            if headers:
+                command += ['-headers', ''.join(f"{k}: {v}\r\n" for k, v in headers.items())]
+            command += ['-i', info['url']]
+            if isinstance(max_minutes, int) and max_minutes > 0:
+                command += ['-t', str(max_minutes * 60)]
+            command += ['-vn', '-ac', str(TARGET_CHANNELS), '-ar', str(TARGET_SAMPLE_RATE),
+                        '-f', 's16le', 'pipe:1']
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            return process, info
+        except Exception as e:
+            print(f"خطا در دریافت جریان صوتی: {e}")
+            return None
+
+    def _read_pcm(self, process):
+        """Yield PCM blocks from FFmpeg's stdout until the stream ends."""
+        while True:
+            block = process.stdout.read(STREAM_BLOCK_BYTES)
+            if not block:
+                return
+            yield block
+
+    def _close_pcm_stream(self, process):
+        """Stop FFmpeg (the consumer may stop early) and reap the process."""
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.wait()
+
+    def transcribe_video_stream(self, url, output_file=None, max_minutes: int | None = None,
+                                early_sentences: bool = False):
+        """Like transcribe_video, but prints each segment as soon as it is
+        recognized while the audio is still downloading. The sentences match
+        the batch path's; early_sentences releases unpunctuated text in word
+        windows instead of at the end, and the windows may then differ
+        (see StreamingSegmenter)."""
+        import speech_recognition as sr
+        total_start_time = time.time()
+        print("شروع فرآیند تبدیل ویدیو به متن (پخش جریانی)...")
+        video_id = self.extract_video_id(url)
+        if not video_id:
+            print("خطا: آدرس YouTube نامعتبر است")
+            return False
+        print(f"شناسه ویدیو: {video_id}")
+
+        stream = self._open_pcm_stream(url, max_minutes)
+        if not stream:
+            return False
+        process, info = stream
+        # Sentences are normalized and segmented as segments arrive, not after the last one
+        segmenter = StreamingSegmenter(max_pending_words=STREAM_MAX_PENDING_WORDS if early_sentences else None)
+        sentences = []
+        raw_texts = []
+        first_text_time = None
+        try:
+            for segment in self.iter_transcribe_pcm(self._read_pcm(process)):
+                if first_text_time is None:
+                    first_text_time = time.time() - total_start_time
+                    print(f"⚡ اولین متن پس از {first_text_time:.1f} ثانیه")
+                start = segment['start_ms'] // 1000
+                print(f"[{start // 60:02d}:{start % 60:02d}] {segment['text']}")
+                raw_texts.append(segment['text'])
+                sentences += segmenter.feed(segment['text'])
+        except sr.RequestError as e:
+            print(f"❌ خطا در اتصال: {e}")
+            raw_texts.append(f"[خطا در اتصال به سرویس تشخیص گفتار - {e}]")
+            sentences += segmenter.feed(raw_texts[-1])
+        finally:
+            self._close_pcm_stream(process)
+        sentences += segmenter.flush()
+        transcription_time = time.time() - total_start_time
+
+        transcript_text = segmenter.normalized_text
+        if not transcript_text:
+            transcript_text, sentences = "[گفتار تشخیص داده نشد - Speech not recognized]", None
+        try:
+            output_file, json_file = self._write_transcript(video_id, url, info.get('title') or "output",
+                                                            transcript_text, output_file, sentences,
+                                                            ' '.join(t for t in raw_texts if t))
+        except Exception as e:
+            print(f"خطا در ذخیره فایل: {e}")
+            return False
+        return {
+            'text_file': output_file,
+            'json_file': json_file,
+            'title': info.get('title'),
+            'video_id': video_id,
+            'timing': {
+                # Download and recognition overlap completely in streaming mode
+                'download': 0.0,
+                'first_text': first_text_time,
+                'transcription': transcription_time,
+                'total': time.time() - total_start_time
+            }
+        }
+
+    def _fetch_audio(self, url, video_id, max_minutes: int | None = None):
+        """Return (audio_path, wav_path, title, download_time) from the audio
+        cache when possible, otherwise download, convert and cache the audio."""
+        if self.audio_cache:
+            cached = self.audio_cache.lookup(video_id, max_minutes)
+            if cached:
+                wav_path, info = cached
+                print("♻️ فایل صوتی از حافظه نهان بازیابی شد (بدون دانلود)")
+                return wav_path, wav_path, info.get('title') or "output", 0.0
+
+        # Per-video file name so batch downloads never overwrite each other
+        result = self._download(url, output_path=f"audio_{video_id}", max_minutes=max_minutes)
+        if not result:
+            return None
+        audio_path, info, download_time = result
+        title = info.get('title') or "output"
+
+        # Ensure we have a WAV file for SpeechRecognition
+        wav_path = self._ensure_wav(audio_path)
+        if self.audio_cache and wav_path.lower().endswith('.wav'):
+            try:
+                wav_path = self.audio_cache.store(video_id, max_minutes, wav_path, info)
+                if audio_path != wav_path and os.path.exists(audio_path):
+                    os.remove(audio_path)
+                audio_path = wav_path
+            except OSError as e:
+                print(f"⚠️ ذخیره فایل صوتی در حافظه نهان ناموفق بود: {e}")
+        return audio_path, wav_path, title, download_time
+
+    def expand_urls(self, urls):
+        """Expand playlist URLs into their video URLs; other URLs pass through."""
+        import yt_dlp
+        expanded = []
+        for url in urls:
+            parsed_url = urlparse(url)
+            is_playlist = 'list' in parse_qs(parsed_url.query) or parsed_url.path == '/playlist'
+            if self.extract_video_id(url) or not is_playlist:
+                expanded.append(url)
+                continue
+            try:
+                ydl_opts = {'quiet': True, 'no_warnings': True, 'extract_flat': 'in_playlist'}
+                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                    info = ydl.extract_info(url, download=False)
+                for entry in info.get('entries') or []:
+                    if entry and entry.get('id'):
+                        expanded.append(f"https://www.youtube.com/watch?v={entry['id']}")
+                print(f"📃 فهرست پخش: {len(info.get('entries') or [])} ویدیو")
+            except Exception as e:
+                print(f"خطا در خواندن فهرست پخش {url}: {e}")
+        return expanded
+
+    def transcribe_batch(self, urls, max_minutes: int | None = None, prefetch: int = 1):
+        """Transcribe many videos with downloads overlapping recognition.
+
+        A producer thread downloads and decodes the next videos while the
+        current one is recognized and normalized. At most `prefetch` prepared
+        videos wait in the queue, which caps the audio kept on disk.
+        Returns a summary dict with per-video results and throughput.
+        """
+        urls = self.expand_urls(urls)
+        batch_start = time.time()
+        prepared_queue = queue.Queue(maxsize=max(1, prefetch))
+        done = object()
+
+        def producer():
+            try:
+                for url in urls:
+                    prepared_queue.put((url, self._prepare_video(url, max_minutes)))
+            finally:
+                prepared_queue.put(done)
+
+        threading.Thread(target=producer, name="batch-download", daemon=True).start()
+
+        results = []
+        audio_seconds = 0.0
+        while True:
+            item = prepared_queue.get()
+            if item is done:
+                break
+            url, prepared = item
+            print(f"\n🎬 ویدیو {len(results) + 1}/{len(urls)}: {url}")
+            result = False
+            if prepared:
+                duration = self._audio_duration_seconds(prepared['wav_audio_path'])
+                result = self._finish_video(prepared)
+                if result:
+                    audio_seconds += duration
+                    result['audio_seconds'] = duration
+            results.append({'url': url, 'result': result})
+
+        elapsed = time.time() - batch_start
+        succeeded = sum(1 for r in results if r['result'])
+        summary = {
+            'videos': len(results),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'elapsed': elapsed,
+            'audio_minutes': audio_seconds / 60,
+            'videos_per_hour': succeeded * 3600 / elapsed if elapsed else 0.0,
+            'audio_minutes_per_minute': audio_seconds / elapsed if elapsed else 0.0,
+            'results': results,
+        }
+        print("\n📊 خلاصه پردازش دسته‌ای / Batch summary:")
+        print(f"  ویدیوها: {succeeded}/{len(results)} موفق در {elapsed:.1f} ثانیه")
+        print(f"  توان عملیاتی: {summary['videos_per_hour']:.1f} ویدیو در ساعت، "
+              f"{summary['audio_minutes_per_minute']:.2f} دقیقه صوت در هر دقیقه")
+        return summary
+
+    def _audio_duration_seconds(self, path):
+        """Duration of a WAV file from its header (0 if it cannot be read)."""
+        try:
+            with wave.open(path, 'rb') as wf:
+                return wf.getnframes() / float(wf.getframerate())
+        except (wave.Error, OSError, EOFError):
+            return 0.0
+
     def _make_safe_basename(self, title, fallback, max_length=20):
         """Create a filesystem-safe basename from title, limited to max_length.
         Falls back to provided fallback (e.g., video_id) if result is empty.
@@ -265,20 +1080,49 @@ class WorkingYouTubeToText:
 
     def _ensure_wav(self, input_path: str) -> str:
         """Convert downloaded audio to WAV if needed. Returns path to WAV file.
-        Requires FFmpeg available in PATH for pydub to work.
+        Decodes once with FFmpeg straight to 16 kHz mono PCM, so no
+        full-resolution intermediate is written. Requires FFmpeg in PATH.
         """
         try:
             if input_path.lower().endswith('.wav'):
                 return input_path
             output_path = os.path.splitext(input_path)[0] + '.wav'
-            audio = AudioSegment.from_file(input_path)
-            audio.export(output_path, format='wav')
+            ffmpeg = shutil.which('ffmpeg')
+            if not ffmpeg:
+                raise FileNotFoundError("ffmpeg not found in PATH")
+            subprocess.run(
+                [ffmpeg, '-y', '-loglevel', 'error', '-i', input_path,
+                 '-vn', '-ac', str(TARGET_CHANNELS), '-ar', str(TARGET_SAMPLE_RATE),
+                 '-c:a', 'pcm_s16le', output_path],
+                check=True, capture_output=True
+            )
             return output_path
         except Exception as e:
             print(f"❌ تبدیل فایل صوتی به WAV ناموفق بود: {e}")
             print("برای رفع مشکل، FFmpeg را نصب کنید و دوباره تلاش کنید.")
             return input_path
 
+def print_rate_stats(path):
+    """Print the shared request budget's usage and each worker's queued time"""
+    if not os.path.exists(path):
+        print(f"هنوز درخواستی از طریق سهمیه مشترک ارسال نشده است ({path})")
+        return
+    from rate_limiter import SharedRateLimiter
+    limiter = SharedRateLimiter(path)
+    usage = limiter.usage()
+    limiter.close()
+    budget = usage['daily_budget']
+    rpm = usage['requests_per_minute']
+    print(f"📈 امروز ({usage['day']} UTC): {usage['requests_today']} درخواست"
+          + (f" از سهمیه {budget}" if budget else ""))
+    print(f"   دقیقه اخیر: {usage['requests_last_minute']} درخواست"
+          + (f" (سقف {rpm:g} در دقیقه)" if rpm else ""))
+    print(f"{'worker':<32}{'requests':>10}{'queued s':>10}{'avg wait ms':>13}{'max wait s':>12}{'idle s':>10}")
+    for worker in usage['workers']:
+        print(f"{worker['worker']:<32}{worker['requests']:>10}{worker['queued_seconds']:>10.1f}"
+              f"{worker['avg_wait'] * 1000:>13.0f}{worker['max_wait']:>12.1f}{worker['idle_seconds']:>10.0f}")
+
+
 def main():
     print("=" * 50)
     print("برنامه تبدیل ویدیو YouTube به متن (کارآمد)")
@@ -291,6 +1135,7 @@ def main():
     print("3. از زبان فارسی پشتیبانی می‌کند")
     print("4. در صورت عدم تشخیص فارسی، انگلیسی را امتحان می‌کند")
     print("5. برای تبدیل فرمت صوتی از FFmpeg استفاده می‌کند (به صورت خودکار)")
+    print("6. صوت را در محل مکث‌ها برش می‌دهد و بخش‌های بدون گفتار را ارسال نمی‌کند")
     print()
     print("⚠️  محدودیت‌ها:")
     print("- فقط فرمت‌های صوتی پشتیبانی شده کار می‌کنند")
@@ -301,36 +1146,224 @@ def main():
     # Start timer when URL is entered
     overall_start_time = time.time()
     
-    # Get YouTube URL from args or prompt, with optional --max-minutes
+    # Get YouTube URL from args or prompt, with optional --max-minutes / --workers
     max_minutes: int | None = None
+    max_workers = 4
+    chunking = 'vad'
+    language_policy = 'fallback'
+    chunk_cache = True
+    audio_cache = True
+    batch_file = None
+    stream = False
+    early_sentences = False
+    renormalize = False
+    renormalize_without_raw = False
+    backend_name = 'google'
+    spell_index = None
+    payload_profile = 'lossless'
+    async_requests = False
+    max_retries = 4
+    rate_options = {}
+    rate_db = os.path.join("output", RATE_LIMIT_FILE)
+    rate_stats = False
+    backend_options = {}
     args = sys.argv[1:]
-    url = None
+    urls = []
     # Very light parsing to avoid bringing in argparse overhead
-    if args:
-        # Support: working_youtube_to_text.py --max-minutes 5 <url>
-        if args[0] == '--max-minutes' and len(args) >= 3:
+    # Support: working_youtube_to_text.py [--max-minutes 5] [--workers 8] [--fixed-chunks]
+    #          [--language-policy fallback|probe|sticky|race] [--no-cache] [--no-audio-cache]
+    #          [--stream [--early-sentences]] [--backend google|stub] [--spell-index index.bin]
+    #          [--payload lossless|compact|narrowband|minimal|off]
+    #          [--async] [--max-in-flight 8] [--timeout 60] [--retries 4]
+    #          [--rpm 60] [--daily-budget 50000] [--rate-db output/rate_limit.sqlite3] <url>
+    #          working_youtube_to_text.py [options] --batch urls.txt | <url> <url> ... | <playlist-url>
+    #          working_youtube_to_text.py --purge-cache
+    #          working_youtube_to_text.py [--rate-db path] --rate-stats
+    #          working_youtube_to_text.py [--workers N] --renormalize [--force]
+    i = 0
+    while i < len(args):
+        if args[i] == '--max-minutes' and i + 1 < len(args):
             try:
-                max_minutes = int(args[1])
+                max_minutes = int(args[i + 1])
             except ValueError:
                 max_minutes = None
-            url = args[2].strip()
+            i += 2
+        elif args[i] == '--workers' and i + 1 < len(args):
+            try:
+                max_workers = max(1, int(args[i + 1]))
+            except ValueError:
+                pass
+            i += 2
+        elif args[i] == '--language-policy' and i + 1 < len(args):
+            language_policy = args[i + 1]
+            i += 2
+        elif args[i] == '--no-cache':
+            chunk_cache = False
+            i += 1
+        elif args[i] == '--no-audio-cache':
+            audio_cache = False
+            i += 1
+        elif args[i] == '--purge-cache':
+            removed, freed = AudioCache(os.path.join("output", AUDIO_CACHE_DIR)).purge()
+            print(f"🧹 {removed} فایل صوتی از حافظه نهان حذف شد ({freed / 1024 / 1024:.1f} MB)")
+            return
+        elif args[i] == '--fixed-chunks':
+            chunking = 'fixed'
+            i += 1
+        elif args[i] == '--backend' and i + 1 < len(args):
+            backend_name = args[i + 1]
+            i += 2
+        elif args[i] == '--spell-index' and i + 1 < len(args):
+            spell_index = args[i + 1]
+            i += 2
+        elif args[i] == '--payload' and i + 1 < len(args):
+            payload_profile = None if args[i + 1] == 'off' else args[i + 1]
+            i += 2
+        elif args[i] == '--async':
+            async_requests = True
+            i += 1
+        elif args[i] == '--max-in-flight' and i + 1 < len(args):
+            try:
+                backend_options['max_in_flight'] = max(1, int(args[i + 1]))
+            except ValueError:
+                pass
+            i += 2
+        elif args[i] == '--timeout' and i + 1 < len(args):
+            try:
+                backend_options['timeout'] = float(args[i + 1])
+            except ValueError:
+                pass
+            i += 2
+        elif args[i] == '--retries' and i + 1 < len(args):
+            try:
+                max_retries = max(0, int(args[i + 1]))
+            except ValueError:
+                pass
+            i += 2
+        elif args[i] in ('--rpm', '--daily-budget') and i + 1 < len(args):
+            try:
+                value = float(args[i + 1]) if args[i] == '--rpm' else int(args[i + 1])
+                if value > 0:
+                    rate_options['requests_per_minute' if args[i] == '--rpm' else 'daily_budget'] = value
+            except ValueError:
+                pass
+            i += 2
+        elif args[i] == '--rate-db' and i + 1 < len(args):
+            rate_db = args[i + 1]
+            i += 2
+        elif args[i] == '--rate-stats':
+            rate_stats = True
+            i += 1
+        elif args[i] == '--stream':
+            stream = True
+            i += 1
+        elif args[i] == '--early-sentences':
+            early_sentences = True
+            i += 1
+        elif args[i] == '--renormalize':
+            renormalize = True
+            i += 1
+        elif args[i] == '--force':
+            renormalize_without_raw = True
+            i += 1
+        elif args[i] == '--batch' and i + 1 < len(args):
+            batch_file = args[i + 1]
+            i += 2
         else:
-            url = args[0].strip()
-        print(f"آدرس از خط فرمان دریافت شد: {url}")
-        if max_minutes:
-            print(f"فقط {max_minutes} دقیقه اول ویدیو پردازش خواهد شد (برای تست سریع)")
+            urls.append(args[i].strip())
+            i += 1
+    if rate_stats:
+        print_rate_stats(rate_db)
+        return
+    if renormalize:
+        from archive_renormalizer import renormalize_archive
+        stats = renormalize_archive("output", workers=max_workers if '--workers' in args else None,
+                                    include_without_raw=renormalize_without_raw)
+        print(f"🔁 {stats['renormalized']} از {stats['transcripts']} رونوشت دوباره نرمال‌سازی شد "
+              f"({stats['skipped']} رونوشت بدون تغییر رد شد، {stats['changed']} رونوشت تغییر کرد)")
+        if stats['without_raw'] and renormalize_without_raw:
+            print(f"⚠️ {stats['without_raw']} رونوشت متن خام تشخیص گفتار را ندارد و از متن نرمال‌شده دوباره "
+                  f"پردازش شد؛ برای نتیجه یکسان با اجرای تازه، آن ویدیوها را دوباره تبدیل کنید")
+        elif stats['without_raw']:
+            print(f"⚠️ {stats['without_raw']} رونوشت متن خام تشخیص گفتار را ندارد و دست نخورد؛ آن ویدیوها را "
+                  f"دوباره تبدیل کنید، یا با --force از متن نرمال‌شده بازنویسی کنید (برگشت‌ناپذیر)")
+        print(f"⏱️ {stats['seconds']:.2f} ثانیه - {stats['files_per_sec']:.1f} فایل/ثانیه، "
+              f"{stats['chars_per_sec']:,.0f} کاراکتر/ثانیه")
+        return
+    if batch_file:
+        try:
+            with open(batch_file, 'r', encoding='utf-8') as f:
+                urls += [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+        except OSError as e:
+            print(f"خطا در خواندن فایل آدرس‌ها: {e}")
+            return
+    url = urls[0] if urls else None
+    if url:
+        print(f"آدرس از خط فرمان دریافت شد: {url}" if len(urls) == 1
+              else f"{len(urls)} آدرس برای پردازش دسته‌ای دریافت شد")
+    if max_minutes:
+        print(f"فقط {max_minutes} دقیقه اول ویدیو پردازش خواهد شد (برای تست سریع)")
     if not url:
         url = input("لطفاً آدرس ویدیو YouTube را وارد کنید: ").strip()
     
     if not url:
         print("خطا: آدرس ویدیو وارد نشده است")
         return
+    urls = urls or [url]
     
     # Create converter instance
-    converter = WorkingYouTubeToText()
+    try:
+        # Connection limits and timeouts only apply to the network backend
+        backend = make_backend(backend_name, **(backend_options if backend_name == 'google' else {}))
+    except ValueError as e:
+        print(f"خطا: {e}")
+        return
+    if payload_profile:
+        from flac_encoder import get_profile
+        try:
+            get_profile(payload_profile)
+        except ValueError as e:
+            print(f"خطا: {e}")
+            return
+    try:
+        get_language_policy(language_policy)
+    except ValueError as e:
+        print(f"خطا: {e}")
+        return
+    rate_limiter = None
+    if rate_options:
+        from rate_limiter import SharedRateLimiter
+        try:
+            rate_limiter = SharedRateLimiter(rate_db, **rate_options)
+        except ValueError as e:
+            print(f"خطا: {e}")
+            return
+    if spell_index and not os.path.exists(spell_index):
+        print(f"📚 ساخت نمایه املایی از فهرست واژه‌های Hazm در {spell_index} (فقط یک بار)...")
+    converter = WorkingYouTubeToText(max_workers=max_workers, chunking=chunking,
+                                     language_policy=language_policy, chunk_cache=chunk_cache,
+                                     audio_cache=audio_cache, backend=backend,
+                                     spell_index=spell_index, payload_profile=payload_profile,
+                                     async_requests=async_requests, max_retries=max_retries,
+                                     rate_limiter=rate_limiter)
     
-    # Transcribe video
-    result = converter.transcribe_video(url, max_minutes=max_minutes)
+    # Several URLs, a URL file or a playlist: run the overlapped batch pipeline
+    is_playlist = not converter.extract_video_id(url) and 'list=' in url
+    if len(urls) > 1 or batch_file or is_playlist:
+        summary = converter.transcribe_batch(urls, max_minutes=max_minutes)
+        print(f"\n⏱️  کل زمان: {time.time() - overall_start_time:.1f} ثانیه")
+        if summary['failed']:
+            print(f"❌ {summary['failed']} ویدیو ناموفق بود:")
+            for item in summary['results']:
+                if not item['result']:
+                    print(f"- {item['url']}")
+        return
+
+    # Transcribe video (streaming recognizes chunks while the audio downloads)
+    if stream:
+        result = converter.transcribe_video_stream(url, max_minutes=max_minutes, early_sentences=early_sentences)
+    else:
+        result = converter.transcribe_video(url, max_minutes=max_minutes)
     
     # Calculate total time from URL entry to file generation
     total_overall_time = time.time() - overall_start_time
@@ -342,6 +1375,8 @@ def main():
         if isinstance(result, dict) and 'timing' in result:
             timing = result['timing']
             print(f"  📥 دانلود: {timing['download']:.1f} ثانیه")
+            if timing.get('first_text') is not None:
+                print(f"  ⚡ اولین متن: {timing['first_text']:.1f} ثانیه")
             print(f"  🎤 تبدیل گفتار: {timing['transcription']:.1f} ثانیه")
             print(f"  ⚙️  پردازش داخلی: {timing['total'] - timing['download'] - timing['transcription']:.1f} ثانیه")
         print("\n📄 فایل‌های خروجی:")